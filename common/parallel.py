@@ -0,0 +1,79 @@
+import math
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+def pool_context():
+    """
+    'fork', gdzie jest dostepny: skrypty laboratoryjne nie maja bloku
+    if __name__ == '__main__', a 'spawn'/'forkserver' importuja modul glowny
+    w kazdym procesie potomnym (ponowne uruchomienie calego skryptu).
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
+
+
+def chunk_bounds(n, workers, chunksize=None):
+    """
+    Podzial n elementow na fragmenty (start, stop); domyslnie ~4 fragmenty
+    na proces, zeby wolniejsze fragmenty nie blokowaly konca obliczen.
+    """
+    if chunksize is None:
+        chunksize = max(1, math.ceil(n / (4 * workers)))
+    return [(start, min(start + chunksize, n)) for start in range(0, n, chunksize)]
+
+
+def run_chunks(func, tasks, sizes, workers=1, label='postep', progress=True):
+    """
+    Wywoluje func(*task) dla kazdego zadania - w puli procesow albo, dla
+    workers=1, w biezacym procesie. Postep (suma sizes ukonczonych zadan)
+    jest wypisywany na stderr.
+
+    Parametry:
+        func : callable
+            Funkcja z poziomu modulu (musi dac sie przeslac do procesu potomnego)
+        tasks : list
+            Krotki argumentow func
+        sizes : list
+            Liczba elementow w kazdym zadaniu (do raportu postepu)
+        workers : int
+            Liczba procesow
+        label : str
+            Opis w raporcie postepu
+
+    Zwraca liste wynikow w kolejnosci tasks, niezaleznie od kolejnosci
+    ukonczenia zadan.
+    """
+    total = sum(sizes)
+    results = [None] * len(tasks)
+    done = 0
+
+    def report(count):
+        if progress:
+            print(f"\r{label}: {count}/{total} ({count / max(total, 1):.0%})", end='',
+                  file=sys.stderr)
+
+    if workers == 1:
+        for i, task in enumerate(tasks):
+            results[i] = func(*task)
+            done += sizes[i]
+            report(done)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as pool:
+            futures = {pool.submit(func, *task): i for i, task in enumerate(tasks)}
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                done += sizes[i]
+                report(done)
+    if progress:
+        print(file=sys.stderr)
+    return results
+
+
+def default_workers(workers=None):
+    """Liczba procesow: podana albo os.cpu_count()"""
+    return workers or os.cpu_count() or 1
@@ -0,0 +1,158 @@
+import inspect
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import OptimizeWarning, curve_fit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from parallel import chunk_bounds, default_workers, run_chunks
+
+
+# Modele P(V) i ich jakobiany dP/dparametry (kolumny w kolejnosci parametrow)
+def lin(V, a, b): return a*V + b
+def exp_m(V, P0, alpha, V0): return P0*(np.exp(alpha*(V - V0)) - 1)
+def log_m(V, Pmax, beta, V50, c): return Pmax/(1 + np.exp(-beta*(V - V50))) + c
+
+
+def lin_jac(V, a, b):
+    return np.column_stack([V, np.ones_like(V)])
+
+
+def exp_m_jac(V, P0, alpha, V0):
+    e = np.exp(alpha*(V - V0))
+    return np.column_stack([e - 1, P0*e*(V - V0), -P0*alpha*e])
+
+
+def log_m_jac(V, Pmax, beta, V50, c):
+    s = 1/(1 + np.exp(-beta*(V - V50)))
+    ds = Pmax*s*(1 - s)
+    return np.column_stack([s, ds*(V - V50), -ds*beta, np.ones_like(V)])
+
+
+# Slownik [model]:[funkcja, startowe parametry]
+MODELS = {
+    'liniowy': (lin, [5, 0]),
+    'wykladniczy': (exp_m, [2, 0.5, 0]),
+    'logistyczny': (log_m, [120, 1, 5, -60]),
+}
+JACOBIANS = {lin: lin_jac, exp_m: exp_m_jac, log_m: log_m_jac}
+
+
+def param_names(func):
+    """Nazwy parametrow modelu (argumenty funkcji poza V)"""
+    return list(inspect.signature(func).parameters)[1:]
+
+
+def fit_model(func, V, P, p0, maxfev=10000):
+    """
+    Jedno dopasowanie curve_fit (z jakobianem z JACOBIANS, jesli jest).
+    Zwraca (params, rmse, blad) - blad to None albo opis przyczyny
+    niepowodzenia (wtedy params i rmse sa NaN).
+    """
+    nan = np.full(len(p0), np.nan)
+    try:
+        with warnings.catch_warnings(), np.errstate(over='ignore', invalid='ignore'):
+            # Brak oszacowania kowariancji nie psuje samych parametrow
+            warnings.simplefilter('ignore', OptimizeWarning)
+            params, _ = curve_fit(func, V, P, p0=p0, jac=JACOBIANS.get(func), maxfev=maxfev)
+            rmse = np.sqrt(np.mean((P - func(V, *params))**2))
+    except (RuntimeError, ValueError, TypeError) as e:
+        return nan, np.nan, f"{type(e).__name__}: {e}"
+    if not np.all(np.isfinite(params)) or not np.isfinite(rmse):
+        return nan, np.nan, "wynik nieskonczony (przepelnienie modelu)"
+    return params, rmse, None
+
+
+def _fit_chunk(V, names, P, models, maxfev):
+    """Wszystkie modele dla kolumn P (n, len(names)); lista rekordow tabeli"""
+    records = []
+    for j, patient in enumerate(names):
+        ok = np.isfinite(V) & np.isfinite(P[:, j])
+        for model, (func, p0) in models.items():
+            if np.count_nonzero(ok) <= len(p0):
+                params, rmse = np.full(len(p0), np.nan), np.nan
+                error = f"za malo punktow ({np.count_nonzero(ok)}) dla {len(p0)} parametrow"
+            else:
+                params, rmse, error = fit_model(func, V[ok], P[ok, j], p0, maxfev)
+            records.append({'patient': patient, 'model': model, 'rmse': rmse, 'error': error,
+                            **dict(zip(param_names(func), params))})
+    return records
+
+
+def fit_cohort(df, volume='V', patients=None, models=None, maxfev=10000,
+               workers=None, chunksize=None, progress=True):
+    """
+    Dopasowanie wszystkich modeli do wszystkich pacjentow (kolumn P(V))
+    w puli procesow. Kolumny sa dzielone na fragmenty - jedno zadanie to
+    fragment kolumn i wszystkie modele (tablice numpy, bez DataFrame
+    w procesach potomnych).
+
+    Parametry:
+        df : DataFrame
+            Kolumna objetosci i kolumny cisnien pacjentow (NaN - brak pomiaru)
+        volume : str
+            Nazwa kolumny objetosci
+        patients : list
+            Kolumny pacjentow (domyslnie wszystkie poza volume)
+        models : dict
+            {nazwa: (funkcja, p0)} - funkcje z poziomu modulu (domyslnie MODELS)
+        maxfev : int
+            Limit wywolan funkcji w curve_fit
+        workers : int
+            Liczba procesow (domyslnie os.cpu_count()); 1 - bez puli
+        chunksize : int
+            Liczba pacjentow na zadanie (domyslnie ~4 zadania na proces)
+        progress : bool
+            Postep na stderr
+
+    Zwraca (table, stats):
+        table - wiersz na (pacjent, model): patient, model, rmse, best
+                (model wybrany - najmniejsze RMSE), error (przyczyna
+                niepowodzenia albo None) i kolumny parametrow wszystkich
+                modeli (NaN dla parametrow innych modeli);
+        stats - patients, fits, failures, workers, wall_time,
+                throughput [pacjenci/s].
+    """
+    models = MODELS if models is None else models
+    patients = [c for c in df.columns if c != volume] if patients is None else list(patients)
+    V = df[volume].to_numpy(dtype=float)
+    P = df[patients].to_numpy(dtype=float)
+    n = len(patients)
+    workers = default_workers(workers)
+    bounds = chunk_bounds(n, workers, chunksize)
+
+    t0 = time.perf_counter()
+    tasks = [(V, patients[a:b], P[:, a:b], models, maxfev) for a, b in bounds]
+    results = run_chunks(_fit_chunk, tasks, [b - a for a, b in bounds], workers,
+                         label='dopasowanie', progress=progress)
+    wall_time = time.perf_counter() - t0
+
+    columns = ['patient', 'model', 'rmse', 'best', 'error']
+    for func, _ in models.values():
+        columns += [name for name in param_names(func) if name not in columns]
+    table = pd.DataFrame([r for chunk in results for r in chunk])
+    best = table['rmse'].notna() & (table['rmse'] ==
+                                    table.groupby('patient', sort=False)['rmse'].transform('min'))
+    # Remisy RMSE: pierwszy model w kolejnosci models
+    table['best'] = best & (best.groupby(table['patient'], sort=False).cumsum() == 1)
+    table = table.reindex(columns=columns)
+
+    failures = int(table['error'].notna().sum())
+    stats = {
+        'patients': n,
+        'fits': len(table),
+        'failures': failures,
+        'workers': workers,
+        'wall_time': wall_time,
+        'throughput': n / wall_time,
+    }
+    return table, stats
+
+
+def best_fits(table):
+    """Wiersze wybranych modeli, indeksowane pacjentem"""
+    return table[table['best']].set_index('patient')
@@ -0,0 +1,53 @@
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import OptimizeWarning, curve_fit
+from fitting import MODELS, best_fits, fit_cohort
+
+N_PATIENTS = 3000
+
+# Kohorta syntetyczna: krzywe PA/PB/PC z patients.csv przeskalowane losowo,
+# z szumem pomiaru i brakujacymi pomiarami u co 50. pacjenta
+df = pd.read_csv('patients.csv')
+V = df['V'].values
+rng = np.random.default_rng(0)
+base = df[['PA', 'PB', 'PC']].to_numpy()[:, np.arange(N_PATIENTS) % 3]
+P = base * rng.uniform(0.7, 1.3, N_PATIENTS) + rng.normal(0, 2.0, base.shape)
+P[rng.random(base.shape) < 0.2 * (np.arange(N_PATIENTS) % 50 == 0)] = np.nan
+cohort = pd.concat([df[['V']], pd.DataFrame(P, columns=[f'P{k:05d}' for k in range(N_PATIENTS)])],
+                   axis=1)
+
+print("=" * 80)
+print(f"Dopasowanie modeli P(V) dla kohorty {N_PATIENTS} pacjentow")
+print("=" * 80)
+
+# Punkt odniesienia: petla jak w zadanie_zaliczeniowe.py (curve_fit bez jakobianu)
+sample = cohort.columns[1:201]
+warnings.simplefilter('ignore', OptimizeWarning)
+t0 = time.perf_counter()
+for pac in sample:
+    ok = np.isfinite(cohort[pac].values)
+    for func, p0 in MODELS.values():
+        try:
+            curve_fit(func, V[ok], cohort[pac].values[ok], p0=p0, maxfev=10000)
+        except (RuntimeError, ValueError, TypeError):
+            pass
+loop_rate = len(sample) / (time.perf_counter() - t0)
+print(f"{'petla curve_fit (200 pacjentow)':>40}: {loop_rate:>8.1f} pacjentow/s")
+
+for workers in sorted({1, os.cpu_count() or 1}):
+    table, stats = fit_cohort(cohort, workers=workers, progress=False)
+    print(f"{f'fit_cohort, procesy: {workers}':>40}: {stats['throughput']:>8.1f} pacjentow/s "
+          f"({stats['wall_time']:.1f} s, nieudane dopasowania: {stats['failures']})")
+
+print("\nWybrane modele:")
+print(best_fits(table)['model'].value_counts().to_string())
+print("\nPrzyczyny niepowodzen:")
+failed = table[table['error'].notna()]
+print(failed.groupby(['model', 'error']).size().to_string() if len(failed) else "brak")
+print("\nParametry modeli wybranych (mediana):")
+print(table[table['best']].drop(columns='best').groupby('model').median(numeric_only=True)
+      .dropna(axis=1, how='all').round(3).to_string())
@@ -1,50 +1,44 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.optimize import curve_fit
 from scipy.interpolate import interp1d
 import pandas as pd
+from fitting import MODELS, best_fits, fit_cohort, param_names
 
-# Definicje pomocnicznych funkcji modeli
-def lin(V,a,b): return a*V+b
-def exp_m(V,P0,alpha,V0): return P0*(np.exp(alpha*(V-V0))-1)
-def log_m(V,Pmax,beta,V50,c): return Pmax/(1+np.exp(-beta*(V-V50)))+c
-
-# Slownik [model]:[funkcja, startowe parametry]
-modele = {
-    'liniowy': (lin, [5,0]),
-    'wykladniczy': (exp_m, [2,0.5,0]),
-    'logistyczny': (log_m, [120,1,5,-60])    
-}
+# Slownik [model]:[funkcja, startowe parametry] - definicje modeli w fitting.py
+modele = MODELS
 
 df = pd.read_csv('patients.csv')
 V = df['V'].values
 
+# Wszyscy pacjenci (kolumny poza V) i wszystkie modele naraz, w puli procesow
+tabela, stats = fit_cohort(df, volume='V', models=modele)
+pacjenci = list(tabela['patient'].unique())
+najlepsze = best_fits(tabela)
+print(f"Dopasowano {stats['patients']} pacjentow x {len(modele)} modele w {stats['wall_time']:.2f} s "
+      f"({stats['throughput']:.1f} pacjentow/s, procesy: {stats['workers']}, "
+      f"nieudane: {stats['failures']})\n")
+
 wyniki = {}
-fig, ax = plt.subplots(1,3,figsize=(15,4))
+fig, ax = plt.subplots(1,len(pacjenci),figsize=(5*len(pacjenci),4), squeeze=False)
+ax = ax[0]
 
 # Analiza dla kazdego pacjenta
-for i, pac in enumerate(['PA', 'PB', 'PC']):
+for i, pac in enumerate(pacjenci):
     P = df[pac].values
     
-    # Dopasowanie modelu i szukanie najlepszego
-    best_rmse, best_model, best_params = np.inf, None, None
+    # Wyniki dopasowan i najlepszy model (najmniejsze RMSE)
+    for _, wiersz in tabela[tabela['patient'] == pac].iterrows():
+        if pd.isna(wiersz['error']):
+            print(f"{pac} {wiersz['model']:12s}: RMSE={wiersz['rmse']:.2f}")
+        else:
+            print(f"{pac} {wiersz['model']:12s}: NIEUDANE - {wiersz['error']}")
     
-    for nazwa, (func,p0) in modele.items():
-        try:
-            # Szukamy optymalnych parametrow
-            params, _ = curve_fit(func,V,P,p0=p0, maxfev=10000)
-            
-            # Liczymy bledy i ich kwadraty
-            rmse = np.sqrt(np.mean((P-func(V,*params))**2))
-            print(f"{pac} {nazwa:12s}: RMSE={rmse:.2f}")
-            
-            # Wybor najlepszego modelu
-            if rmse < best_rmse:
-                best_rmse, best_model, best_params = rmse, nazwa, params
-            
-        except:
-            pass
-        
+    if pac not in najlepsze.index:
+        print(f"-> {pac}: zaden model nie zostal dopasowany\n")
+        continue
+    best_model = najlepsze.loc[pac, 'model']
+    best_rmse = najlepsze.loc[pac, 'rmse']
+    best_params = najlepsze.loc[pac, param_names(modele[best_model][0])].to_numpy(dtype=float)
     print(f"-> {pac}: Najlepszy = {best_model.upper()}, RMSE={best_rmse:.2f}\n")
     
     # C dla P=80,100,120
@@ -52,8 +46,9 @@ for i, pac in enumerate(['PA', 'PB', 'PC']):
     
     # model logistyczny ma CHYBA problemy z ekstrapolacją, zmieniam na liniowy
     if pac == 'PA' and best_model == 'logistyczny':
-        func_lin, p0_lin = modele['liniowy']
-        params_lin, _ = curve_fit(func_lin, V, P, p0=p0_lin, maxfev=10000)
+        func_lin = modele['liniowy'][0]
+        lin_wiersz = tabela[(tabela['patient'] == pac) & (tabela['model'] == 'liniowy')].iloc[0]
+        params_lin = lin_wiersz[param_names(func_lin)].to_numpy(dtype=float)
         print(f"  UWAGA: Model logistyczny ma problemy z ekstrapolacją, używam liniowego")
         func_compliance = func_lin
         params_compliance = params_lin
@@ -92,7 +87,7 @@ plt.show()
 
 # Porownanie
 print("POROWNANIE PODATNOSCI")
-for pac in ['PA','PB','PC']:
+for pac in wyniki:
     print(f"{pac}: ", end="")
     for p in [80,100,120]:
         print(f"C@{p}={wyniki[pac]['C'][p]:.3f} ", end="")
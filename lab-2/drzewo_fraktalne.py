@@ -0,0 +1,41 @@
+import gc
+import time
+import tracemalloc
+
+from fractal_tree import fractal_tree, tree_network
+
+MMHG = 133.322 # Pa/mmHg
+
+# (opis, argumenty fractal_tree, czy rozwiazywac siec)
+CASES = [
+    ("symetryczne, 20 pokolen", dict(generations=20), True),
+    ("asymetryczne 0.75, r_min 170 um", dict(generations=64, asymmetry=0.75, r_min=1.7e-4), True),
+    ("symetryczne, 23 pokolenia", dict(generations=23), False),
+    ("asymetryczne 0.75, r_min 85 um", dict(generations=64, asymmetry=0.75, r_min=8.5e-5), False),
+]
+
+print("=" * 100)
+print("Generator drzewa fraktalnego (prawo Murraya): czas budowy i pamiec")
+print("=" * 100)
+print(f"{'drzewo':>34} {'naczynia':>11} {'wyjscia':>10} {'budowa [s]':>11} "
+      f"{'szczyt [MB]':>12} {'wynik [MB]':>11} {'B/naczynie':>11} {'solve [s]':>10}")
+
+for name, args, solve in CASES:
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    edges, vessels, outlets = fractal_tree(**args)
+    build = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size = edges.nbytes + vessels.nbytes + outlets.nbytes
+    solve_time = '-'
+    if solve:
+        t0 = time.perf_counter()
+        tree_network(edges, vessels, outlets, 100 * MMHG, 10 * MMHG).solve()
+        solve_time = f"{time.perf_counter() - t0:.2f}"
+
+    print(f"{name:>34} {len(edges):>11,d} {len(outlets):>10,d} {build:>11.2f} "
+          f"{peak / 2**20:>12.0f} {size / 2**20:>11.0f} {size / len(edges):>11.0f} {solve_time:>10}")
+    del edges, vessels, outlets
@@ -0,0 +1,90 @@
+import numpy as np
+
+from network import VascularNetwork
+from vessels import ETA, VesselArray
+
+
+def murray_factors(asymmetry=1.0, exponent=3.0):
+    """
+    Wspolczynniki promieni dzieci r1 = f1 r, r2 = f2 r przy bifurkacji
+    z prawem Murraya r^k = r1^k + r2^k i asymetria gamma = r2 / r1 <= 1:
+        f1 = (1 + gamma^k)^(-1/k),  f2 = gamma * f1.
+    """
+    if not 0 < asymmetry <= 1:
+        raise ValueError("asymmetry musi nalezec do (0, 1]")
+    f1 = (1 + asymmetry**exponent) ** (-1 / exponent)
+    return f1, asymmetry * f1
+
+
+def fractal_tree(generations, r_root=0.012, L_root=0.3, asymmetry=1.0, exponent=3.0,
+                 r_min=0.0, eta=ETA):
+    """
+    Generator bifurkacyjnego drzewa tetniczego: naczynie korzenia (wezly 0 -> 1)
+    i kolejne pokolenia - kazde naczynie o promieniu >= r_min rozgalezia sie
+    na dwoje wg prawa Murraya (murray_factors). Dlugosc naczynia jest
+    proporcjonalna do promienia: L = (L_root / r_root) * r.
+
+    Drzewo budowane jest pokoleniami, operacjami na tablicach, bez obiektow
+    dla pojedynczych naczyn. Naczynie i numeruje krawedz (parent, child)
+    z edges[i]; wezly sa numerowane pokoleniami.
+
+    Parametry:
+        generations : int
+            Liczba pokolen (korzen to pokolenie 0); drzewo symetryczne ma
+            2**generations - 1 naczyn
+        r_root, L_root : float
+            Promien i dlugosc naczynia korzenia [m]
+        asymmetry : float
+            Stosunek promieni dzieci r2 / r1 (1 - drzewo symetryczne)
+        exponent : float
+            Wykladnik prawa Murraya
+        r_min : float
+            Naczynia ciensze niz r_min nie rozgaleziaja sie dalej [m]
+        eta : float
+            Lepkosc [Pa*s]
+
+    Zwraca (edges (E, 2), vessels VesselArray, outlets - wezly koncowe).
+    """
+    f1, f2 = murray_factors(asymmetry, exponent)
+    nodes = np.array([1], dtype=np.int64)
+    radii = np.array([r_root])
+    parents_all, children_all, radii_all = [np.array([0])], [nodes], [radii]
+    outlets = []
+    next_node = 2
+
+    for _ in range(1, generations):
+        split = radii >= r_min
+        outlets.append(nodes[~split])
+        parents, r_parent = nodes[split], radii[split]
+        m = len(parents)
+        if m == 0:
+            break
+        nodes = np.arange(next_node, next_node + 2 * m, dtype=np.int64)
+        next_node += 2 * m
+        radii = np.empty(2 * m)
+        radii[0::2] = f1 * r_parent
+        radii[1::2] = f2 * r_parent
+        parents_all.append(np.repeat(parents, 2))
+        children_all.append(nodes)
+        radii_all.append(radii)
+    else:
+        outlets.append(nodes)
+
+    edges = np.empty((next_node - 1, 2), dtype=np.int64)
+    edges[:, 0] = np.concatenate(parents_all)
+    del parents_all
+    edges[:, 1] = np.concatenate(children_all)
+    del children_all
+    r = np.concatenate(radii_all)
+    del radii_all
+    L = r * (L_root / r_root)
+    vessels = VesselArray(L, r, np.full(len(r), eta), copy=False)
+    return edges, vessels, np.concatenate(outlets)
+
+
+def tree_network(edges, vessels, outlets, P_in, P_out, **options):
+    """Siec z drzewa fractal_tree: P_in w wezle 0, P_out we wszystkich wyjsciach"""
+    nodes = np.concatenate([[0], outlets])
+    pressures = np.concatenate([[P_in], np.full(len(outlets), float(P_out))])
+    return VascularNetwork(edges, vessels.R, (nodes, pressures), n_nodes=len(edges) + 1,
+                           **options)
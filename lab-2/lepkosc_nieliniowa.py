@@ -0,0 +1,113 @@
+import time
+
+import numpy as np
+import matplotlib.pyplot as plt
+from fractal_tree import fractal_tree
+from vessels import VesselArray
+from viscosity import HematocritNetwork
+
+MMHG = 133.322 # Pa/mmHg
+
+# Scenariusze: hematokryt krwi doplywajacej
+SCENARIOS = [("anemia", 0.25), ("norma", 0.45), ("czerwienica", 0.65)]
+
+# Mikrokrazenie: tetniczka r = 50 um, L/r = 40, drzewo asymetryczne do kapilar r = 2 um
+TREE = dict(generations=64, r_root=5e-5, L_root=2e-3, asymmetry=0.75, r_min=2e-6)
+
+
+def microvascular_unit(edges, vessels, outlets, venous_scale=1.2):
+    """
+    Tetniczka - kapilary - zylka: drzewo tetnicze i jego lustrzane odbicie
+    (zyly o promieniach venous_scale razy wiekszych) zszyte w wezlach
+    koncowych. Siec nie jest drzewem. Zwraca (edges, vessels, wejscie, wyjscie).
+    """
+    n = len(edges) + 1
+    mirror = np.arange(n) + n
+    mirror[outlets] = outlets
+    all_edges = np.concatenate([edges, mirror[edges][:, ::-1]])
+    used, all_edges = np.unique(all_edges, return_inverse=True)
+    unit = VesselArray(np.tile(vessels.L, 2), np.concatenate([vessels.r, venous_scale * vessels.r]))
+    return all_edges.reshape(-1, 2), unit, int(np.searchsorted(used, 0)), int(np.searchsorted(used, n))
+
+
+tree_edges, tree_vessels, tree_outlets = fractal_tree(**TREE)
+tree_boundary = (np.concatenate([[0], tree_outlets]),
+                 np.concatenate([[60 * MMHG], np.full(len(tree_outlets), 25 * MMHG)]))
+unit_edges, unit_vessels, inlet, outlet = microvascular_unit(tree_edges, tree_vessels, tree_outlets)
+unit_boundary = {inlet: 60 * MMHG, outlet: 15 * MMHG}
+
+print("=" * 108)
+print("Lepkosc zalezna od srednicy i hematokrytu (Pries, efekt Fahraeusa-Lindqvista i rozdzial faz)")
+print("=" * 108)
+print(f"{'siec':>34} {'scenariusz':>12} {'H':>5} {'iteracje':>9} {'CG':>5} {'LU':>3} "
+      f"{'czas [s]':>9} {'ms/iter.':>9} {'Q / Q_norma':>12} {'H kapilar':>10}")
+
+results = {}
+for name, edges, vessels, boundary in [
+        ("drzewo tetnicze", tree_edges, tree_vessels, tree_boundary),
+        ("tetniczka-kapilary-zylka", unit_edges, unit_vessels, unit_boundary)]:
+    net = HematocritNetwork(edges, vessels, boundary)
+    capillary = net.D < 6
+    solutions = {label: net.solve(H) for label, H in SCENARIOS}
+    results[name] = (net, solutions)
+    Q_norm = solutions['norma']['Q_total']
+    for label, H in SCENARIOS:
+        s = solutions[label]
+        print(f"{f'{name} ({len(edges)})':>34} {label:>12} {H:>5.2f} {s['iterations']:>9d} "
+              f"{s['cg_iterations']:>5d} {s['factorizations']:>3d} {s['wall_time']:>9.2f} "
+              f"{s['time_per_solve'] * 1e3:>9.1f} {s['Q_total'] / Q_norm:>12.3f} "
+              f"{s['hematocrit'][capillary].mean():>10.3f}")
+
+# Porownanie: nowy rozklad LU w kazdej iteracji zamiast CG z poprzednim rozkladem
+net = results["tetniczka-kapilary-zylka"][0]
+t0 = time.perf_counter()
+net.network.factorize()
+print(f"\nRozklad LU sieci tetniczka-kapilary-zylka: {time.perf_counter() - t0:.3f} s "
+      f"(CG z poprzednim rozkladem: srednio "
+      f"{net.stats['cg_iterations'] / net.stats['linear_solves']:.1f} iteracji na rozwiazanie)")
+
+# Start z poprzedniego rozwiazania: gesty przeglad hematokrytu
+H_sweep = np.arange(0.20, 0.701, 0.025)
+timing = {}
+for mode in ("zimny start", "cieply start"):
+    t0 = time.perf_counter()
+    iterations, Q_sweep = 0, []
+    warm = HematocritNetwork(tree_edges, tree_vessels, tree_boundary)
+    for H in H_sweep:
+        net = warm if mode == "cieply start" else HematocritNetwork(tree_edges, tree_vessels,
+                                                                    tree_boundary)
+        s = net.solve(H)
+        iterations += s['iterations']
+        Q_sweep.append(s['Q_total'])
+    timing[mode] = (iterations, time.perf_counter() - t0, np.array(Q_sweep))
+print(f"\nPrzeglad H = {H_sweep[0]:.2f}..{H_sweep[-1]:.2f} ({len(H_sweep)} wartosci), drzewo tetnicze:")
+for mode, (iterations, wall, _) in timing.items():
+    print(f"  {mode:>13}: {iterations:>5d} iteracji, {wall:.2f} s")
+
+# Bez rozdzialu faz (hematokryt staly w calej sieci) - uklad liniowy
+uniform = HematocritNetwork(tree_edges, tree_vessels, tree_boundary, phase_separation=False)
+Q_uniform = np.array([uniform.solve(H)['Q_total'] for H in H_sweep])
+
+# WYKRESY
+fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
+Q_norm = results["drzewo tetnicze"][1]['norma']['Q_total']
+ax1.plot(H_sweep, timing["cieply start"][2] / Q_norm, 'o-', linewidth=2, label='Z rozdzialem faz')
+ax1.plot(H_sweep, Q_uniform / Q_norm, 's--', linewidth=2, label='Hematokryt staly')
+ax1.set_xlabel('Hematokryt krwi doplywajacej', fontsize=11)
+ax1.set_ylabel('Q / Q(H = 0.45)', fontsize=11)
+ax1.set_title('Przeplyw przez drzewo tetnicze', fontsize=12, fontweight='bold')
+ax1.legend(fontsize=9)
+ax1.grid(True, alpha=0.3)
+
+net, solutions = results["drzewo tetnicze"]
+for label, H in SCENARIOS:
+    ax2.scatter(net.D, solutions[label]['hematocrit'], s=2, alpha=0.3, label=f'{label} (H = {H})')
+ax2.set_xscale('log')
+ax2.set_xlabel('Srednica naczynia [um]', fontsize=11)
+ax2.set_ylabel('Hematokryt naczynia', fontsize=11)
+ax2.set_title('Rozdzial faz w bifurkacjach', fontsize=12, fontweight='bold')
+ax2.legend(fontsize=9, markerscale=5)
+ax2.grid(True, alpha=0.3)
+
+plt.tight_layout()
+plt.show()
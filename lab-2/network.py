@@ -0,0 +1,421 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import breadth_first_order
+from scipy.sparse.linalg import splu
+
+
+class VascularNetwork:
+    """
+    Siec naczyniowa o dowolnej topologii: wezly 0..n_nodes-1, naczynia jako
+    krawedzie (a -> b) o oporach R i cisnienia zadane w wezlach brzegowych.
+
+    Analiza wezlowa: przeplyw w naczyniu Q = (p_a - p_b) / R, a w kazdym
+    wezle wewnetrznym suma przeplywow wynosi zero. Daje to uklad
+        G_ff p_f = -G_fb p_b,
+    gdzie G = A^T diag(1/R) A to macierz przewodnosci (laplasjan grafu),
+    f - wezly wewnetrzne, b - brzegowe. Jeden rzadki rozklad LU daje
+    cisnienia we wszystkich wezlach i przeplywy we wszystkich naczyniach.
+
+    Zmiana oporow kilku naczyn (update_resistance) nie wymaga nowego
+    rozkladu: G = G0 + U D U^T, gdzie U - kolumny incydencji zmienionych
+    naczyn, D - zmiany przewodnosci, wiec rozwiazanie to poprawka Woodbury'ego
+    rzedu k na rozkladzie G0 (k rozwiazan z gotowym LU i uklad k x k).
+    Po przekroczeniu max_rank zmienionych naczyn siec jest rozkladana od nowa.
+
+    Parametry:
+        edges : array (E, 2)
+            Wezel poczatkowy i koncowy kazdego naczynia (kierunek dodatniego
+            przeplywu)
+        R : array (E,)
+            Opory naczyn [Pa*s/m^3]
+        boundary : dict albo (nodes, pressures)
+            {wezel: cisnienie [Pa]} albo para tablic - dla duzych sieci
+        n_nodes : int
+            Liczba wezlow (domyslnie max(edges) + 1)
+        max_rank : int
+            Limit naczyn zmienionych od ostatniego rozkladu (pamiec poprawki:
+            max_rank kolumn dlugosci liczby wezlow)
+    """
+
+    def __init__(self, edges, R, boundary, n_nodes=None, max_rank=32):
+        self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        self.R = np.array(R, dtype=float)
+        if self.R.shape != (len(self.edges),):
+            raise ValueError("Liczba oporow musi byc rowna liczbie naczyn")
+        self.n_nodes = int(self.edges.max()) + 1 if n_nodes is None else n_nodes
+
+        if isinstance(boundary, dict):
+            boundary = (list(boundary), list(boundary.values()))
+        nodes, pressures = boundary
+        self.boundary_nodes = np.asarray(nodes, dtype=np.int64)
+        self.boundary_pressure = np.broadcast_to(
+            np.asarray(pressures, dtype=float), self.boundary_nodes.shape).copy()
+        is_free = np.ones(self.n_nodes, dtype=bool)
+        is_free[self.boundary_nodes] = False
+        self.free_nodes = np.flatnonzero(is_free)
+        if len(self.free_nodes) == self.n_nodes:
+            raise ValueError("Potrzebny co najmniej jeden wezel z zadanym cisnieniem")
+
+        # Numeracja w podukladach: wezel -> indeks wsrod wolnych/brzegowych
+        self._index = np.empty(self.n_nodes, dtype=np.int64)
+        self._index[self.free_nodes] = np.arange(len(self.free_nodes))
+        self._index[self.boundary_nodes] = np.arange(len(self.boundary_nodes))
+        self._is_free = is_free
+        self._lu = None
+        self._tree = False  # False - struktura drzewa jeszcze nie sprawdzona
+        self.max_rank = max_rank
+        self.stats = {'factorizations': 0, 'solves': 0, 'low_rank_solves': 0}
+
+    @classmethod
+    def from_vessels(cls, edges, vessels, boundary, n_nodes=None):
+        """Siec z listy obiektow z atrybutem R (np. Vessel), w kolejnosci edges"""
+        return cls(edges, [v.R for v in vessels], boundary, n_nodes)
+
+    def set_resistance(self, R):
+        """Nowe opory wszystkich naczyn (uniewaznia rozklad)"""
+        self.R = np.array(R, dtype=float)
+        self._lu = None
+
+    def update_resistance(self, idx, R_new):
+        """
+        Nowe opory naczyn idx. Istniejacy rozklad jest zachowany - nastepne
+        solve() uwzglednia zmiane poprawka niskiego rzedu.
+        """
+        self.R[idx] = R_new
+        if self._lu is None:
+            return
+        idx = np.unique(np.atleast_1d(idx))
+        g = 1.0 / self.R[idx]
+        for e, changed in zip(idx, g != self._g0[idx]):
+            if changed:
+                self._changed.setdefault(int(e), None)
+            else:
+                self._changed.pop(int(e), None)
+        if len(self._changed) > self.max_rank:
+            self._lu = None
+
+    def _incidence(self, e):
+        """Kolumna incydencji naczynia e: czesc wolna (n_f,) i brzegowa (n_b,)"""
+        u_f = np.zeros(len(self.free_nodes))
+        u_b = np.zeros(len(self.boundary_nodes))
+        for node, sign in zip(self.edges[e], (1.0, -1.0)):
+            target = u_f if self._is_free[node] else u_b
+            target[self._index[node]] += sign
+        return u_f, u_b
+
+    @property
+    def is_free(self):
+        """Maska (n_nodes,) wezlow wewnetrznych (bez zadanego cisnienia)"""
+        return self._is_free
+
+    @property
+    def block_index(self):
+        """
+        Numeracja wezlow w blokach conductance_blocks(): dla wezla wolnego
+        indeks wiersza/kolumny G_ff, dla brzegowego - kolumny G_fb
+        """
+        return self._index
+
+    @property
+    def is_tree(self):
+        """
+        Czy siec jest drzewem z jednym zrodlem (pozostale wezly brzegowe
+        w lisciach) - wtedy solve_batch() nie rozklada macierzy
+        """
+        return self._tree_levels() is not None
+
+    def conductance_blocks(self):
+        """Bloki G_ff (CSC) i G_fb laplasjanu przewodnosci dla biezacych oporow"""
+        g = 1.0 / self.R
+        a, b = self.edges.T
+        rows = np.concatenate([a, b, a, b])
+        cols = np.concatenate([a, b, b, a])
+        G = sp.csr_matrix((np.concatenate([g, g, -g, -g]), (rows, cols)),
+                          shape=(self.n_nodes, self.n_nodes))
+        G_f = G[self.free_nodes]
+        return G_f[:, self.free_nodes].tocsc(), G_f[:, self.boundary_nodes]
+
+    def factorize(self):
+        """Rozklad LU bloku G_ff (porzadek minimalnego stopnia dla macierzy symetrycznej)"""
+        G_ff, self._G_fb = self.conductance_blocks()
+        self._lu = splu(G_ff, permc_spec='MMD_AT_PLUS_A')
+        self._g0 = 1.0 / self.R
+        self._y = self._lu.solve(-(self._G_fb @ self.boundary_pressure))
+        # naczynie -> (u_f, u_b, G0^-1 u_f), liczone przy pierwszym uzyciu
+        self._changed = {}
+        self.stats['factorizations'] += 1
+        return self._lu
+
+    def solve(self):
+        """
+        Rozwiazuje siec. Zwraca slownik:
+            pressure : cisnienia we wszystkich wezlach [Pa]
+            flow : przeplywy w naczyniach [m^3/s] (ujemne - przeciwnie do a -> b)
+            inflow : przeplyw wplywajacy do sieci w kazdym wezle brzegowym
+                     (kolejnosc boundary_nodes; ujemny - wyplyw)
+            Q_total : suma dodatnich wplywow [m^3/s]
+        """
+        if self._lu is None:
+            self.factorize()
+        p = np.empty(self.n_nodes)
+        p[self.boundary_nodes] = self.boundary_pressure
+        p[self.free_nodes] = self._low_rank_update(self._y) if self._changed else self._y
+        self.stats['solves'] += 1
+        return self.solution_from_pressure(p)
+
+    def _low_rank_update(self, y, boundary=True):
+        """
+        Rozwiazanie (G0 + U D U^T) x = b0 - U D w z y = G0^-1 b0 (wektor albo
+        kolumny), w = U_b^T p_b - zmiana czesci brzegowej (boundary=False
+        dla prawych stron bez wkladu cisnien brzegowych, np. sprzezonych):
+            x = y - Z c,  (I + D U^T Z) c = D (U^T y + w),  Z = G0^-1 U
+        """
+        missing = [e for e, cols in self._changed.items() if cols is None]
+        if missing:
+            U_new = [self._incidence(e) for e in missing]
+            Z_new = self._lu.solve(np.column_stack([u_f for u_f, _ in U_new]))
+            for j, e in enumerate(missing):
+                self._changed[e] = (*U_new[j], Z_new[:, j])
+        changed = list(self._changed)
+        U = np.column_stack([self._changed[e][0] for e in changed])
+        Z = np.column_stack([self._changed[e][2] for e in changed])
+        d = 1.0 / self.R[changed] - self._g0[changed]
+        rhs = U.T @ y
+        if boundary:
+            U_b = np.column_stack([self._changed[e][1] for e in changed])
+            rhs = rhs + U_b.T @ self.boundary_pressure
+        S = np.eye(len(changed)) + d[:, None] * (U.T @ Z)
+        c = np.linalg.solve(S, (d * rhs.T).T)
+        self.stats['low_rank_solves'] += 1
+        return y - Z @ c
+
+    def adjoint(self, weights, solution=None):
+        """
+        Pochodne dJ/dg_e funkcjonalow J_k = sum_e W[k, e] Q_e (liniowe
+        kombinacje przeplywow) wzgledem przewodnosci wszystkich naczyn
+        g_e = 1/R_e. Z dp_f/dg_e = -G_ff^-1 n_e dp_e (n_e - incydencja
+        naczynia, dp_e - spadek cisnienia):
+            dJ/dg_e = (W[:, e] - dlambda_e) dp_e,   G_ff lambda = sum_e W[:, e] g_e n_e,
+        wiec wszystkie K funkcjonalow to jedno rozwiazanie z K prawymi
+        stronami na istniejacym rozkladzie - koszt rzedu dwoch rozwiazan
+        sieci, niezaleznie od liczby naczyn.
+
+        Parametry:
+            weights : array albo macierz rzadka (K, E)
+            solution : dict
+                Wynik solve() dla biezacych oporow (domyslnie liczony)
+
+        Zwraca tablice (K, E).
+        """
+        if solution is None:
+            solution = self.solve()
+        W = sp.csr_matrix(weights)
+        a, b = self.edges.T
+        p = solution['pressure']
+        dp = p[a] - p[b]
+        g = 1.0 / self.R
+
+        # Prawe strony: W diag(g) A^T ograniczone do wezlow wolnych
+        WG = (W @ sp.diags(g)).T.tocsr()
+        A_T = sp.csr_matrix((np.concatenate([np.ones(len(a)), -np.ones(len(b))]),
+                             (np.concatenate([a, b]), np.tile(np.arange(len(a)), 2))),
+                            shape=(self.n_nodes, len(a)))
+        C = (A_T @ WG)[self.free_nodes].toarray()
+        lam = self._lu.solve(C)
+        if self._changed:
+            lam = self._low_rank_update(lam, boundary=False)
+        lam_full = np.zeros((self.n_nodes, W.shape[0]))
+        lam_full[self.free_nodes] = lam
+        dlam = (lam_full[a] - lam_full[b]).T
+        return (W.toarray() - dlam) * dp
+
+    def flow_weights(self, solution):
+        """
+        Wagi (K, E) dla adjoint(): wiersz 0 - Q_total (przeplyw z wezlow
+        brzegowych o dodatnim doplywie), kolejne - przeplywy naczyn
+        koncowych (incydentnych z wezlem wyjsciowym, kierunek do wyjscia).
+        Zwraca (W, terminal_edges).
+        """
+        a, b = self.edges.T
+        inlet = np.zeros(self.n_nodes, dtype=bool)
+        outlet = np.zeros(self.n_nodes, dtype=bool)
+        inlet[self.boundary_nodes[solution['inflow'] > 0]] = True
+        outlet[self.boundary_nodes[solution['inflow'] < 0]] = True
+        w_total = inlet[a].astype(float) - inlet[b]
+
+        terminal = np.flatnonzero(outlet[a] | outlet[b])
+        sign = np.where(outlet[b[terminal]], 1.0, -1.0)
+        rows = np.concatenate([[0] * np.count_nonzero(w_total), 1 + np.arange(len(terminal))])
+        cols = np.concatenate([np.flatnonzero(w_total), terminal])
+        vals = np.concatenate([w_total[w_total != 0], sign])
+        W = sp.csr_matrix((vals, (rows, cols)), shape=(1 + len(terminal), len(a)))
+        return W, terminal
+
+    def perfusion_sensitivity(self, vessels):
+        """
+        Pochodne Q_total i przeplywow naczyn koncowych wzgledem promienia
+        i lepkosci kazdego naczynia (jedno rozwiazanie sprzezone).
+        Dla R = 8 eta L / (pi r^4): dg/dr = 4 g / r, dg/deta = -g / eta.
+
+        Parametry:
+            vessels : VesselArray
+                Naczynia w kolejnosci krawedzi (zrodlo r i eta)
+
+        Zwraca slownik: Q_total, dQ_total_dr, dQ_total_deta (E,),
+        terminal (indeksy naczyn koncowych), Q_term, dQ_term_dr,
+        dQ_term_deta (T, E).
+        """
+        solution = self.solve()
+        W, terminal = self.flow_weights(solution)
+        dJ_dg = self.adjoint(W, solution)
+        g = 1.0 / self.R
+        dJ_dr = dJ_dg * (4 * g / vessels.r)
+        dJ_deta = dJ_dg * (-g / vessels.eta)
+        sign = np.asarray(W[1:, terminal].sum(axis=0)).ravel()
+        return {
+            'Q_total': solution['Q_total'],
+            'dQ_total_dr': dJ_dr[0],
+            'dQ_total_deta': dJ_deta[0],
+            'terminal': terminal,
+            'Q_term': sign * solution['flow'][terminal],
+            'dQ_term_dr': dJ_dr[1:],
+            'dQ_term_deta': dJ_deta[1:],
+        }
+
+    def _tree_levels(self):
+        """
+        Struktura drzewa zakorzenionego w boundary_nodes[0]: rodzic i naczynie
+        do rodzica dla kazdego wezla oraz wezly pogrupowane wg glebokosci.
+        None, gdy siec nie jest drzewem albo inny wezel brzegowy nie jest lisciem.
+        """
+        if self._tree is not False:
+            return self._tree
+        self._tree = None
+        n, E = self.n_nodes, len(self.edges)
+        if E != n - 1:
+            return None
+        a, b = self.edges.T
+        adjacency = sp.csr_matrix((np.arange(1, E + 1), (a, b)), shape=(n, n))
+        root = self.boundary_nodes[0]
+        order, parent = breadth_first_order(adjacency, root, directed=False)
+        if len(order) != n:
+            return None
+        nodes = order[1:]
+        if np.any(np.bincount(parent[nodes], minlength=n)[self.boundary_nodes[1:]] > 0):
+            return None
+        lookup = (adjacency + adjacency.T).tocsr()
+        edge = np.full(n, -1)
+        edge[nodes] = np.asarray(lookup[parent[nodes], nodes]).ravel() - 1
+
+        # Glebokosc: depth = depth[rodzic] + 1, tyle przebiegow, ile poziomow
+        parent = parent.copy()
+        parent[root] = root
+        depth = np.zeros(n, dtype=np.int64)
+        while True:
+            new = depth[parent] + 1
+            new[root] = 0
+            if np.array_equal(new, depth):
+                break
+            depth = new
+        by_depth = nodes[np.argsort(depth[nodes], kind='stable')]
+        bounds = np.searchsorted(depth[by_depth], np.arange(1, depth.max() + 2))
+        levels = [by_depth[i:j] for i, j in zip(bounds[:-1], bounds[1:])]
+        self._tree = (root, parent, edge, levels)
+        return self._tree
+
+    def solve_batch(self, R=None, boundary_pressure=None):
+        """
+        Rozwiazanie sieci dla calej partii oporow i cisnien brzegowych naraz.
+        R (batch, E) i boundary_pressure (batch, n_b) sa rozglaszane do
+        wspolnego wymiaru partii (domyslnie wartosci sieci).
+
+        Dla drzewa (jedno zrodlo w boundary_nodes[0], pozostale wezly brzegowe
+        w lisciach) kazde poddrzewo zastepowane jest od lisci w gore zrodlem
+        Thevenina (P_th, R_th): rownolegle polaczenie dzieci i opor naczynia
+        do rodzica szeregowo. Potem od korzenia w dol Q = (p_rodzica - P_th) / R_th.
+        Petla biegnie po poziomach drzewa, a kazdy krok jest wektorowy po
+        wezlach i po partii - O(batch * E) bez rozkladu macierzy.
+        Inne topologie: rozklad LU dla kazdego elementu partii.
+
+        Zwraca slownik jak solve() z wymiarem partii na poczatku:
+        pressure (batch, n), flow (batch, E), inflow (batch, n_b), Q_total (batch,).
+        """
+        R = self.R if R is None else R
+        P_b = self.boundary_pressure if boundary_pressure is None else boundary_pressure
+        R, P_b = np.asarray(R, dtype=float), np.asarray(P_b, dtype=float)
+        batch = np.broadcast_shapes(R.shape[:-1], P_b.shape[:-1])
+        R = np.broadcast_to(R, batch + R.shape[-1:]).reshape(-1, len(self.edges))
+        P_b = np.broadcast_to(P_b, batch + P_b.shape[-1:]).reshape(-1, len(self.boundary_nodes))
+
+        tree = self._tree_levels()
+        if tree is None:
+            p = np.array([VascularNetwork(self.edges, R[k], (self.boundary_nodes, P_b[k]),
+                                          self.n_nodes).solve()['pressure']
+                          for k in range(len(R))])
+        else:
+            p = self._tree_pressures(tree, R.T, P_b.T).T
+
+        a, b = self.edges.T
+        flow = (p[:, a] - p[:, b]) / R
+        # Bilans wezlow jednym bincount dla calej partii (indeksy przesuniete o n na element)
+        offset = (np.arange(len(R)) * self.n_nodes)[:, None]
+        size = len(R) * self.n_nodes
+        net = (np.bincount((a + offset).ravel(), flow.ravel(), size)
+               - np.bincount((b + offset).ravel(), flow.ravel(), size)).reshape(len(R), self.n_nodes)
+        inflow = net[:, self.boundary_nodes]
+        return {
+            'pressure': p.reshape(batch + (self.n_nodes,)),
+            'flow': flow.reshape(batch + (len(self.edges),)),
+            'inflow': inflow.reshape(batch + (len(self.boundary_nodes),)),
+            'Q_total': np.where(inflow > 0, inflow, 0).sum(axis=-1).reshape(batch),
+        }
+
+    def _tree_pressures(self, tree, R, P_b):
+        """Cisnienia wezlow (n, batch) metoda zrodel Thevenina; R (E, batch), P_b (n_b, batch)"""
+        root, parent, edge, levels = tree
+        n, B = self.n_nodes, R.shape[1]
+        is_boundary = ~self._is_free
+        P_node = np.zeros((n, B))
+        P_node[self.boundary_nodes] = P_b
+
+        # Sumy po dzieciach: przewodnosc i przewodnosc * P_th
+        G_sum = np.zeros((n, B))
+        GP_sum = np.zeros((n, B))
+        R_th = np.empty((n, B))
+        P_th = np.empty((n, B))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for nodes in reversed(levels):
+                R_e = R[edge[nodes]]
+                leaf = is_boundary[nodes][:, None]
+                G = G_sum[nodes]
+                # Liscie brzegowe: zrodlo P_b; wezly wolne: rownolegle dzieci
+                # (slepy koniec: G = 0, R_th = inf - brak przeplywu)
+                R_th[nodes] = np.where(leaf, R_e, R_e + 1.0 / G)
+                P_th[nodes] = np.where(leaf, P_node[nodes],
+                                       np.where(G > 0, GP_sum[nodes] / G, 0.0))
+                g = 1.0 / R_th[nodes]
+                np.add.at(G_sum, parent[nodes], g)
+                np.add.at(GP_sum, parent[nodes], g * P_th[nodes])
+
+            p = np.empty((n, B))
+            p[root] = P_node[root]
+            for nodes in levels:
+                up = p[parent[nodes]]
+                Q = np.where(np.isfinite(R_th[nodes]), (up - P_th[nodes]) / R_th[nodes], 0.0)
+                p[nodes] = np.where(is_boundary[nodes][:, None], P_node[nodes],
+                                    up - Q * R[edge[nodes]])
+        return p
+
+    def solution_from_pressure(self, p):
+        """Slownik jak solve() dla zadanych cisnien we wszystkich wezlach p (n_nodes,)"""
+        a, b = self.edges.T
+        flow = (p[a] - p[b]) / self.R
+        # Bilans w wezlach brzegowych: wyplyw krawedziami = doplyw z zewnatrz
+        net = np.bincount(a, flow, self.n_nodes) - np.bincount(b, flow, self.n_nodes)
+        inflow = net[self.boundary_nodes]
+        return {
+            'pressure': p,
+            'flow': flow,
+            'inflow': inflow,
+            'Q_total': inflow[inflow > 0].sum(),
+        }
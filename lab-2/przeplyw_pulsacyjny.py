@@ -0,0 +1,84 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from fractal_tree import fractal_tree
+from pulsatile import PulsatileNetwork, half_sine_inflow
+from vessels import VesselArray
+
+MMHG = 133.322 # Pa/mmHg
+
+# Krazenie obwodowe: Q = 5 l/min, opor obwodowy ~ 93 mmHg / Q, podatnosc 1.5 ml/mmHg
+Q_MEAN = 5e-3 / 60
+R_PERIPHERAL = 93 * MMHG / Q_MEAN
+C_TOTAL = 1.5e-6 / MMHG
+PERIOD = 0.8
+inflow = half_sine_inflow(Q_MEAN, PERIOD, systole=0.3)
+
+
+def windkessel_network(edges, R, outlets, proximal=0.1):
+    """RCR na kazdym wyjsciu: opor i podatnosc calkowita dzielone rowno miedzy wyjscia"""
+    T = len(outlets)
+    return PulsatileNetwork(edges, R, outlets, R_p=proximal * R_PERIPHERAL * T,
+                            R_d=(1 - proximal) * R_PERIPHERAL * T, C=C_TOTAL / T,
+                            P_venous=5 * MMHG)
+
+
+# Siec z zadania: aorta - 2 galezie - 4 tetniczki
+lab = VesselArray(L=[0.3, 0.2, 0.2, 0.02, 0.02, 0.02, 0.02],
+                  r=[0.012, 0.006, 0.006, 0.0015, 0.0015, 0.0015, 0.0015])
+lab_edges = [(0, 1), (1, 2), (1, 3), (2, 4), (2, 5), (3, 6), (3, 7)]
+lab_net = windkessel_network(lab_edges, lab.R, [4, 5, 6, 7])
+lab_run = lab_net.run(inflow, PERIOD, n_cycles=1000, steps=200, record=[0, 1, 4])
+
+print("=" * 90)
+print("Przeplyw pulsacyjny: siec z Windkesselami RCR (jeden rozklad LU na cala symulacje)")
+print("=" * 90)
+print(f"{'siec':>28} {'naczynia':>9} {'okresy':>7} {'kroki':>8} {'czas [s]':>9} "
+      f"{'us/krok':>8} {'P skurcz/rozkurcz [mmHg]':>25}")
+
+
+def report(name, n_vessels, n_cycles, result):
+    low, _, high = result['cycle_pressure'][-1] / MMHG
+    steps = n_cycles * len(result['t'])
+    print(f"{name:>28} {n_vessels:>9d} {n_cycles:>7d} {steps:>8d} {result['wall_time']:>9.2f} "
+          f"{result['time_per_step'] * 1e6:>8.1f} {f'{high:.1f} / {low:.1f}':>25}")
+
+
+report("aorta-galezie-tetniczki", len(lab), 1000, lab_run)
+
+tree_edges, tree_vessels, tree_outlets = fractal_tree(14, r_root=0.012, L_root=0.3)
+tree_net = windkessel_network(tree_edges, tree_vessels.R, tree_outlets)
+tree_run = tree_net.run(inflow, PERIOD, n_cycles=20, steps=200)
+report("drzewo fraktalne, 14 pokolen", len(tree_edges), 20, tree_run)
+
+# Rozkurcz: spadek cisnienia jak w Windkesselu z lab. 1, P = Pd + (P0 - Pd) exp(-t/tau),
+# tau = R_d C (Pd - cisnienie zylne)
+t, P = lab_run['t'], lab_run['pressure'][:, 0]
+diastole = np.mod(t, PERIOD) > 0.35
+slope = np.polyfit(t[diastole], np.log(P[diastole] - 5 * MMHG), 1)[0]
+print(f"\nStala czasowa rozkurczu: {-1 / slope:.3f} s "
+      f"(R_d C = {0.9 * R_PERIPHERAL * C_TOTAL:.3f} s)")
+cycles = lab_run['cycle_pressure'][:, 1] / MMHG
+print(f"Srednie cisnienie: okres 1 = {cycles[0]:.2f}, okres 10 = {cycles[9]:.2f}, "
+      f"okres 1000 = {cycles[-1]:.2f} mmHg")
+
+# WYKRESY
+fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
+phase = t - t[0]
+for j, label in enumerate(['Wejscie (aorta)', 'Koniec aorty', 'Wyjscie tetniczki 1']):
+    ax1.plot(phase, lab_run['pressure'][:, j] / MMHG, linewidth=2, label=label)
+ax1.set_xlabel('Czas w cyklu [s]', fontsize=11)
+ax1.set_ylabel('Cisnienie [mmHg]', fontsize=11)
+ax1.set_title('Cisnienie w ostatnim cyklu', fontsize=12, fontweight='bold')
+ax1.legend(fontsize=9)
+ax1.grid(True, alpha=0.3)
+
+ax2.plot(phase, inflow(t) * 1e6, linewidth=2, label='Doplyw Q(t)')
+ax2.plot(phase, lab_run['outflow'] * 1e6, linewidth=2, label='Odplyw do zyl')
+ax2.set_xlabel('Czas w cyklu [s]', fontsize=11)
+ax2.set_ylabel('Przeplyw [ml/s]', fontsize=11)
+ax2.set_title('Magazynowanie objetosci w podatnosci', fontsize=12, fontweight='bold')
+ax2.legend(fontsize=9)
+ax2.grid(True, alpha=0.3)
+
+plt.tight_layout()
+plt.show()
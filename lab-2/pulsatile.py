@@ -0,0 +1,144 @@
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+from network import VascularNetwork
+
+
+def half_sine_inflow(Q_mean, period=0.8, systole=0.3):
+    """
+    Przeplyw wejsciowy: polsinusoida w skurczu, zero w rozkurczu
+    (srednia po okresie = Q_mean). Zwraca funkcje Q(t), okresowa.
+    """
+    Q_max = Q_mean * period * np.pi / (2 * systole)
+
+    def inflow(t):
+        phase = np.mod(t, period)
+        return np.where(phase < systole, Q_max * np.sin(np.pi * phase / systole), 0.0)
+
+    return inflow
+
+
+class PulsatileNetwork:
+    """
+    Niestacjonarny przeplyw w sieci z modelami Windkessela na wyjsciach.
+    Wejscie (inlet) zasilane jest okresowym przeplywem Q(t), a kazdy wezel
+    wyjsciowy laczy sie z cisnieniem zylnym przez Windkessel:
+        RCR: wyjscie -R_p- wezel podatnosci (C) -R_d- P_venous,
+        RC (R_p = 0): podatnosc C w samym wezle wyjsciowym.
+    Naczynia sa oporami Poiseuille'a (bez inercji i podatnosci scian).
+
+    Bilans wezlow: C dp/dt + G p = b(t), G - laplasjan przewodnosci
+    (VascularNetwork), C - podatnosci (zero poza wezlami Windkessela).
+    Schemat theta (theta = 0.5 - trapezow, 1 - niejawny Euler):
+        (C/dt + theta G) p^{n+1} = (C/dt - (1 - theta) G) p^n + b^{n+theta}.
+    Macierz po lewej jest stala - jeden rozklad LU na cala symulacje,
+    a krok czasowy to mnozenie macierzy rzadkiej i podstawienie.
+
+    Parametry:
+        edges, R : array
+            Naczynia sieci i ich opory (jak w VascularNetwork)
+        outlets : array
+            Wezly wyjsciowe (np. trzecia wartosc fractal_tree)
+        R_p, R_d, C : float lub array (len(outlets),)
+            Opor proksymalny, dystalny [Pa*s/m^3] i podatnosc [m^3/Pa]
+        inlet : int
+            Wezel wejsciowy
+        P_venous : float
+            Cisnienie zylne [Pa]
+    """
+
+    def __init__(self, edges, R, outlets, R_p, R_d, C, inlet=0, P_venous=0.0, n_nodes=None):
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        outlets = np.asarray(outlets, dtype=np.int64)
+        n = int(edges.max()) + 1 if n_nodes is None else n_nodes
+        T = len(outlets)
+        R_p, R_d, C = [np.broadcast_to(np.asarray(x, dtype=float), (T,)) for x in (R_p, R_d, C)]
+
+        # Wezly podatnosci: nowe dla RCR, wezel wyjsciowy dla RC; jeden wezel zylny
+        proximal = R_p > 0
+        compliance = outlets.copy()
+        compliance[proximal] = n + np.arange(np.count_nonzero(proximal))
+        venous = n + np.count_nonzero(proximal)
+        all_edges = np.concatenate([edges,
+                                    np.column_stack([outlets[proximal], compliance[proximal]]),
+                                    np.column_stack([compliance, np.full(T, venous)])])
+        all_R = np.concatenate([R, R_p[proximal], R_d])
+        self.network = VascularNetwork(all_edges, all_R, {venous: P_venous}, n_nodes=venous + 1)
+
+        G, G_fb = self.network.conductance_blocks()
+        index = self.network.block_index
+        self.G = G.tocsr()
+        self.b = -(G_fb @ self.network.boundary_pressure)
+        self.capacitance = np.zeros(G.shape[0])
+        np.add.at(self.capacitance, index[compliance], C)
+        self.inlet = index[inlet]
+        self.index = index
+        self.compliance = index[compliance]
+        self.R_d = R_d
+        self.P_venous = P_venous
+
+    def steady_state(self, Q):
+        """Cisnienia w wezlach wolnych przy stalym doplywie Q (bez podatnosci)"""
+        rhs = self.b.copy()
+        rhs[self.inlet] += Q
+        return splu(self.G.tocsc(), permc_spec='MMD_AT_PLUS_A').solve(rhs)
+
+    def run(self, inflow, period, n_cycles=10, steps=200, theta=0.5, record=None, p0=None):
+        """
+        Symulacja n_cycles okresow po `steps` krokow.
+
+        Parametry:
+            inflow : callable
+                Q(t) [m^3/s], wektorowa i okresowa z okresem period
+            record : list
+                Wezly sieci, ktorych cisnienia sa zapisywane (domyslnie wejscie)
+            p0 : array
+                Stan poczatkowy (domyslnie stan ustalony dla sredniego Q)
+
+        Zwraca slownik: t, pressure (steps, len(record)) i outflow (steps,) -
+        ostatni okres; cycle_pressure (n_cycles, 3) - min/srednia/max cisnienia
+        na wejsciu w kazdym okresie (zbieznosc do stanu okresowego); state;
+        wall_time, time_per_step.
+        """
+        record = np.atleast_1d(self.index[np.asarray(record if record is not None else [0])])
+        dt = period / steps
+        q = inflow(np.arange(steps + 1) * dt)
+        q_step = theta * q[1:] + (1 - theta) * q[:-1]
+
+        t0 = time.perf_counter()
+        C_dt = sp.diags(self.capacitance / dt)
+        lu = splu((C_dt + theta * self.G).tocsc(), permc_spec='MMD_AT_PLUS_A')
+        B = (C_dt - (1 - theta) * self.G).tocsr()
+        if p0 is None:
+            p0 = self.steady_state(np.trapezoid(q, dx=dt) / period)
+        p = np.array(p0, dtype=float)
+
+        pressure = np.empty((steps, len(record)))
+        outflow = np.empty(steps)
+        inlet_pressure = np.empty(steps)
+        cycle_pressure = np.empty((n_cycles, 3))
+        for cycle in range(n_cycles):
+            for k in range(steps):
+                rhs = B @ p + self.b
+                rhs[self.inlet] += q_step[k]
+                p = lu.solve(rhs)
+                inlet_pressure[k] = p[self.inlet]
+                if cycle == n_cycles - 1:
+                    pressure[k] = p[record]
+                    outflow[k] = np.sum((p[self.compliance] - self.P_venous) / self.R_d)
+            cycle_pressure[cycle] = (inlet_pressure.min(), inlet_pressure.mean(),
+                                     inlet_pressure.max())
+        wall_time = time.perf_counter() - t0
+
+        return {
+            't': (n_cycles - 1) * period + np.arange(1, steps + 1) * dt,
+            'pressure': pressure,
+            'outflow': outflow,
+            'cycle_pressure': cycle_pressure,
+            'state': p,
+            'wall_time': wall_time,
+            'time_per_step': wall_time / (n_cycles * steps),
+        }
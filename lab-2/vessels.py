@@ -0,0 +1,137 @@
+import numpy as np
+
+ETA = 3.5e-3 # Pa*s
+
+
+def poiseuille_resistance(L, r, eta):
+    """R = 8*eta*L/(pi*r^4)"""
+    return (8 * eta * L) / (np.pi * r**4)
+
+
+class VesselArray:
+    """
+    Zbior naczyn w ukladzie struktura-tablic: ciagle tablice L, r, eta i R
+    (float64, 32 B na naczynie), zamiast osobnego obiektu na kazde naczynie.
+    Metody update_* przyjmuja indeksy (liczba, tablica, maska, wycinek)
+    i przeliczaja opor tylko dla nich, jedna operacja wektorowa.
+
+    Parametry:
+        L : array
+            Dlugosci naczyn [m]
+        r : array
+            Promienie naczyn [m]
+        eta : float lub array
+            Lepkosc cieczy [Pa*s]
+        copy : bool
+            False - tablice float64 o pelnym ksztalcie sa przejmowane bez
+            kopiowania (generatory duzych sieci)
+    """
+
+    def __init__(self, L, r, eta=ETA, copy=True):
+        L, r, eta = np.broadcast_arrays(*[np.atleast_1d(np.asarray(a, dtype=float))
+                                          for a in (L, r, eta)])
+        # Widoki (np. rozgloszone skalarne eta) sa zawsze materializowane
+        self.L, self.r, self.eta = [a if not copy and a.base is None else a.copy()
+                                    for a in (L, r, eta)]
+        self.R = poiseuille_resistance(self.L, self.r, self.eta)
+
+    @classmethod
+    def from_vessels(cls, vessels):
+        """Zbior z obiektow z atrybutami L, r, eta (np. Vessel)"""
+        return cls([v.L for v in vessels], [v.r for v in vessels], [v.eta for v in vessels])
+
+    def __len__(self):
+        return len(self.R)
+
+    def __getitem__(self, i):
+        """Widok pojedynczego naczynia (Vessel) - zmiany trafiaja do tablic zbioru"""
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        return Vessel._view(self, i % len(self))
+
+    def __iter__(self):
+        return (Vessel._view(self, i) for i in range(len(self)))
+
+    def copy(self):
+        return VesselArray(self.L, self.r, self.eta)
+
+    @property
+    def nbytes(self):
+        return self.L.nbytes + self.r.nbytes + self.eta.nbytes + self.R.nbytes
+
+    def _recompute(self, idx):
+        self.R[idx] = poiseuille_resistance(self.L[idx], self.r[idx], self.eta[idx])
+
+    def update_radius(self, idx, r_new):
+        """Nowe promienie naczyn idx i przeliczenie ich oporow"""
+        self.r[idx] = r_new
+        self._recompute(idx)
+
+    def scale_radius(self, idx, factor):
+        """Promienie naczyn idx mnozone przez factor (np. 1.1 - rozszerzenie o 10%)"""
+        self.r[idx] *= factor
+        self._recompute(idx)
+
+    def update_viscosity(self, idx, eta_new):
+        """Nowe lepkosci naczyn idx i przeliczenie ich oporow"""
+        self.eta[idx] = eta_new
+        self._recompute(idx)
+
+    def update_length(self, idx, L_new):
+        """Nowe dlugosci naczyn idx i przeliczenie ich oporow"""
+        self.L[idx] = L_new
+        self._recompute(idx)
+
+
+class Vessel:
+    """
+    Klasa reprezentująca naczynie kwionosne - widok jednego elementu
+    VesselArray (__slots__, bez wlasnego slownika). Samodzielny Vessel(L, r)
+    ma jednoelementowy zbior.
+
+    Parametry:
+        L : float
+            Dlugosc naczynia [m]
+        r : float
+            Promien naczynia [m]
+        eta : float
+            Lepkosc cieczy [Pa*s]
+    """
+
+    __slots__ = ('_store', '_i')
+
+    def __init__(self, L, r, eta=ETA):
+        self._store = VesselArray(L, r, eta)
+        self._i = 0
+
+    @classmethod
+    def _view(cls, store, i):
+        vessel = object.__new__(cls)
+        vessel._store = store
+        vessel._i = i
+        return vessel
+
+    @property
+    def L(self):
+        return self._store.L[self._i]
+
+    @property
+    def r(self):
+        return self._store.r[self._i]
+
+    @property
+    def eta(self):
+        return self._store.eta[self._i]
+
+    @property
+    def R(self):
+        """Opor hydrodynamiczny R = 8*n*L/(pi*r^4)"""
+        return self._store.R[self._i]
+
+    def update_radius(self, r_new):
+        """Aktualizuje promien i przelicza opor"""
+        self._store.update_radius(self._i, r_new)
+
+    def update_viscosity(self, eta_new):
+        """Aktualizuje lepkosc i przelicza opor"""
+        self._store.update_viscosity(self._i, eta_new)
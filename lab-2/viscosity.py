@@ -0,0 +1,329 @@
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import LinearOperator, cg, splu
+
+from network import VascularNetwork
+
+ETA_PLASMA = 1.2e-3 # Pa*s
+
+
+def _exponent_C(D):
+    """Wykladnik C(D) zaleznosci lepkosci od hematokrytu (Pries 1992), D [um]"""
+    s = 1.0 / (1.0 + 1e-11 * D**12)
+    return (0.8 + np.exp(-0.075 * D)) * (s - 1.0) + s
+
+
+def eta_rel_vitro(D, H):
+    """
+    Lepkosc wzgledna krwi w rurce szklanej (Pries i in. 1992, efekt
+    Fahraeusa-Lindqvista), D - srednica [um], H - hematokryt naczyniowy:
+        eta_0.45 = 220 exp(-1.3 D) + 3.2 - 2.44 exp(-0.06 D^0.645),
+        eta_rel = 1 + (eta_0.45 - 1) ((1 - H)^C - 1) / ((1 - 0.45)^C - 1).
+    """
+    eta_45 = 220 * np.exp(-1.3 * D) + 3.2 - 2.44 * np.exp(-0.06 * D**0.645)
+    C = _exponent_C(D)
+    return 1 + (eta_45 - 1) * ((1 - H)**C - 1) / ((1 - 0.45)**C - 1)
+
+
+def eta_rel_vivo(D, H):
+    """
+    Lepkosc wzgledna in vivo (Pries i in. 1994) - z warstwa przyscienna
+    (glikokaliks) o grubosci ~1.1 um, wyrazniejszy wzrost w kapilarach:
+        eta_rel = [1 + (eta_0.45 - 1) ((1 - H)^C - 1) / ((1 - 0.45)^C - 1) w] w,
+        eta_0.45 = 6 exp(-0.085 D) + 3.2 - 2.44 exp(-0.06 D^0.645),  w = (D / (D - 1.1))^2.
+    """
+    eta_45 = 6 * np.exp(-0.085 * D) + 3.2 - 2.44 * np.exp(-0.06 * D**0.645)
+    C = _exponent_C(D)
+    w = (D / (D - 1.1))**2
+    return (1 + (eta_45 - 1) * ((1 - H)**C - 1) / ((1 - 0.45)**C - 1) * w) * w
+
+
+VISCOSITY_LAWS = {'vitro': eta_rel_vitro, 'vivo': eta_rel_vivo}
+
+
+def phase_separation(D_a, D_b, D_F, H_F, FQ_B):
+    """
+    Udzial krwinek FQ_E plynacych do galezi a bifurkacji (Pries i Secomb 2005)
+    przy udziale przeplywu krwi FQ_B; D_a, D_b - srednice galezi, D_F i H_F -
+    srednica i hematokryt naczynia zasilajacego (srednice w um):
+        logit FQ_E = A + B logit((FQ_B - X0) / (1 - 2 X0)),
+        A = -13.29 ((D_a^2/D_b^2 - 1) / (D_a^2/D_b^2 + 1)) (1 - H_F) / D_F,
+        B = 1 + 6.98 (1 - H_F) / D_F,  X0 = 0.964 (1 - H_F) / D_F.
+    Ponizej X0 (powyzej 1 - X0) galaz dostaje samo osocze (wszystkie krwinki).
+    """
+    ratio = (D_a / D_b)**2
+    A = -13.29 * (ratio - 1) / (ratio + 1) * (1 - H_F) / D_F
+    B = 1 + 6.98 * (1 - H_F) / D_F
+    X0 = 0.964 * (1 - H_F) / D_F
+    x = np.clip((FQ_B - X0) / (1 - 2 * X0), 1e-12, 1 - 1e-12)
+    FQ_E = 1.0 / (1.0 + np.exp(-(A + B * np.log(x / (1 - x)))))
+    return np.where(FQ_B <= X0, 0.0, np.where(FQ_B >= 1 - X0, 1.0, FQ_E))
+
+
+class HematocritNetwork:
+    """
+    Siec naczyniowa z lepkoscia zalezna od srednicy i hematokrytu naczynia
+    (eta = ETA_PLASMA * eta_rel(D, H)). Hematokryt kazdego naczynia wynika
+    z przeplywow: krwinki sa unoszone z pradem, a w bifurkacjach rozdzielaja
+    sie nieproporcjonalnie do krwi (phase_separation), wiec opory zaleza
+    od rozwiazania i uklad jest nieliniowy.
+
+    Iteracja punktu stalego z relaksacja: H -> eta -> opory -> cisnienia
+    i przeplywy -> nowe H. Kazdy krok startuje z poprzedniego rozwiazania,
+    a kolejne solve() (np. inny hematokryt na wejsciu) - z wyniku
+    poprzedniego wywolania:
+        - drzewo: cisnienia metoda zrodel Thevenina (VascularNetwork), O(E)
+          bez rozkladu macierzy,
+        - inne topologie: gradient sprzezony startujacy z poprzednich
+          cisnien, z rozkladem LU z wczesniejszej iteracji jako
+          preconditionerem. Opory zmieniaja sie miedzy krokami o ulamki
+          procenta, wiec wystarcza kilka iteracji CG; nowy rozklad tylko,
+          gdy CG przekroczy cg_maxiter.
+
+    Parametry:
+        edges : array (E, 2)
+            Naczynia sieci (jak w VascularNetwork)
+        vessels : VesselArray
+            Geometria naczyn (L, r); lepkosci sa nadpisywane w kopii
+        boundary : dict albo (nodes, pressures)
+            Cisnienia zadane [Pa]; krew wplywa w wezlach o dodatnim doplywie
+        law : str albo callable
+            Prawo lepkosci wzglednej eta_rel(D [um], H): 'vitro', 'vivo'
+        phase_separation : bool
+            False - w bifurkacjach krwinki dziela sie jak przeplyw krwi
+            (hematokryt staly w calej sieci, uklad liniowy)
+        eta_plasma : float
+            Lepkosc osocza [Pa*s]
+        cg_rtol, cg_maxiter : float, int
+            Tolerancja wzgledna CG i limit iteracji przed nowym rozkladem
+    """
+
+    def __init__(self, edges, vessels, boundary, n_nodes=None, law='vitro',
+                 phase_separation=True, eta_plasma=ETA_PLASMA, cg_rtol=1e-10, cg_maxiter=30):
+        self.vessels = vessels.copy()
+        self.network = VascularNetwork(edges, self.vessels.R, boundary, n_nodes)
+        self.law = VISCOSITY_LAWS[law] if isinstance(law, str) else law
+        self.phase_separation = phase_separation
+        self.eta_plasma = eta_plasma
+        self.cg_rtol = cg_rtol
+        self.cg_maxiter = cg_maxiter
+        self.D = 2e6 * self.vessels.r
+        self.H = None
+        self.H_inlet = None
+        self._p = None
+        self._lu = None
+        self._waves = None
+        self._pattern = None
+        self.stats = {'solves': 0, 'iterations': 0, 'linear_solves': 0,
+                      'cg_iterations': 0, 'factorizations': 0}
+
+    def viscosity(self, H):
+        """Lepkosc naczyn [Pa*s] przy hematokrycie H (E,)"""
+        return self.eta_plasma * self.law(self.D, H)
+
+    def _linear_solve(self):
+        """Cisnienia we wszystkich wezlach dla biezacych oporow sieci"""
+        net = self.network
+        if net.is_tree:
+            return net.solve_batch()['pressure']
+
+        G_ff, rhs = self._assemble()
+        x = None
+        if self._lu is not None and self._p is not None:
+            count = [0]
+
+            def callback(xk):
+                count[0] += 1
+
+            M = LinearOperator(G_ff.shape, matvec=self._lu.solve, dtype=float)
+            x, info = cg(G_ff, rhs, x0=self._p[net.free_nodes], rtol=self.cg_rtol,
+                         maxiter=self.cg_maxiter, M=M, callback=callback)
+            self.stats['cg_iterations'] += count[0]
+            if info != 0:
+                x = None
+        if x is None:
+            self._lu = splu(G_ff, permc_spec='MMD_AT_PLUS_A')
+            self.stats['factorizations'] += 1
+            x = self._lu.solve(rhs)
+        p = np.empty(net.n_nodes)
+        p[net.boundary_nodes] = net.boundary_pressure
+        p[net.free_nodes] = x
+        return p
+
+    def _assemble(self):
+        """
+        G_ff (CSC) i prawa strona -G_fb p_b dla biezacych oporow. Struktura
+        macierzy nie zalezy od oporow, wiec polozenie wkladu kazdego naczynia
+        w tablicy data jest liczone raz, a kolejne iteracje to tylko bincount.
+        """
+        net = self.network
+        g = 1.0 / net.R
+        if self._pattern is None:
+            a, b = net.edges.T
+            free, index = net.is_free, net.block_index
+            n_f = len(net.free_nodes)
+            rows = np.concatenate([a, b, a, b])
+            cols = np.concatenate([a, b, b, a])
+            inside = free[rows] & free[cols]
+            edge = np.tile(np.arange(len(a)), 4)[inside]
+            sign = np.repeat([1.0, 1.0, -1.0, -1.0], len(a))[inside]
+            key = index[cols[inside]] * n_f + index[rows[inside]]
+            unique, position = np.unique(key, return_inverse=True)
+            indptr = np.searchsorted(unique // n_f, np.arange(n_f + 1))
+            # Naczynia wolny - brzegowy: wklad g * p_b do prawej strony
+            coupled = free[a] != free[b]
+            inner = np.where(free[a], a, b)[coupled]
+            outer = np.where(free[a], b, a)[coupled]
+            self._pattern = (unique % n_f, indptr, position, edge, sign,
+                             np.flatnonzero(coupled), index[inner], index[outer])
+        indices, indptr, position, edge, sign, coupled, inner, outer = self._pattern
+        n_f = len(indptr) - 1
+        data = np.bincount(position, sign * g[edge], minlength=len(indices))
+        G_ff = sp.csc_matrix((data, indices, indptr), shape=(n_f, n_f))
+        rhs = np.bincount(inner, g[coupled] * net.boundary_pressure[outer], minlength=n_f)
+        return G_ff, rhs
+
+    def _flow_waves(self, flow):
+        """
+        Kolejnosc wezlow wzdluz przeplywu (porzadek topologiczny, Kahn):
+        lista fal - w kazdej bifurkacje (wezel, galaz a, galaz b) i pozostale
+        naczynia wyplywajace (wezel, naczynie). Liczona od nowa tylko, gdy
+        zmieni sie kierunek przeplywu w ktoryms naczyniu.
+        """
+        sign = np.sign(flow)
+        if self._waves is not None and np.array_equal(sign, self._waves[0]):
+            return self._waves[1]
+        n = self.network.n_nodes
+        active = np.flatnonzero(sign != 0)
+        up = np.where(sign[active] > 0, self.network.edges[active, 0], self.network.edges[active, 1])
+        down = np.where(sign[active] > 0, self.network.edges[active, 1], self.network.edges[active, 0])
+        order = np.argsort(up, kind='stable')
+        out_start = np.searchsorted(up[order], np.arange(n + 1))
+        indegree = np.bincount(down, minlength=n)
+
+        waves = []
+        front = np.flatnonzero(indegree == 0)
+        while len(front):
+            counts = out_start[front + 1] - out_start[front]
+            nodes = np.repeat(front, counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            out = order[out_start[nodes] + offsets]
+            split = np.repeat(counts == 2, counts)
+            pairs = out[split].reshape(-1, 2)
+            waves.append((nodes[split][::2], active[pairs[:, 0]], active[pairs[:, 1]],
+                          nodes[~split], active[out[~split]]))
+            np.subtract.at(indegree, down[out], 1)
+            targets = np.unique(down[out])
+            front = targets[indegree[targets] == 0]
+        self._waves = (sign, waves)
+        return waves
+
+    def _transport(self, flow, inflow, H_inlet):
+        """
+        Hematokryt naczyn wynikajacy z przeplywow: bilans krwinek w wezlach
+        przetwarzanych wzdluz przeplywu (_flow_waves). Naczynia bez przeplywu
+        zachowuja poprzedni hematokryt.
+        """
+        net = self.network
+        n = net.n_nodes
+        Q = np.abs(flow)
+        H = self.H.copy()
+        # Strumien krwinek i krwi wplywajacy do wezla oraz srednica naczynia zasilajacego
+        rbc = np.zeros(n)
+        blood = np.zeros(n)
+        D_feed = np.zeros(n)
+        sources = net.boundary_nodes[inflow > 0]
+        rbc[sources] = H_inlet * inflow[inflow > 0]
+        blood[sources] = inflow[inflow > 0]
+        a, b = net.edges.T
+        down = np.where(flow > 0, b, a)
+        # Srednica naczynia zasilajacego zrodlo: najszersze naczynie przy tym wezle
+        is_source = np.zeros(n, dtype=bool)
+        is_source[sources] = True
+        for end in (a, b):
+            np.maximum.at(D_feed, end[is_source[end]], self.D[is_source[end]])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for node_ab, e_a, e_b, node_s, e_s in self._flow_waves(flow):
+                H_F = np.where(blood > 0, rbc / blood, 0.0)
+                H[e_s] = H_F[node_s]
+                if len(node_ab):
+                    Q_a, Q_b = Q[e_a], Q[e_b]
+                    Q_F = Q_a + Q_b
+                    FQ_B = Q_a / Q_F
+                    if self.phase_separation:
+                        FQ_E = phase_separation(self.D[e_a], self.D[e_b], D_feed[node_ab],
+                                                H_F[node_ab], FQ_B)
+                    else:
+                        FQ_E = FQ_B
+                    H[e_a] = np.where(Q_a > 0, FQ_E * H_F[node_ab] * Q_F / Q_a, 0.0)
+                    H[e_b] = np.where(Q_b > 0, (1 - FQ_E) * H_F[node_ab] * Q_F / Q_b, 0.0)
+                out = np.concatenate([e_s, e_a, e_b])
+                np.add.at(rbc, down[out], H[out] * Q[out])
+                np.add.at(blood, down[out], Q[out])
+                np.maximum.at(D_feed, down[out], self.D[out])
+        return np.clip(H, 0.0, 0.99)
+
+    def solve(self, H_inlet=0.45, tol=1e-6, max_iter=200, relax=0.5):
+        """
+        Rozwiazanie nieliniowe dla hematokrytu krwi doplywajacej H_inlet.
+        Start: hematokryt z poprzedniego solve() przeskalowany do nowego
+        H_inlet (pierwsze wywolanie - H_inlet we wszystkich naczyniach).
+
+        Parametry:
+            tol : float
+                Zbieznosc, gdy max |zmiana hematokrytu| < tol
+            relax : float
+                Poczatkowy wspolczynnik relaksacji hematokrytu (1 - bez
+                relaksacji); polowiony, gdy zmiana hematokrytu rosnie
+                (oscylacje przy silnym rozdziale faz w kapilarach)
+
+        Zwraca slownik jak VascularNetwork.solve() oraz: hematocrit, eta (E,),
+        iterations, converged, residual, wall_time, time_per_solve (czas
+        jednej iteracji: rozwiazanie liniowe + transport krwinek),
+        cg_iterations i factorizations w tym wywolaniu.
+        """
+        t0 = time.perf_counter()
+        start = dict(self.stats)
+        if self.H is None:
+            self.H = np.full(len(self.D), float(H_inlet))
+        else:
+            self.H = np.clip(self.H * (H_inlet / self.H_inlet), 0.0, 0.99)
+        self.H_inlet = H_inlet
+
+        converged = False
+        previous = np.inf
+        for iteration in range(1, max_iter + 1):
+            self.vessels.update_viscosity(slice(None), self.viscosity(self.H))
+            self.network.set_resistance(self.vessels.R)
+            self._p = self._linear_solve()
+            self.stats['linear_solves'] += 1
+            solution = self.network.solution_from_pressure(self._p)
+            H_new = self._transport(solution['flow'], solution['inflow'], H_inlet)
+            residual = np.abs(H_new - self.H).max()
+            if residual < tol:
+                self.H = H_new
+                converged = True
+                break
+            if residual > previous:
+                relax = max(0.5 * relax, 0.02)
+            previous = residual
+            self.H = self.H + relax * (H_new - self.H)
+        self.stats['solves'] += 1
+        self.stats['iterations'] += iteration
+        wall_time = time.perf_counter() - t0
+
+        solution.update({
+            'hematocrit': H_new,
+            'eta': self.vessels.eta.copy(),
+            'iterations': iteration,
+            'converged': converged,
+            'residual': residual,
+            'wall_time': wall_time,
+            'time_per_solve': wall_time / iteration,
+            'cg_iterations': self.stats['cg_iterations'] - start['cg_iterations'],
+            'factorizations': self.stats['factorizations'] - start['factorizations'],
+        })
+        return solution
@@ -1,46 +1,10 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from network import VascularNetwork
+from vessels import ETA, VesselArray, poiseuille_resistance
 
-ETA = 3.5e-3 # Pa*s
 MMHG = 133.322 # Pa/mmHg
 
-class Vessel:
-    """
-    Klasa reprezentująca naczynie kwionosne.
-    
-    Parametry:
-        L : float
-            Dlugosc naczynia [m]
-        r : float
-            Promien naczynia [m]
-        eta : float
-            Lepkosc cieczy [Pa*s]
-    """
-    
-    def __init__(self, L, r, eta=ETA):
-        self.L = L
-        self.r = r
-        self.eta = eta
-        self.R = self._calculate_resistance()
-        
-    def _calculate_resistance(self):
-        """
-        Oblicza opor hydrodynamiczny
-        R = 8*n*L/(pi*r^4)
-        """
-        return (8*self.eta*self.L)/(np.pi*self.r**4)
-    
-    def update_radius(self, r_new):
-        """Aktualizuje promien i przelicza opor"""
-        self.r = r_new
-        self.R = self._calculate_resistance()
-        
-    def update_viscosity(self, eta_new):
-        """Aktualizuje lepkosc i przelicza opor"""
-        self.eta = eta_new
-        self.R = self._calculate_resistance()
-        
-
 def calculate_parallel_resistance(resistances):
     """Oblicza opor zastepczy dla naczyn polaczonych rownolegle"""
     return 1/np.sum(1/np.array(resistances))
@@ -49,93 +13,114 @@ def calculate_series_resistance(resistances):
     """Oblicza opor zastepczy dla naczyn polaczonych szeregowo"""
     return np.sum(resistances)
 
+# Kolejnosc naczyn w zbiorze: aorta, 2 galezie, 4 tetniczki
+AORTA = 0
+BRANCHES = [1, 2]
+TERMINALS = [3, 4, 5, 6]
+
 def build_vascular_network(eta=ETA):
-    """Buduje siec naczyniiowa: aorta - 2 galezie - 4 tetniczki"""
-    aorta = Vessel(L=0.3, r=0.012, eta=eta)
-    branch1 = Vessel(L=0.2, r=0.006, eta=eta)
-    branch2 = Vessel(L=0.2, r=0.006, eta=eta)
-    term = [Vessel(L=0.02, r=0.0015, eta=eta) for _ in range(4)]
-    
-    return aorta, branch1, branch2, term
+    """Buduje siec naczyniiowa: aorta - 2 galezie - 4 tetniczki (VesselArray)"""
+    return VesselArray(L=[0.3, 0.2, 0.2, 0.02, 0.02, 0.02, 0.02],
+                       r=[0.012, 0.006, 0.006, 0.0015, 0.0015, 0.0015, 0.0015],
+                       eta=eta)
 
-def calculate_network_resistance(aorta, branch1, branch2, term):
+def calculate_network_resistance(vessels):
     """Oblicza calkowity opor sieci naczyniowej"""
     
+    R = vessels.R
+    
     # Opor rownolegly tetniczek
-    R_term1 = calculate_parallel_resistance([term[0].R, term[1].R])
-    R_term2 = calculate_parallel_resistance([term[2].R, term[3].R])
+    R_term1 = calculate_parallel_resistance(R[TERMINALS[:2]])
+    R_term2 = calculate_parallel_resistance(R[TERMINALS[2:]])
     
     # Opor szeregowy kazdej sciezki 
-    R_path1 = calculate_series_resistance([branch1.R, R_term1])
-    R_path2 = calculate_series_resistance([branch2.R, R_term2])
+    R_path1 = calculate_series_resistance([R[BRANCHES[0]], R_term1])
+    R_path2 = calculate_series_resistance([R[BRANCHES[1]], R_term2])
     
     # Opor rownolegly obu sciezek
     R_parallel_paths = calculate_parallel_resistance([R_path1, R_path2])
     
     # Calkowity opor
-    R_total = aorta.R + R_parallel_paths
+    R_total = R[AORTA] + R_parallel_paths
     
     return R_total, R_term1, R_term2, R_path1, R_path2
     
-def calculate_flows(aorta, branch1, branch2, term, P_in, P_out):
-    """Oblicza przeplywy w poszczegolnych czesciach sieci"""
-    
-    R_total, R_term1, R_term2, R_path1, R_path2 = calculate_network_resistance(
-        aorta, branch1, branch2, term    
-    )
-    
-    # Calkowity przeplyw
-    Q_total = (P_in - P_out)/R_total
-    
-    # Cisnienie po aorcie
-    P_after_aorta = P_in - Q_total * aorta.R
-    
-    # Przeplywy w kazdej sciezce
-    Q_path1 = (P_after_aorta - P_out) / R_path1
-    Q_path2 = (P_after_aorta - P_out) / R_path2
+def build_network_graph(vessels, P_in, P_out):
+    """
+    Graf sieci: wezel 0 - wejscie (P_in), 1 - koniec aorty, 2, 3 - konce galezi,
+    4..7 - wyjscia tetniczek (P_out). Naczynia w kolejnosci zbioru vessels.
+    """
+    edges = [(0, 1), (1, 2), (1, 3), (2, 4), (2, 5), (3, 6), (3, 7)]
+    boundary = {0: P_in, 4: P_out, 5: P_out, 6: P_out, 7: P_out}
+    return VascularNetwork(edges, vessels.R, boundary)
+
+def summarize_flows(solution, P_in, P_out):
+    """Przeplywy w czesciach sieci z rozwiazania grafu (VascularNetwork.solve)"""
     
-    # Cisnienie po galeziach
-    P_after_branch1 = P_after_aorta - Q_path1 * branch1.R
-    P_after_branch2 = P_after_aorta - Q_path2 * branch2.R
+    flow = solution['flow']
     
-    # Przeplywy w tetniczkach
-    Q_term = [
-        (P_after_branch1 - P_out) / term[0].R,
-        (P_after_branch1 - P_out) / term[1].R,
-        (P_after_branch2 - P_out) / term[2].R,
-        (P_after_branch2 - P_out) / term[3].R
-    ]
+    return {
+        'Q_total': solution['Q_total'],
+        'Q_path1': flow[BRANCHES[0]],
+        'Q_path2': flow[BRANCHES[1]],
+        'Q_term': list(flow[TERMINALS]),
+        'R_total': (P_in - P_out) / solution['Q_total']
+    }
+
+def calculate_flows(vessels, P_in, P_out):
+    """Oblicza przeplywy w poszczegolnych czesciach sieci (analiza wezlowa grafu)"""
+    return summarize_flows(build_network_graph(vessels, P_in, P_out).solve(), P_in, P_out)
+
+def calculate_flows_batch(L, r, eta, P_in, P_out):
+    """
+    Wariant wektorowy calculate_flows: L, r, eta rozglaszane do (batch, 7)
+    (kolejnosc naczyn jak w build_vascular_network), P_in, P_out - liczby
+    albo tablice (batch,). Cala partia jednym wywolaniem solve_batch.
     
+    Zwraca slownik: Q (batch, 7) - przeplywy naczyn, Q_total, R_total (batch,).
+    """
+    R = poiseuille_resistance(*np.broadcast_arrays(L, r, eta))
+    P_in = np.asarray(P_in, dtype=float)[..., None]
+    P_out = np.asarray(P_out, dtype=float)[..., None]
+    network = build_network_graph(build_vascular_network(), 0.0, 0.0)
+    P_b = np.concatenate(np.broadcast_arrays(P_in, P_out, P_out, P_out, P_out), axis=-1)
+    solution = network.solve_batch(R, P_b)
     return {
-        'Q_total': Q_total,
-        'Q_path1': Q_path1,
-        'Q_path2': Q_path2,
-        'Q_term': Q_term,
-        'R_total': R_total
+        'Q': solution['flow'],
+        'Q_total': solution['Q_total'],
+        'R_total': (P_in - P_out)[..., 0] / solution['Q_total']
     }
+
+def calculate_network_resistance_batch(L, r, eta=ETA):
+    """Wariant wektorowy calkowitego oporu sieci: L, r, eta rozglaszane do (batch, 7)"""
+    return calculate_flows_batch(L, r, eta, 1.0, 0.0)['R_total']
     
 
-def sensitivity_analysis_radius(aorta, branch1, branch2, term, P_in, P_out):
+def sensitivity_analysis_radius(vessels, P_in, P_out):
     """Analiza wrazliwosci na zmiane promienia tetniczek koncowych"""
     
-    baseline = calculate_flows(aorta, branch1, branch2, term, P_in, P_out)
+    network = build_network_graph(vessels, P_in, P_out)
+    baseline = summarize_flows(network.solve(), P_in, P_out)
     results = {'baseline': baseline}
     
     for pct in [-0.1, 0.1]:
-        term_modified = [Vessel(L=t.L, r=t.r * (1 + pct), eta=t.eta) for t in term]
-        flows = calculate_flows(aorta, branch1, branch2, term_modified, P_in, P_out)
+        modified = vessels.copy()
+        modified.scale_radius(TERMINALS, 1 + pct)
+        # Poprawka niskiego rzedu na rozkladzie sieci bazowej
+        network.update_resistance(TERMINALS, modified.R[TERMINALS])
+        flows = summarize_flows(network.solve(), P_in, P_out)
         results[f'{pct:+.0%}'] = flows
         
     return results
 
-def compare_viscosity(P_int, P_out):
-    """Porownanie perfuzji dla dwoch wartosci lepkosci"""
-    
-    aorta1, branch1_1, branch2_1, term1 = build_vascular_network(eta=3.5e-3)
-    flows1 = calculate_flows(aorta1, branch1_1, branch2_1, term1, P_in, P_out)
+def compare_viscosity(P_in, P_out):
+    """Porownanie perfuzji dla dwoch wartosci lepkosci (jedna partia obliczen)"""
     
-    aorta2, branch1_2, branch2_2, term2 = build_vascular_network(eta=2.8e-3)
-    flows2 = calculate_flows(aorta2, branch1_2, branch2_2, term2, P_in, P_out)
+    vessels = build_vascular_network()
+    eta = np.array([[3.5e-3], [2.8e-3]])
+    batch = calculate_flows_batch(vessels.L, vessels.r, eta, P_in, P_out)
+    flows1, flows2 = [{'Q_total': batch['Q_total'][k], 'Q_term': list(batch['Q'][k, TERMINALS]),
+                       'R_total': batch['R_total'][k]} for k in range(2)]
     
     return flows1, flows2
     
@@ -144,20 +129,23 @@ def compare_viscosity(P_int, P_out):
 P_in = 100 * MMHG
 P_out = 10 * MMHG
 
-aorta, branch1, branch2, term = build_vascular_network()
-flows = calculate_flows(aorta, branch1, branch2, term, P_in, P_out)
+vessels = build_vascular_network()
+aorta, branch1, branch2, *term = vessels
+flows = calculate_flows(vessels, P_in, P_out)
 
 print(f"Opor aorty: {aorta.R:.2e} Pa·s/m³")
 print(f"Opor galezi 1: {branch1.R:.2e} Pa·s/m³")
 print(f"Opor galezi 2: {branch2.R:.2e} Pa·s/m³")
 print(f"Opor tetniczki: {term[0].R:.2e} Pa·s/m³")
+print(f"Opor calkowity: {flows['R_total']:.2e} Pa·s/m³ "
+      f"(wzor szeregowo-rownolegly: {calculate_network_resistance(vessels)[0]:.2e})")
 print(f"Calkowity przeplyw: {flows['Q_total']*1e6:.2f} ml/s")
 print(f"Przeplyw sciezka 1: {flows['Q_path1']*1e6:.2f} ml/s")
 print(f"Przeplyw sciezka 2: {flows['Q_path2']*1e6:.2f} ml/s")
 for i, q in enumerate(flows['Q_term'], 1):
     print(f"Tetniczka {i}: {q*1e6:.2f} ml/s")
 
-sens_results = sensitivity_analysis_radius(aorta, branch1, branch2, term, P_in, P_out)
+sens_results = sensitivity_analysis_radius(vessels, P_in, P_out)
 baseline_Q = sens_results['baseline']['Q_total'] * 1e6
 print(f"\nPrzeplyw bazowy: {baseline_Q:.2f} ml/s")
 for key in ['-10%', '+10%']:
@@ -165,6 +153,18 @@ for key in ['-10%', '+10%']:
     change = ((Q - baseline_Q) / baseline_Q) * 100
     print(f"Zmiana promienia {key}: Q = {Q:.2f} ml/s (zmiana: {change:+.1f}%)")
 
+# Wrazliwosc metoda sprzezona: pochodne Q_total i perfuzji tetniczek
+# wzgledem promienia i lepkosci kazdego naczynia z jednego rozwiazania
+adjoint = build_network_graph(vessels, P_in, P_out).perfusion_sensitivity(vessels)
+names = ['Aorta', 'Galaz 1', 'Galaz 2', 'Tetniczka 1', 'Tetniczka 2', 'Tetniczka 3', 'Tetniczka 4']
+print("\nElastycznosc Q_total (dQ/Q)/(dx/x) - metoda sprzezona:")
+print(f"{'naczynie':>12} {'wzgl. r':>9} {'wzgl. eta':>10} {'perfuzja T1 wzgl. r':>20}")
+for i, name in enumerate(names):
+    e_r = adjoint['dQ_total_dr'][i] * vessels.r[i] / adjoint['Q_total']
+    e_eta = adjoint['dQ_total_deta'][i] * vessels.eta[i] / adjoint['Q_total']
+    e_t1 = adjoint['dQ_term_dr'][0, i] * vessels.r[i] / adjoint['Q_term'][0]
+    print(f"{name:>12} {e_r:>9.3f} {e_eta:>10.3f} {e_t1:>20.3f}")
+
 flows_normal, flows_anemia = compare_viscosity(P_in, P_out)
 print(f"\nη = 3.5 mPa*s: Q_total = {flows_normal['Q_total']*1e6:.2f} ml/s")
 print(f"η = 2.8 mPa*s: Q_total = {flows_anemia['Q_total']*1e6:.2f} ml/s")
@@ -226,14 +226,13 @@ ax3.grid(axis='y', alpha=0.3, which='both')
 
 ax4 = plt.subplot(2, 2, 4)
 L_values = np.linspace(0.1, 0.5, 30)
-Q_vals = []
-R_vals = []
 
-for L in L_values:
-    branch_mod = Vessel(L=L, r=0.006, eta=ETA)
-    flows_mod = calculate_flows(aorta, branch_mod, branch2, term, P_in, P_out)
-    Q_vals.append(flows_mod['Q_path1'] * 1e6)
-    R_vals.append(branch_mod.R / 1e9)
+# Cala seria dlugosci galezi jednym wywolaniem: L (30, 7)
+L_sweep = np.tile(vessels.L, (len(L_values), 1))
+L_sweep[:, BRANCHES[0]] = L_values
+flows_sweep = calculate_flows_batch(L_sweep, vessels.r, vessels.eta, P_in, P_out)
+Q_vals = flows_sweep['Q'][:, BRANCHES[0]] * 1e6
+R_vals = poiseuille_resistance(L_values, vessels.r[BRANCHES[0]], vessels.eta[BRANCHES[0]]) / 1e9
 
 ax4_twin = ax4.twinx()
 line1 = ax4.plot(L_values * 100, Q_vals, 'o-', color='#2E86AB', linewidth=2.5, 
@@ -0,0 +1,215 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import brentq
+from scipy.sparse.linalg import splu
+
+from solver import SCHEMES
+
+
+def default_beta(L, D, k):
+    """Wspolczynnik zageszczenia rosnacy ze stromoscia profilu lambda*L"""
+    return float(np.clip(0.2 * np.sqrt(k / D) * L, 1e-6, 3.0))
+
+
+def _tanh_map(s, L, beta):
+    """x(s) = L * (1 - tanh(beta*(1 - s)) / tanh(beta)); beta -> 0 daje x = L*s"""
+    if beta < 1e-8:
+        return L * s
+    return L * (1 - np.tanh(beta * (1 - s)) / np.tanh(beta))
+
+
+def stretched_grid(L, N, beta=2.0, x_fix=None):
+    """
+    Siatka zageszczona przy x = 0:
+    x = L * (1 - tanh(beta*(1 - s)) / tanh(beta)), s = 0..1 rownomiernie.
+    beta -> 0 daje siatke jednorodna. Jesli podano x_fix, beta jest
+    minimalnie zwiekszane (pierwiastek rownania x(s_j; beta) = x_fix dla
+    pierwszego wezla j z s_j >= s(x_fix)), tak zeby x_fix bylo dokladnie
+    wezlem, a siatka pozostala gladka - bez skoku kroku przy x_fix.
+    """
+    s = np.linspace(0, 1, N)
+    if x_fix is None:
+        return _tanh_map(s, L, beta)
+
+    if beta < 1e-8:
+        s_fix = x_fix / L
+    else:
+        s_fix = 1 - np.arctanh((1 - x_fix / L) * np.tanh(beta)) / beta
+    j = int(np.clip(np.ceil(s_fix * (N - 1) - 1e-9), 1, N - 2))
+
+    # x(s_j; beta) maleje z beta, a x(s_j; beta) >= x_fix z wyboru j
+    def gap(b):
+        return _tanh_map(s[j], L, b) - x_fix
+
+    if gap(beta) > 0:
+        hi = max(2 * beta, 1e-3)
+        while gap(hi) > 0:
+            hi *= 2
+        beta = brentq(gap, beta, hi, xtol=1e-14, rtol=1e-15)
+    x = _tanh_map(s, L, beta)
+    x[j] = x_fix
+    return x
+
+
+def operator(x, D, k):
+    """
+    Macierz operatora D * d2/dx2 - k na siatce niejednorodnej x.
+    Wezly wewnetrzne (h- = x_i - x_{i-1}, h+ = x_{i+1} - x_i):
+        d2phi/dx2 = 2/(h- + h+) * ((phi_{i+1} - phi_i)/h+ - (phi_i - phi_{i-1})/h-)
+    Brzeg x = L (dphi/dx = 0) przez wezel lustrzany:
+        d2phi/dx2 = 2 * (phi_{N-2} - phi_{N-1}) / h**2
+    Wiersz 0 (Dirichlet) jest zerowy.
+    """
+    N = len(x)
+    h = np.diff(x)
+    hm, hp = h[:-1], h[1:]
+
+    lower = np.zeros(N - 1)
+    main = np.zeros(N)
+    upper = np.zeros(N - 1)
+
+    lower[:-1] = 2 * D / (hm * (hm + hp))
+    upper[1:] = 2 * D / (hp * (hm + hp))
+    main[1:-1] = -2 * D / (hm * hp) - k
+
+    lower[-1] = 2 * D / h[-1]**2
+    main[-1] = -2 * D / h[-1]**2 - k
+    return sp.diags([lower, main, upper], [-1, 0, 1], format='csc')
+
+
+def node_stability_limits(x, D, k):
+    """
+    Lokalne ograniczenie kroku jawnego schematu w kazdym wezle:
+    dt_i = 1 / (|A_ii|) (dodatniosc wspolczynnikow), dla siatki jednorodnej
+    bez reakcji daje dx**2/(2*D). Jawny krok globalny to min(dt_i).
+    """
+    diag = np.abs(operator(x, D, k).diagonal()[1:])
+    return np.concatenate([[np.inf], 1.0 / diag])
+
+
+class NonUniformStepper:
+    """
+    Schemat theta dla dphi/dt = D * d2phi/dx2 - k * phi na siatce x,
+    phi(0) = 1, dphi/dx(L) = 0. scheme: 'explicit', 'be' lub 'cn'.
+    Dla schematu jawnego dt nie moze przekroczyc najmniejszego
+    ograniczenia wezlowego (najgestsze wezly decyduja o kroku).
+    """
+
+    def __init__(self, x, D, k, dt, scheme='be'):
+        self.x = np.asarray(x, dtype=float)
+        self.N = len(self.x)
+        self.D = D
+        self.k = k
+        self.dt = dt
+        self.scheme = scheme
+        self.A = operator(self.x, D, k)
+
+        if scheme == 'explicit':
+            dt_limit = node_stability_limits(self.x, D, k).min()
+            if dt > dt_limit:
+                raise ValueError(f"dt={dt:.4e} s przekracza ograniczenie wezlowe {dt_limit:.4e} s")
+            self._lu = None
+        elif scheme in SCHEMES:
+            theta = SCHEMES[scheme]
+            I = sp.identity(self.N, format='csc')
+            lhs = (I - theta * dt * self.A).tolil()
+            lhs[0, 0] = 1.0
+            self._lu = splu(lhs.tocsc())
+            self._rhs = (I + (1 - theta) * dt * self.A).tocsr()
+        else:
+            raise ValueError(f"Nieznany schemat: {scheme}")
+
+        # Warunek Dirichleta obowiazuje od t = 0, inaczej CN opoznia start o dt/2
+        self.phi = np.zeros(self.N)
+        self.phi[0] = 1.0
+        self.n = 0
+
+    def step(self):
+        if self._lu is None:
+            self.phi = self.phi + self.dt * (self.A @ self.phi)
+        else:
+            b = self._rhs @ self.phi
+            b[0] = 1.0
+            self.phi = self._lu.solve(b)
+        self.phi[0] = 1.0
+        self.n += 1
+        return self.phi
+
+    @property
+    def t(self):
+        return self.n * self.dt
+
+
+def t95_on_grid(x, D, k, target_x, dt, scheme='be', n_steps=10**6):
+    """
+    t_95 w punkcie target_x (musi byc wezlem siatki). Prog jak w zadania.py:
+    0.95 * cosh(lambda*(L-x))/cosh(lambda*L). Czas przeciecia progu jest
+    interpolowany liniowo miedzy krokami. None, gdy prog nie zostal osiagniety.
+    """
+    L = x[-1]
+    idx = int(np.argmin(np.abs(x - target_x)))
+    lam = np.sqrt(k / D)
+    threshold = 0.95 * np.cosh(lam * (L - x[idx])) / np.cosh(lam * L)
+
+    stepper = NonUniformStepper(x, D, k, dt, scheme)
+    phi_prev = stepper.phi.copy()
+    for n in range(n_steps):
+        phi = stepper.step()
+        prev, cur = phi_prev[idx], phi[idx]
+        if cur >= threshold:
+            return (n + (threshold - prev) / (cur - prev)) * dt
+        if np.max(np.abs(phi - phi_prev)) < 1e-12:
+            # Stan ustalony ponizej progu (np. zbyt rzadka siatka)
+            return None
+        phi_prev[:] = phi
+    return None
+
+
+def refine_t95(L, D, k, target_x, rtol=1e-3, N0=10, N_max=5000, beta=None,
+               steps=1000, scheme='cn', order=2):
+    """
+    Zageszcza siatke rozciagnieta, az oszacowanie bledu t_95 spadnie ponizej
+    rtol. Blad siatki N szacowany jest ekstrapolacja Richardsona z dwoch
+    kolejnych siatek (N_prev, N) przy rzedzie zbieznosci `order`:
+        err ~ |t_N - t_prev| / (r**order - 1),  r = h_prev / h = (N - 1) / (N_prev - 1).
+    Nastepne N dobierane jest z oszacowania (err ~ h**order), z krokiem
+    miedzy 1.5x a 4x, zamiast slepego podwajania.
+    Krok czasowy dt = t_95 / steps z poprzedniego przyblizenia.
+
+    Zwraca slownik: N, t_95, x (siatka), error_estimate (wzgledne),
+    history [(N, t_95, error_estimate)].
+    """
+    if beta is None:
+        beta = default_beta(L, D, k)
+
+    history = []
+    prev = None
+    dt = None
+    N = N0
+    while N <= N_max:
+        x = stretched_grid(L, N, beta, target_x)
+        if dt is None:
+            # Pierwsze przyblizenie: krok z najwolniejszego modu (skala czasu 1/s_0)
+            dt = 1.0 / (D * (np.pi / (2 * L))**2 + k) / steps * 5
+        t = t95_on_grid(x, D, k, target_x, dt, scheme)
+        if t is None:
+            # Na zbyt rzadkiej siatce stan ustalony moze nie osiagnac progu
+            N *= 2
+            continue
+        dt = t / steps
+        if prev is None:
+            history.append((N, t, None))
+            prev = (N, t)
+            N *= 2
+            continue
+
+        r = (N - 1) / (prev[0] - 1)
+        error = abs(t - prev[1]) / (r**order - 1) / abs(t)
+        history.append((N, t, error))
+        if error < rtol:
+            return {'N': N, 't_95': t, 'x': x, 'error_estimate': error, 'history': history}
+        prev = (N, t)
+        growth = np.clip(1.2 * (error / rtol)**(1 / order), 1.5, 4.0)
+        N = int(np.ceil(1 + (N - 1) * growth))
+
+    raise RuntimeError(f"Brak zbieznosci t_95 do N = {N_max}")
@@ -0,0 +1,37 @@
+import time
+
+import numpy as np
+import matplotlib.pyplot as plt
+from solver import sweep_t95
+
+# Przeglad wielu par (D, k) naraz - jeden wiersz stanu na zestaw parametrow
+L, N = 300e-6, 300
+target_x = 100e-6
+
+D_values = np.linspace(1.5e-9, 3.0e-9, 16)
+k_values = np.linspace(1.0e-3, 4.0e-3, 16)
+DD, KK = np.meshgrid(D_values, k_values)
+
+print("=" * 60)
+print(f"Przeglad {DD.size} par (D, k), N = {N} punktow")
+print("=" * 60)
+
+start = time.perf_counter()
+results = sweep_t95(DD.ravel(), KK.ravel(), L=L, N=N, target_x=target_x)
+elapsed = time.perf_counter() - start
+
+print(f"Czas obliczen: {elapsed:.1f} s ({elapsed / DD.size * 1e3:.1f} ms na zestaw)")
+
+t95 = np.array([np.nan if r['t_95'] is None else r['t_95'] for r in results])
+t95 = t95.reshape(DD.shape)
+print(f"Nie osiagnieto 95%: {np.isnan(t95).sum()} zestawow")
+
+# WYKRES
+fig, ax = plt.subplots(figsize=(9, 7))
+mesh = ax.pcolormesh(D_values * 1e9, k_values * 1e3, t95, shading='auto', cmap='viridis')
+fig.colorbar(mesh, ax=ax, label='t$_{95\\%}$ [s]')
+ax.set_xlabel('D [×10⁻⁹ m²/s]', fontsize=13, fontweight='bold')
+ax.set_ylabel('k [×10⁻³ 1/s]', fontsize=13, fontweight='bold')
+ax.set_title(f'Czas osiagniecia 95% w x = {target_x*1e6:.0f} μm', fontsize=14, fontweight='bold')
+plt.tight_layout()
+plt.show()
@@ -1,5 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from solver import ExplicitStepper
+from stability import analyze_explicit, max_stable_dt
 
 k = 2.068e-3
 D = 2.0e-9  # Wybieramy jeden D dla testu
@@ -28,29 +30,23 @@ for N in [300, 600]:
     # Oblicz dt_max
     dt_max = (dx**2) / (2 * D)
     print(f"dt_max (warunek stabilnosci) = {dt_max*1e6:.4f} us")
+    print(f"dt_max (z widma operatora, z reakcja -k*phi) = {max_stable_dt(N, dx, D, k)*1e6:.4f} us")
     
     # Stabilny (40% dt_max)
     print("\ndt = 40% dt_max")
     dt_stable = 0.4 * dt_max
     print(f"dt = {dt_stable*1e6:.4f} us")
     
-    phi = np.zeros(N)
+    stepper = ExplicitStepper(N, dx, D, k, dt_stable)
     t_hist = []
     phi_hist = []
     
     for n in range(20000):
         if n % 200 == 0:
             t_hist.append(n * dt_stable)
-            phi_hist.append(phi[idx])
+            phi_hist.append(stepper.phi[idx])
         
-        phi_new = phi.copy()
-        for i in range(1, N-1):
-            laplacian = (phi[i+1] - 2*phi[i] + phi[i-1]) / (dx**2)
-            phi_new[i] = phi[i] + dt_stable * (D * laplacian - k * phi[i])
-        
-        phi = phi_new
-        phi[0] = 1.0
-        phi[-1] = phi[-2]
+        phi = stepper.step()
     
     print(f"Wartosc koncowa: phi[{idx}] = {phi[idx]:.4f}")
     
@@ -64,36 +60,19 @@ for N in [300, 600]:
     dt_unstable = 1.2 * dt_max
     print(f"dt = {dt_unstable*1e6:.4f} us")
     
-    phi = np.zeros(N)
-    t_hist = []
-    phi_hist = []
-    
-    for n in range(20000):
-        if n % 200 == 0:
-            t_hist.append(n * dt_unstable)
-            phi_hist.append(phi[idx])
-        
-        phi_new = phi.copy()
-        for i in range(1, N-1):
-            laplacian = (phi[i+1] - 2*phi[i] + phi[i-1]) / (dx**2)
-            phi_new[i] = phi[i] + dt_unstable * (D * laplacian - k * phi[i])
-        
-        phi = phi_new
-        phi[0] = 1.0
-        phi[-1] = phi[-2]
-        
-        # Sprawdz czy nie wybuchlo
-        if np.any(np.abs(phi) > 10):
-            while len(t_hist) < 100:
-                t_hist.append(n * dt_unstable)
-                phi_hist.append(np.nan)
-            break
-    
-    print(f"Wartosc koncowa: phi[{idx}] = {phi[idx]:.4f}")
+    # Analiza widmowa zamiast symulacji - niestabilny przebieg nie jest liczony
+    report = analyze_explicit(N, dx, D, k, dt_unstable, threshold=10)
+    print(f"Promien spektralny macierzy kroku: {report['rho']:.4f}")
+    if report['stable']:
+        print("Schemat stabilny")
+    else:
+        print(f"Przewidywane |phi| > 10 po {report['n_blowup']} krokach "
+              f"(t = {report['t_blowup']*1e3:.3f} ms)")
     
     unstable_result = {
-        't': t_hist.copy(),
-        'phi': phi_hist.copy()
+        'rho': report['rho'],
+        'n_blowup': report['n_blowup'],
+        't_blowup': report['t_blowup']
     }
     
     results.append({
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+
+class SnapshotRecorder:
+    """
+    Zapisuje pelne profile phi co `stride` krokow do pliku .npy mapowanego
+    w pamieci. Plik jest alokowany raz na max_snapshots profili, wiec zapis
+    w petli czasowej to tylko kopiowanie do gotowego bufora (bez alokacji).
+    Czasy sa zapisywane w osobnym pliku `<nazwa>_t.npy`; niezapisane wiersze
+    maja t = NaN, dzieki czemu przerwany przebieg (np. po osiagnieciu t_95)
+    odczytuje sie poprawnie.
+
+    Parametry:
+        path : str
+            Sciezka pliku .npy z profilami
+        n_nodes : int
+            Liczba wezlow siatki
+        max_snapshots : int
+            Maksymalna liczba zapisanych profili
+        stride : int
+            Co ile krokow zapisywac profil
+        dtype : dtype
+            Typ danych w pliku, np. np.float32 zmniejsza plik o polowe
+    """
+
+    def __init__(self, path, n_nodes, max_snapshots, stride=1000, dtype=np.float64):
+        self.path = path
+        self.stride = stride
+        self.max_snapshots = max_snapshots
+        self._phi = open_memmap(path, mode='w+', dtype=dtype, shape=(max_snapshots, n_nodes))
+        self._t = open_memmap(_times_path(path), mode='w+', dtype=np.float64,
+                              shape=(max_snapshots,))
+        self._t[:] = np.nan
+        self.count = 0
+
+    def record(self, n, t, phi):
+        """Zapisuje profil, jesli krok n wypada na zapis i jest jeszcze miejsce"""
+        if n % self.stride == 0 and self.count < self.max_snapshots:
+            self._phi[self.count] = phi
+            self._t[self.count] = t
+            self.count += 1
+
+    def close(self):
+        """Zapisuje dane na dysk i zwalnia mapowanie (kolejne wywolania nic nie robia)"""
+        if self._phi is None:
+            return
+        self._phi.flush()
+        self._t.flush()
+        self._phi = self._t = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _times_path(path):
+    root, ext = os.path.splitext(path)
+    return f"{root}_t{ext or '.npy'}"
+
+
+def open_snapshots(path):
+    """
+    Otwiera zapisane profile bez wczytywania ich do pamieci.
+    Zwraca (t, phi): t - czasy zapisanych profili, phi - memmap (n, N);
+    odczyt phi[i] czyta z dysku tylko ten jeden profil.
+    """
+    t = np.load(_times_path(path), mmap_mode='r')
+    count = int(np.count_nonzero(~np.isnan(t)))
+    phi = np.load(path, mmap_mode='r')
+    return np.asarray(t[:count]), phi[:count]
@@ -0,0 +1,83 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from grid import default_beta, node_stability_limits, refine_t95, t95_on_grid
+from spectral import SpectralSolution
+
+# Parametry
+L = 300e-6
+D = 2.0e-9
+target_x = 100e-6
+rtol = 1e-3
+N_ref = 301          # siatka jednorodna dx = 1 um (x = 100 um jest wezlem)
+
+
+def uniform_grid(N):
+    """Siatka jednorodna z target_x w wezle: N - 1 wielokrotnoscia L / target_x"""
+    m = round(L / target_x)
+    return np.linspace(0, L, m * int(np.ceil((N - 1) / m)) + 1)
+
+
+def uniform_nodes(k, t_exact, tol):
+    """Najmniejsze N siatki jednorodnej z bledem t_95 <= tol (blad ~ h^2)"""
+    x = uniform_grid(4)
+    while True:
+        t = t95_on_grid(x, D, k, target_x, dt=t_exact / 1000, scheme='cn')
+        err = np.inf if t is None else abs(t - t_exact) / t_exact
+        if err <= tol:
+            return len(x), err
+        growth = np.clip(1.05 * np.sqrt(err / tol), 1.1, 4.0)
+        x = uniform_grid(1 + (len(x) - 1) * growth)
+
+
+print("=" * 110)
+print(f"Siatka rozciagnieta vs jednorodna, x = {target_x*1e6:.0f} um, rtol = {rtol:.0e}")
+print("=" * 110)
+print(f"{'k [1/s]':>10} {'beta':>6} {'N':>5} {'t_95 [s]':>10} {'blad':>9} {'szac.':>8} "
+      f"{'N jedn.':>8} {'oszczednosc':>12} {f'blad N={N_ref}':>12} {'dt_jawny/dt(jedn.)':>19}")
+
+rows = []
+for k in [2.068e-3, 0.1, 1.0, 5.0]:
+    t_exact = SpectralSolution(L, D, k, n_terms=4000).t95(target_x)
+
+    # Referencja: siatka jednorodna N = 301, ten sam schemat (CN)
+    x_uniform = uniform_grid(N_ref)
+    t_uniform = t95_on_grid(x_uniform, D, k, target_x, dt=t_exact / 1000, scheme='cn')
+
+    refined = refine_t95(L, D, k, target_x, rtol=rtol)
+    beta = default_beta(L, D, k)
+
+    err = (refined['t_95'] - t_exact) / t_exact
+    err_uniform = (t_uniform - t_exact) / t_exact
+    # Siatka jednorodna o tej samej dokladnosci co siatka rozciagnieta
+    N_uniform, _ = uniform_nodes(k, t_exact, max(abs(err), 1e-6))
+    dt_ratio = (node_stability_limits(refined['x'], D, k).min()
+                / node_stability_limits(uniform_grid(N_uniform), D, k).min())
+
+    print(f"{k:>10.3e} {beta:>6.2f} {refined['N']:>5d} {refined['t_95']:>10.4f} "
+          f"{err:>9.1e} {refined['error_estimate']:>8.1e} {N_uniform:>8d} "
+          f"{N_uniform / refined['N']:>11.1f}x {err_uniform:>12.1e} {dt_ratio:>19.2e}")
+    rows.append((k, refined, t_exact))
+
+# WYKRES: rozmieszczenie wezlow i lokalne ograniczenie kroku
+fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+
+for k, refined, t_exact in rows:
+    x = refined['x']
+    ax1.plot(x * 1e6, np.arange(len(x)), '.-', label=f"k = {k:.1e} (N = {len(x)})")
+    ax2.semilogy(x[1:] * 1e6, node_stability_limits(x, D, k)[1:], label=f"k = {k:.1e}")
+
+ax1.axvline(target_x * 1e6, color='gray', linestyle='--', alpha=0.6)
+ax1.set_xlabel('x [μm]', fontsize=13, fontweight='bold')
+ax1.set_ylabel('Numer wezla', fontsize=13, fontweight='bold')
+ax1.set_title('Rozmieszczenie wezlow', fontsize=14, fontweight='bold')
+ax1.legend(fontsize=10)
+ax1.grid(True, alpha=0.3)
+
+ax2.set_xlabel('x [μm]', fontsize=13, fontweight='bold')
+ax2.set_ylabel('dt$_{max}$ wezla [s]', fontsize=13, fontweight='bold')
+ax2.set_title('Lokalne ograniczenie kroku jawnego', fontsize=14, fontweight='bold')
+ax2.legend(fontsize=10)
+ax2.grid(True, alpha=0.3)
+
+plt.tight_layout()
+plt.show()
@@ -0,0 +1,334 @@
+from functools import lru_cache
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+from stability import analyze_explicit, max_stable_dt
+
+# Wagi theta schematow niejawnych
+SCHEMES = {'be': 1.0, 'cn': 0.5}
+
+
+class ExplicitStepper:
+    """
+    Jawny schemat roznic skonczonych dla rownania dyfuzji z reakcja
+    dphi/dt = D * d2phi/dx2 - k * phi
+    z warunkami brzegowymi phi[0] = 1 (Dirichlet) i phi[-1] = phi[-2] (Neumann).
+
+    Cala siatka jest aktualizowana naraz na wycinkach tablic, a wszystkie
+    bufory sa alokowane raz w konstruktorze. Kolejnosc dzialan jest taka sama
+    jak w petli `for i in range(1, N-1)`, wiec wyniki sa identyczne bitowo.
+
+    Parametry:
+        N : int
+            Liczba wezlow siatki
+        dx : float
+            Krok przestrzenny [m]
+        D : float
+            Wspolczynnik dyfuzji [m2/s]
+        k : float
+            Stala szybkosci zuzycia [1/s]
+        dt : float
+            Krok czasowy [s]
+        phi0 : array, opcjonalnie
+            Profil poczatkowy (domyslnie zera)
+    """
+
+    def __init__(self, N, dx, D, k, dt, phi0=None):
+        self.N = N
+        self.dx = dx
+        self.D = D
+        self.k = k
+        self.dt = dt
+        self.dx2 = dx**2
+
+        self.phi = np.zeros(N) if phi0 is None else np.array(phi0, dtype=float)
+        self._phi_new = np.empty(N)
+        self._lap = np.empty(N - 2)
+        self._reac = np.empty(N - 2)
+        self.n = 0
+
+    def step(self):
+        """Wykonuje jeden krok czasowy bez alokacji pamieci"""
+        phi, lap, reac = self.phi, self._lap, self._reac
+        inner = phi[1:-1]
+
+        # (phi[i+1] - 2*phi[i] + phi[i-1]) / dx**2
+        np.multiply(2, inner, out=lap)
+        np.subtract(phi[2:], lap, out=lap)
+        np.add(lap, phi[:-2], out=lap)
+        np.divide(lap, self.dx2, out=lap)
+
+        # phi[i] + dt * (D * d2phi_dx2 - k * phi[i])
+        np.multiply(self.D, lap, out=lap)
+        np.multiply(self.k, inner, out=reac)
+        np.subtract(lap, reac, out=lap)
+        np.multiply(self.dt, lap, out=lap)
+        np.add(inner, lap, out=self._phi_new[1:-1])
+
+        self.phi, self._phi_new = self._phi_new, phi
+        self.phi[0] = 1.0               # Dirichlet
+        self.phi[-1] = self.phi[-2]     # Neumann
+        self.n += 1
+        return self.phi
+
+    @property
+    def t(self):
+        return self.n * self.dt
+
+
+def _operator(N, dx, D, k):
+    """
+    Macierz A operatora D * d2/dx2 - k w wezlach wewnetrznych.
+    Wiersze brzegowe sa zerowe - warunki brzegowe dokladamy osobno.
+    """
+    main = np.full(N, -2 * D / dx**2 - k)
+    off = np.full(N - 1, D / dx**2)
+    main[[0, -1]] = 0.0
+    lower = off.copy()
+    upper = off.copy()
+    upper[0] = 0.0       # wiersz 0
+    lower[-1] = 0.0      # wiersz N-1
+    return sp.diags([lower, main, upper], [-1, 0, 1], format='csc')
+
+
+@lru_cache(maxsize=32)
+def _factorize(N, dx, D, k, dt, theta):
+    """
+    Faktoryzacja LU macierzy (I - theta*dt*A) z wierszami brzegowymi
+    phi[0] = 1 i phi[-1] - phi[-2] = 0 oraz macierz prawej strony
+    (I + (1-theta)*dt*A). Liczona raz dla danego (N, dx, D, k, dt, theta).
+    """
+    A = _operator(N, dx, D, k)
+    I = sp.identity(N, format='csc')
+
+    lhs = (I - theta * dt * A).tolil()
+    lhs[-1, -2] = -1.0      # Neumann: phi[-1] - phi[-2] = 0
+    rhs = (I + (1 - theta) * dt * A).tolil()
+    rhs[0, 0] = 0.0
+    rhs[-1, -1] = 0.0
+
+    return splu(lhs.tocsc()), rhs.tocsr()
+
+
+class ImplicitStepper:
+    """
+    Niejawny schemat (Euler wstecz 'be' lub Crank-Nicolson 'cn') dla tego samego
+    rownania i warunkow brzegowych co ExplicitStepper. Schemat jest bezwzglednie
+    stabilny, wiec dt nie jest ograniczone przez dx**2/(2*D).
+
+    Macierz trojdiagonalna jest faktoryzowana raz (i zapamietywana) dla danego
+    zestawu (D, k, dx, dt); kazdy krok to jedno mnozenie i jedno rozwiazanie
+    ukladu z gotowym rozkladem LU.
+
+    Parametry jak w ExplicitStepper, dodatkowo:
+        scheme : str
+            'be' (Euler wstecz) lub 'cn' (Crank-Nicolson)
+    """
+
+    def __init__(self, N, dx, D, k, dt, scheme='be', phi0=None):
+        if scheme not in SCHEMES:
+            raise ValueError(f"Nieznany schemat: {scheme}, dostepne: {list(SCHEMES)}")
+        self.N = N
+        self.dx = dx
+        self.D = D
+        self.k = k
+        self.dt = dt
+        self.scheme = scheme
+
+        self._lu, self._rhs = _factorize(N, dx, D, k, dt, SCHEMES[scheme])
+        self._b = np.empty(N)
+        self.phi = np.zeros(N) if phi0 is None else np.array(phi0, dtype=float)
+        self.n = 0
+
+    def step(self):
+        """Wykonuje jeden krok czasowy"""
+        b = self._b
+        b[:] = self._rhs @ self.phi
+        b[0] = 1.0          # Dirichlet
+        b[-1] = 0.0         # Neumann
+        self.phi = self._lu.solve(b)
+        self.n += 1
+        return self.phi
+
+    @property
+    def t(self):
+        return self.n * self.dt
+
+
+def make_stepper(N, dx, D, k, dt, scheme='explicit', phi0=None):
+    """
+    Tworzy stepper dla schematu 'explicit', 'be' lub 'cn'.
+    Dla schematu jawnego dt jest najpierw sprawdzane analiza widmowa -
+    niestabilna konfiguracja konczy sie bledem zamiast dlugiej symulacji.
+    dt=None wybiera 0.9 najwiekszego stabilnego kroku.
+    """
+    if scheme == 'explicit':
+        if dt is None:
+            dt = max_stable_dt(N, dx, D, k, safety=0.9)
+        report = analyze_explicit(N, dx, D, k, dt)
+        if not report['stable']:
+            raise ValueError(
+                f"Schemat jawny niestabilny dla dt={dt:.4e} s (rho={report['rho']:.4f}, "
+                f"|phi| > 10 po ~{report['n_blowup']} krokach); dt_max = {report['dt_max']:.4e} s")
+        return ExplicitStepper(N, dx, D, k, dt, phi0=phi0)
+    return ImplicitStepper(N, dx, D, k, dt, scheme=scheme, phi0=phi0)
+
+
+def run_t95(stepper, idx, threshold, n_steps=500000, record_every=1000, recorder=None):
+    """
+    Prowadzi symulacje do osiagniecia progu w wezle idx.
+    Zwraca (t_95 lub None, t_history, phi_history) - tak jak petla w zadania.py.
+    t_95 jest interpolowane liniowo miedzy krokami przed i po przekroczeniu
+    progu (bez interpolacji blad wynosilby do jednego kroku dt).
+    Opcjonalny recorder (SnapshotRecorder) zapisuje pelne profile phi.
+    """
+    t_history = []
+    phi_history = []
+    reached = None
+    dt = stepper.dt
+
+    for n in range(n_steps):
+        if n % record_every == 0:
+            t_history.append(n * dt)
+            phi_history.append(stepper.phi[idx])
+        if recorder is not None:
+            recorder.record(n, n * dt, stepper.phi)
+
+        before = float(stepper.phi[idx])
+        phi = stepper.step()
+
+        if phi[idx] >= threshold:
+            reached = (n + (threshold - before) / (phi[idx] - before)) * dt
+            break
+
+    return reached, t_history, phi_history
+
+
+class BatchedExplicitStepper:
+    """
+    Jawny schemat dla wielu zestawow parametrow naraz. Stan ma ksztalt (M, N),
+    jeden wiersz na zestaw (D, k, dt). Wszystkie wiersze wykonuja krok n
+    jednoczesnie, kazdy ze swoim dt. Dzialania sa te same co w ExplicitStepper,
+    wiec kazdy wiersz daje wynik identyczny z osobnym przebiegiem.
+
+    Parametry:
+        N : int
+            Liczba wezlow siatki
+        dx : float
+            Krok przestrzenny [m]
+        D, k, dt : array (M,)
+            Parametry kazdego wiersza
+    """
+
+    def __init__(self, N, dx, D, k, dt):
+        self.N = N
+        self.dx = dx
+        self.dx2 = dx**2
+        self.D = np.asarray(D, dtype=float)[:, None]
+        self.k = np.asarray(k, dtype=float)[:, None]
+        self.dt = np.asarray(dt, dtype=float)[:, None]
+        self._alloc(len(self.D))
+        self.n = 0
+
+    def _alloc(self, M):
+        self.phi = np.zeros((M, self.N))
+        self._phi_new = np.empty((M, self.N))
+        self._lap = np.empty((M, self.N - 2))
+        self._reac = np.empty((M, self.N - 2))
+
+    def step(self):
+        """Wykonuje jeden krok czasowy dla wszystkich aktywnych wierszy"""
+        phi, lap, reac = self.phi, self._lap, self._reac
+        inner = phi[:, 1:-1]
+
+        np.multiply(2, inner, out=lap)
+        np.subtract(phi[:, 2:], lap, out=lap)
+        np.add(lap, phi[:, :-2], out=lap)
+        np.divide(lap, self.dx2, out=lap)
+
+        np.multiply(self.D, lap, out=lap)
+        np.multiply(self.k, inner, out=reac)
+        np.subtract(lap, reac, out=lap)
+        np.multiply(self.dt, lap, out=lap)
+        np.add(inner, lap, out=self._phi_new[:, 1:-1])
+
+        self.phi, self._phi_new = self._phi_new, phi
+        self.phi[:, 0] = 1.0
+        self.phi[:, -1] = self.phi[:, -2]
+        self.n += 1
+        return self.phi
+
+    def keep(self, mask):
+        """Zostawia tylko wiersze z mask=True (pozostale koncza symulacje)"""
+        phi = self.phi[mask]
+        self.D = self.D[mask]
+        self.k = self.k[mask]
+        self.dt = self.dt[mask]
+        self._alloc(len(phi))
+        self.phi[:] = phi
+
+
+def sweep_t95(D_values, k_values, L=300e-6, N=300, target_x=100e-6, dt_factor=0.4,
+              n_steps=500000, record_every=1000):
+    """
+    Liczy t_95 dla wielu par (D, k) jednoczesnie jawnym schematem.
+    Kazdy wiersz ma wlasny prog 95% (ze stanu ustalonego) i konczy sie
+    niezaleznie - zakonczone wiersze sa usuwane z obliczen. t_95 jest
+    interpolowane liniowo miedzy krokami, jak w run_t95.
+
+    Zwraca liste slownikow jak w zadania.py:
+    {'D', 'k', 't_95', 't_history', 'phi_history', 'threshold'}
+    """
+    D_values = np.asarray(D_values, dtype=float)
+    k_values = np.broadcast_to(np.asarray(k_values, dtype=float), D_values.shape)
+    M = len(D_values)
+
+    x = np.linspace(0, L, N)
+    dx = L / (N - 1)
+    idx = np.argmin(np.abs(x - target_x))
+    x_target = x[idx]
+
+    dt = dt_factor * (dx**2) / (2 * D_values)
+    lambda_param = np.sqrt(k_values / D_values)
+    phi_steady = np.cosh(lambda_param * (L - x_target)) / np.cosh(lambda_param * L)
+    threshold = 0.95 * phi_steady
+
+    stepper = BatchedExplicitStepper(N, dx, D_values, k_values, dt)
+    active = np.arange(M)
+    thr_active = threshold.copy()
+    reached = [None] * M
+    t_history = [[] for _ in range(M)]
+    phi_history = [[] for _ in range(M)]
+
+    for n in range(n_steps):
+        if n % record_every == 0:
+            values = stepper.phi[:, idx]
+            for j, row in enumerate(active):
+                t_history[row].append(n * dt[row])
+                phi_history[row].append(values[j])
+
+        before = stepper.phi[:, idx].copy()
+        phi = stepper.step()
+
+        done = phi[:, idx] >= thr_active
+        if done.any():
+            frac = (thr_active[done] - before[done]) / (phi[done, idx] - before[done])
+            for row, f in zip(active[done], frac):
+                reached[row] = (n + f) * dt[row]
+            keep = ~done
+            active = active[keep]
+            thr_active = thr_active[keep]
+            if len(active) == 0:
+                break
+            stepper.keep(keep)
+
+    return [{
+        'D': D_values[i],
+        'k': k_values[i],
+        't_95': reached[i],
+        't_history': t_history[i],
+        'phi_history': phi_history[i],
+        'threshold': threshold[i],
+    } for i in range(M)]
@@ -0,0 +1,123 @@
+from math import exp, log, sin
+
+import numpy as np
+
+
+class SpectralSolution:
+    """
+    Dokladne rozwiazanie rownania dphi/dt = D * d2phi/dx2 - k * phi
+    z phi(0, t) = 1, dphi/dx(L, t) = 0 oraz phi(x, 0) = 0 w postaci szeregu
+    funkcji wlasnych:
+
+        phi(x, t) = phi_s(x) - sum_n b_n * exp(-s_n * t) * sin(mu_n * x)
+
+    gdzie phi_s = cosh(lambda*(L-x))/cosh(lambda*L), lambda = sqrt(k/D),
+    mu_n = (2n+1)*pi/(2L), s_n = D*mu_n**2 + k, b_n = 2*mu_n/(L*(lambda**2 + mu_n**2)).
+
+    Parametry:
+        L : float
+            Grubosc tkanki [m]
+        D : float
+            Wspolczynnik dyfuzji [m2/s]
+        k : float
+            Stala szybkosci zuzycia [1/s]
+        n_terms : int
+            Liczba wyrazow szeregu
+    """
+
+    def __init__(self, L, D, k, n_terms=200):
+        self.L = L
+        self.D = D
+        self.k = k
+        self.lambda_param = np.sqrt(k / D)
+
+        n = np.arange(n_terms)
+        self.mu = (2 * n + 1) * np.pi / (2 * L)
+        self.s = D * self.mu**2 + k
+        self.b = 2 * self.mu / (L * (self.lambda_param**2 + self.mu**2))
+
+    def phi_steady(self, x):
+        """Stan ustalony phi_s(x)"""
+        lam = self.lambda_param
+        return np.cosh(lam * (self.L - x)) / np.cosh(lam * self.L)
+
+    def phi(self, x, t):
+        """Stezenie phi(x, t) dla skalarnego x i skalarnego t"""
+        modes = self.b * np.sin(self.mu * x)
+        return self.phi_steady(x) - np.dot(modes, np.exp(-self.s * t))
+
+    def t_fraction(self, x, fraction=0.95, tol=1e-9):
+        """
+        Czas, po ktorym phi(x, t) osiaga fraction * phi_s(x).
+
+        Reszta r(t) = phi_s - phi maleje monotonicznie w czasie. Przedzial
+        [t_lo, t_hi] jest wyznaczany z przyblizenia pierwszym modem, a do
+        obliczen brane sa tylko mody istotne dla t >= t_lo
+        (exp(-s_n*t_lo) >= e**-40). Pierwiastek jest szukany metoda Newtona
+        zabezpieczona bisekcja.
+
+        Gdy juz na poczatku phi_s(x) - phi(x, 0) <= target (np. x = 0, wezel
+        z warunkiem Dirichleta), zwraca 0.
+        """
+        target = (1 - fraction) * float(self.phi_steady(x))
+        mu, s, b = self.mu, self.s, self.b
+        if float(self.phi_steady(x) - self.phi(x, 0.0)) <= target:
+            return 0.0
+
+        # Dla duzych t dominuje pierwszy mod: b_0 sin(mu_0 x) exp(-s_0 t) = target
+        b0 = b[0] * sin(mu[0] * x)
+        t_guess = max(log(b0 / target) / s[0], 1.0 / s[0]) if b0 > 0 else 1.0 / s[0]
+        t_lo, t_hi = 0.5 * t_guess, 2.0 * t_guess
+
+        for _ in range(60):
+            n_keep = max(int(np.searchsorted(s, 40.0 / t_lo)), 1)
+            b_keep = b[:n_keep] * np.sin(mu[:n_keep] * x)
+            s_keep = s[:n_keep]
+            if np.dot(b_keep, np.exp(-s_keep * t_lo)) > target:
+                break
+            t_lo *= 0.25
+        else:
+            raise RuntimeError(f"Nie znaleziono dolnej granicy przedzialu dla x={x}")
+        for _ in range(200):
+            if np.dot(b_keep, np.exp(-s_keep * t_hi)) <= target:
+                break
+            t_lo, t_hi = t_hi, 2.0 * t_hi
+        else:
+            raise RuntimeError(f"Nie znaleziono gornej granicy przedzialu dla x={x}")
+
+        if n_keep > 32:
+            def residual(t):
+                e = b_keep * np.exp(-s_keep * t)
+                return e.sum() - target, -np.dot(s_keep, e)
+        else:
+            # Dla kilku modow petla na floatach jest szybsza niz numpy
+            terms = list(zip(b_keep.tolist(), s_keep.tolist()))
+
+            def residual(t):
+                r, dr = -target, 0.0
+                for b_n, s_n in terms:
+                    e = b_n * exp(-s_n * t)
+                    r += e
+                    dr -= s_n * e
+                return r, dr
+
+        t = t_guess if t_lo < t_guess < t_hi else 0.5 * (t_lo + t_hi)
+        for _ in range(100):
+            r, dr = residual(t)
+            if r > 0:
+                t_lo = t
+            else:
+                t_hi = t
+
+            t_new = t - r / dr if dr < 0 else 0.5 * (t_lo + t_hi)
+            if abs(t_new - t) < tol or t_hi - t_lo < tol:
+                return t_new
+            if not t_lo < t_new < t_hi:
+                t_new = 0.5 * (t_lo + t_hi)
+            t = t_new
+
+        raise RuntimeError(f"Brak zbieznosci dla x={x}, fraction={fraction}")
+
+    def t95(self, x, tol=1e-9):
+        """Czas osiagniecia 95% stanu ustalonego w punkcie x"""
+        return self.t_fraction(x, 0.95, tol)
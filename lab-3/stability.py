@@ -0,0 +1,141 @@
+import numpy as np
+from scipy.linalg import eigh_tridiagonal, solve_banded
+
+
+def _interior_operator(N):
+    """
+    Przekatne macierzy T (N-2)x(N-2) laplasjanu w wezlach wewnetrznych jawnego
+    schematu: phi[0] = 1 daje wyraz wolny, a phi[-1] = phi[-2] z poprzedniego
+    kroku zmienia ostatni element przekatnej z -2 na -1. T jest symetryczna.
+    """
+    main = np.full(N - 2, -2.0)
+    main[-1] = -1.0
+    off = np.ones(N - 3)
+    return main, off
+
+
+def spectrum(N, dx, D, k):
+    """
+    Wartosci wlasne operatora D/dx**2 * T - k (rosnaco) i wektor wlasny
+    dla najmniejszej z nich - to on rosnie, gdy schemat jest niestabilny.
+    """
+    main, off = _interior_operator(N)
+    lam, vec = eigh_tridiagonal(main, off)
+    return D / dx**2 * lam - k, vec[:, 0]
+
+
+def max_stable_dt(N, dx, D, k, safety=1.0):
+    """
+    Najwiekszy dt, dla ktorego promien spektralny macierzy kroku
+    G = I + dt * (D/dx**2 * T - k) nie przekracza 1:
+    1 + dt * mu_min >= -1  =>  dt <= 2 / |mu_min|.
+    Dla k = 0 i duzego N daje klasyczne dx**2/(2*D).
+    """
+    main, off = _interior_operator(N)
+    lam_min = eigh_tridiagonal(main, off, eigvals_only=True,
+                               select='i', select_range=(0, 0))[0]
+    return safety * 2.0 / (k - D / dx**2 * lam_min)
+
+
+def _steady_interior(N, dx, D, k):
+    """Dyskretny stan ustalony w wezlach wewnetrznych: (D/dx**2 * T - k) phi_s = -b"""
+    r = D / dx**2
+    main, off = _interior_operator(N)
+    ab = np.zeros((3, N - 2))
+    ab[0, 1:] = r * off
+    ab[1] = r * main - k
+    ab[2, :-1] = r * off
+    b = np.zeros(N - 2)
+    b[0] = r                # phi[0] = 1
+    return solve_banded((1, 1), ab, -b)
+
+
+def _first_crossing(peak, n_start, n_max):
+    """Najmniejsze n <= n_max z peak(n) > 0 (szukanie wykladnicze + bisekcja)"""
+    lo, hi = 0, max(n_start, 1)
+    while peak(hi) <= 0:
+        lo, hi = hi, 2 * hi
+        if lo >= n_max:
+            return None
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if peak(mid) > 0:
+            hi = mid
+        else:
+            lo = mid
+    return hi
+
+
+def analyze_explicit(N, dx, D, k, dt, threshold=10.0, n_max=10**7, full_modes_limit=3000,
+                     max_modes=200):
+    """
+    Analiza stabilnosci jawnego schematu bez wykonywania krokow czasowych.
+
+    phi_n = phi_s + G**n (phi_0 - phi_s), a G = I + dt*A ma te same wektory
+    wlasne co A, wiec phi_n = phi_s + V (c * g**n), gdzie g = 1 + dt*mu,
+    c = V^T (phi_0 - phi_s). Pierwsze n z max|phi_n| > threshold szukamy
+    bezposrednio z tego wzoru. Dla N > full_modes_limit liczone sa tylko
+    wektory wlasne max_modes najbardziej niestabilnych modow (pozostale
+    rosna wolniej lub zanikaja), wiec wynik jest wtedy oszacowaniem.
+
+    Zwraca slownik:
+        rho       - promien spektralny macierzy kroku
+        stable    - czy rho <= 1
+        growth    - tempo wzrostu ln(rho) na krok
+        dt_max    - najwiekszy stabilny dt (dokladny, z widma)
+        dt_von_neumann - oszacowanie von Neumanna 2 / (4*D/dx**2 + k)
+        n_blowup  - przewidywana liczba krokow do przekroczenia progu
+                    (None gdy schemat stabilny)
+        t_blowup  - przewidywany czas przekroczenia progu
+    """
+    r = D / dx**2
+    main, off = _interior_operator(N)
+    lam_min = eigh_tridiagonal(main, off, eigvals_only=True,
+                               select='i', select_range=(0, 0))[0]
+    mu_min = r * lam_min - k
+    rho = max(abs(1.0 + dt * mu_min), abs(1.0 - dt * k))
+
+    report = {
+        'rho': rho,
+        'stable': rho <= 1.0,
+        'growth': float(np.log(rho)),
+        'dt_max': 2.0 / -mu_min,
+        'dt_von_neumann': 2.0 / (4 * D / dx**2 + k),
+        'n_blowup': None,
+        't_blowup': None,
+    }
+    if report['stable']:
+        return report
+
+    phi_s = _steady_interior(N, dx, D, k)
+    if N <= full_modes_limit:
+        lam, V = eigh_tridiagonal(main, off)
+    else:
+        # Tylko najbardziej niestabilne mody (najmniejsze lam)
+        lam, V = eigh_tridiagonal(main, off, select='i',
+                                  select_range=(0, min(max_modes, N - 2) - 1))
+    g = 1.0 + dt * (r * lam - k)
+    c = V.T @ -phi_s
+
+    unstable = np.abs(g) > 1.0
+    log_g = np.log(np.abs(g[unstable]))
+    sign = np.sign(g[unstable])
+    V_u, c_u = V[:, unstable], c[unstable]
+    V_s, c_s, g_s = V[:, ~unstable], c[~unstable], g[~unstable]
+
+    def peak(n):
+        phi = phi_s + V_u @ (c_u * np.exp(n * log_g) * sign**n)
+        if V_s.shape[1]:
+            phi += V_s @ (c_s * g_s**n)
+        return np.max(np.abs(phi)) - threshold
+
+    guess = np.log(threshold) / np.max(log_g)
+    n_blowup = _first_crossing(peak, int(guess), n_max)
+    if n_blowup is None:
+        return report
+
+    # ExplicitStepper startuje z phi[0] = 0, wiec pierwszy krok nie zmienia
+    # wnetrza - warunek Dirichleta dziala dopiero od drugiego kroku
+    report['n_blowup'] = n_blowup + 1
+    report['t_blowup'] = report['n_blowup'] * dt
+    return report
@@ -0,0 +1,295 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import LinearOperator, cg, splu
+
+
+class ThreadedMatvec:
+    """
+    Mnozenie macierz CSR - wektor w kilku watkach. Macierz jest dzielona na
+    bloki wierszy bez kopiowania danych (widoki na data/indices), a kazdy watek
+    liczy swoj fragment wyniku. scipy zwalnia GIL w mnozeniu CSR, wiec bloki
+    licza sie rownolegle.
+
+    Parametry:
+        A : sparse matrix
+            Macierz (konwertowana do CSR)
+        n_threads : int
+            Liczba watkow; 1 oznacza zwykle A @ x
+
+    Pula watkow zyje do wywolania close() (albo konca bloku with).
+    """
+
+    def __init__(self, A, n_threads=1):
+        A = sp.csr_matrix(A)
+        self.A = A
+        self.shape = A.shape
+        self.n_threads = n_threads
+        self.blocks = []
+        self._pool = None
+
+        if n_threads > 1:
+            bounds = np.linspace(0, A.shape[0], n_threads + 1).astype(int)
+            for a, b in zip(bounds[:-1], bounds[1:]):
+                start, stop = A.indptr[a], A.indptr[b]
+                block = sp.csr_matrix(
+                    (A.data[start:stop], A.indices[start:stop], A.indptr[a:b + 1] - start),
+                    shape=(b - a, A.shape[1]))
+                self.blocks.append((a, b, block))
+            self._pool = ThreadPoolExecutor(n_threads)
+
+    def __call__(self, x, out=None):
+        if out is None:
+            out = np.empty(self.shape[0])
+        if not self.blocks:
+            out[:] = self.A @ x
+            return out
+
+        def work(item):
+            a, b, block = item
+            out[a:b] = block @ x
+
+        list(self._pool.map(work, self.blocks))
+        return out
+
+    def close(self):
+        """Zamyka pule watkow (mnozenie dziala dalej, ale w jednym watku)"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _neighbour_pairs(shape):
+    """Pary sasiednich wezlow (indeksy plaskie) wzdluz kazdej osi"""
+    index = np.arange(np.prod(shape), dtype=np.int64).reshape(shape)
+    for axis in range(len(shape)):
+        lo = [slice(None)] * len(shape)
+        hi = [slice(None)] * len(shape)
+        lo[axis] = slice(0, -1)
+        hi[axis] = slice(1, None)
+        yield index[tuple(lo)].ravel(), index[tuple(hi)].ravel()
+
+
+def assemble_operator(shape, h, D, k, capillaries):
+    """
+    Sklada rzadka macierz A operatora D * laplasjan - k na wezlach tkanki
+    (bez kapilar) dla siatki 2-D lub 3-D o kroku h. Brzeg zewnetrzny ma zerowy
+    strumien (Neumann), kapilary sa wezlami Dirichleta z phi = 1.
+
+    Wezly kapilar sa eliminowane z ukladu, wiec A pozostaje symetryczna,
+    a ich wplyw trafia do wektora b: dphi/dt = A @ phi + b.
+
+    Parametry:
+        shape : tuple
+            Rozmiar siatki, np. (ny, nx) lub (nz, ny, nx)
+        h : float
+            Krok siatki [m]
+        D : float
+            Wspolczynnik dyfuzji [m2/s]
+        k : float
+            Stala szybkosci zuzycia [1/s]
+        capillaries : array
+            Maska bool o ksztalcie shape albo tablica wspolrzednych (n, ndim)
+
+    Zwraca:
+        A (CSR), b, free (plaskie indeksy wezlow tkanki)
+    """
+    shape = tuple(shape)
+    n_total = int(np.prod(shape))
+    is_cap = capillary_mask(shape, capillaries).ravel()
+
+    free = np.flatnonzero(~is_cap)
+    number_type = np.int32 if len(free) < 2**31 else np.int64
+    number = np.full(n_total, -1, dtype=number_type)
+    number[free] = np.arange(len(free), dtype=number_type)
+
+    c = D / h**2
+    n_neigh = np.zeros(n_total, dtype=np.int8)
+    b = np.zeros(len(free))
+    rows, cols = [], []
+
+    for p, q in _neighbour_pairs(shape):
+        n_neigh[p] += 1
+        n_neigh[q] += 1
+        ip, iq = number[p], number[q]
+        both = (ip >= 0) & (iq >= 0)
+        rows += [ip[both], iq[both]]
+        cols += [iq[both], ip[both]]
+        # Sasiad kapilara: c * phi_cap = c trafia do b
+        np.add.at(b, ip[(ip >= 0) & (iq < 0)], c)
+        np.add.at(b, iq[(iq >= 0) & (ip < 0)], c)
+        del p, q, ip, iq, both
+
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    data = np.full(len(rows), c)
+    off = sp.csr_matrix((data, (rows, cols)), shape=(len(free), len(free)))
+    del rows, cols, data
+
+    diag = -c * n_neigh[free].astype(float) - k
+    A = (off + sp.diags(diag, format='csr')).tocsr()
+    # indptr siega do nnz, wiec int32 tylko gdy miesci sie i liczba wezlow, i nnz
+    if len(free) < 2**31 and A.nnz < 2**31:
+        A.indices = A.indices.astype(np.int32, copy=False)
+        A.indptr = A.indptr.astype(np.int32, copy=False)
+    return A, b, free
+
+
+def capillary_mask(shape, capillaries):
+    """Maska bool kapilar z maski lub tablicy wspolrzednych wezlow"""
+    capillaries = np.asarray(capillaries)
+    if capillaries.dtype == bool:
+        return capillaries.reshape(shape)
+    mask = np.zeros(shape, dtype=bool)
+    mask[tuple(np.atleast_2d(capillaries).T)] = True
+    return mask
+
+
+def random_capillaries(shape, density, seed=0):
+    """Losowe rozmieszczenie kapilar - zwraca wspolrzedne (n, ndim)"""
+    rng = np.random.default_rng(seed)
+    n = max(1, int(density * np.prod(shape)))
+    flat = rng.choice(int(np.prod(shape)), size=n, replace=False)
+    return np.column_stack(np.unravel_index(flat, shape))
+
+
+class TissueModel:
+    """
+    Model dotlenienia tkanki 2-D/3-D z wieloma kapilarami:
+    dphi/dt = D * laplasjan(phi) - k * phi, phi = 1 w kapilarach,
+    zerowy strumien na brzegu, phi(t=0) = 0 w tkance.
+
+    Krok czasowy to schemat theta (1 - Euler wstecz, 0.5 - Crank-Nicolson):
+        (I - theta*dt*A) phi_new = (I + (1-theta)*dt*A) phi + dt*b
+
+    solver='direct' - rozklad LU liczony raz i uzywany w kazdym kroku
+                      (siatki 2-D do ~10^6 wezlow)
+    solver='cg'     - gradienty sprzezone z preconditionerem Jacobiego,
+                      start z poprzedniego kroku (duze siatki 3-D)
+
+    Parametry:
+        shape, h, D, k, capillaries : jak w assemble_operator
+        dt : float
+            Krok czasowy [s]
+        theta : float
+            Waga schematu
+        solver : str
+            'direct' lub 'cg'
+        n_threads : int
+            Liczba watkow mnozenia macierz-wektor
+        tol : float
+            Wzgledna tolerancja CG
+
+    Przy n_threads > 1 model trzeba zamknac (close() lub blok with),
+    zeby zwolnic pule watkow.
+    """
+
+    def __init__(self, shape, h, D, k, capillaries, dt, theta=1.0, solver='direct',
+                 n_threads=1, tol=1e-8):
+        if solver not in ('direct', 'cg'):
+            raise ValueError(f"Nieznany solver: {solver}")
+        self.shape = tuple(shape)
+        self.h = h
+        self.D = D
+        self.k = k
+        self.dt = dt
+        self.theta = theta
+        self.solver = solver
+        self.tol = tol
+
+        self.A, self.b, self.free = assemble_operator(shape, h, D, k, capillaries)
+        self.matvec = ThreadedMatvec(self.A, n_threads)
+        n = len(self.free)
+
+        if solver == 'direct':
+            M = sp.identity(n, format='csc') - theta * dt * self.A.tocsc()
+            self._lu = splu(M)
+        else:
+            self._M = LinearOperator((n, n), matvec=self._lhs_matvec, dtype=float)
+            diag = 1.0 - theta * dt * self.A.diagonal()
+            self._precond = LinearOperator((n, n), matvec=lambda v: v / diag, dtype=float)
+
+        self.phi = np.zeros(n)
+        self._Aphi = np.empty(n)
+        self._rhs = np.empty(n)
+        self.n = 0
+        self.cg_iterations = 0
+
+    def _lhs_matvec(self, v):
+        return v - self.theta * self.dt * self.matvec(v.ravel())
+
+    def step(self):
+        """Wykonuje jeden krok czasowy"""
+        rhs = self._rhs
+        if self.theta < 1.0:
+            self.matvec(self.phi, out=self._Aphi)
+            np.multiply((1 - self.theta) * self.dt, self._Aphi, out=rhs)
+            rhs += self.phi
+        else:
+            rhs[:] = self.phi
+        rhs += self.dt * self.b
+
+        if self.solver == 'direct':
+            self.phi = self._lu.solve(rhs)
+        else:
+            iterations = [0]
+
+            def count(_):
+                iterations[0] += 1
+
+            phi, info = cg(self._M, rhs, x0=self.phi, rtol=self.tol,
+                           M=self._precond, callback=count)
+            if info != 0:
+                raise RuntimeError(f"CG nie zbiegl w {info} iteracjach" if info > 0 else
+                                   f"CG: niepoprawne dane lub zalamanie metody (info={info})")
+            self.phi = phi
+            self.cg_iterations += iterations[0]
+        self.n += 1
+        return self.phi
+
+    def run(self, n_steps):
+        for _ in range(n_steps):
+            self.step()
+        return self.phi
+
+    def steady_state(self):
+        """Stan ustalony: -A @ phi = b"""
+        if self.solver == 'direct':
+            return splu((-self.A).tocsc()).solve(self.b)
+        n = len(self.free)
+        op = LinearOperator((n, n), matvec=lambda v: -self.matvec(v.ravel()), dtype=float)
+        diag = -self.A.diagonal()
+        precond = LinearOperator((n, n), matvec=lambda v: v / diag, dtype=float)
+        phi, info = cg(op, self.b, x0=self.phi, rtol=self.tol, M=precond)
+        if info != 0:
+            raise RuntimeError(f"CG nie zbiegl w {info} iteracjach" if info > 0 else
+                               f"CG: niepoprawne dane lub zalamanie metody (info={info})")
+        return phi
+
+    def full(self, phi=None):
+        """Pole phi na calej siatce (kapilary = 1)"""
+        grid = np.ones(int(np.prod(self.shape)))
+        grid[self.free] = self.phi if phi is None else phi
+        return grid.reshape(self.shape)
+
+    @property
+    def t(self):
+        return self.n * self.dt
+
+    def close(self):
+        """Zwalnia pule watkow mnozenia macierz-wektor"""
+        self.matvec.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
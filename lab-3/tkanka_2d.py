@@ -0,0 +1,55 @@
+import time
+
+import numpy as np
+import matplotlib.pyplot as plt
+from tissue import TissueModel, random_capillaries
+
+# Parametry - tkanka 2-D z losowo rozmieszczonymi kapilarami
+L = 300e-6
+n = 300
+h = L / (n - 1)
+D = 2.0e-9
+k = 2.068e-3
+dt = 0.5            # schemat niejawny - dt nie jest ograniczone przez h**2/(2D)
+t_end = 60.0
+
+shape = (n, n)
+capillaries = random_capillaries(shape, density=2e-4, seed=1)
+
+print("=" * 60)
+print(f"Siatka {shape}, h = {h*1e6:.2f} um, kapilar: {len(capillaries)}")
+print(f"D = {D:.2e} m2/s, k = {k:.4e} 1/s, dt = {dt} s")
+print("=" * 60)
+
+start = time.perf_counter()
+with TissueModel(shape, h, D, k, capillaries, dt=dt, theta=1.0, solver='direct') as model:
+    print(f"Skladanie macierzy i rozklad LU: {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    n_steps = int(round(t_end / dt))
+    model.run(n_steps)
+    print(f"{n_steps} krokow: {time.perf_counter() - start:.2f} s")
+
+    phi_t = model.full()
+    steady = model.steady_state()
+    phi_steady = model.full(steady)
+
+hypoxic = np.mean(steady < 0.1) * 100
+print(f"Stan ustalony: srednie phi = {steady.mean():.3f}, "
+      f"obszar phi < 0.1: {hypoxic:.1f}% tkanki")
+
+# WYKRESY
+fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+extent = [0, L * 1e6, 0, L * 1e6]
+
+for ax, field, title in [(ax1, phi_t, f't = {model.t:.0f} s'),
+                         (ax2, phi_steady, 'Stan ustalony')]:
+    im = ax.imshow(field, origin='lower', extent=extent, cmap='viridis', vmin=0, vmax=1)
+    ax.plot(capillaries[:, 1] * h * 1e6, capillaries[:, 0] * h * 1e6, 'r.', markersize=4)
+    ax.set_xlabel('x [μm]', fontsize=13, fontweight='bold')
+    ax.set_ylabel('y [μm]', fontsize=13, fontweight='bold')
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    fig.colorbar(im, ax=ax, label='φ [-]')
+
+plt.tight_layout()
+plt.show()
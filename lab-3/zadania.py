@@ -1,5 +1,10 @@
+from contextlib import nullcontext
+
 import numpy as np
 import matplotlib.pyplot as plt
+from solver import make_stepper, run_t95
+from spectral import SpectralSolution
+from recorder import SnapshotRecorder
 
 # Parametry
 L, N = 300e-6, 300 
@@ -9,10 +14,21 @@ target_x = 100e-6
 idx = np.argmin(np.abs(x - target_x))
 k = 2.068e-3  # Indeks 264068
 
+# Schemat czasowy: 'explicit', 'be' (Euler wstecz) lub 'cn' (Crank-Nicolson)
+# Dla 'be'/'cn' dt_factor moze byc duzo wiekszy od 1 (schemat bezwzglednie stabilny)
+scheme = 'explicit'
+dt_factor = 0.4
+record_every = max(1, round(1000 * 0.4 / dt_factor))
+
+# Zapis pelnych profili phi do plikow .npy (None - bez zapisu)
+snapshot_dir = None
+snapshot_dtype = np.float32
+
 print("=" * 60)
 print(f"L = {L*1e6:.0f} um, N = {N} punktow")
 print(f"k = {k:.4e} 1/s")
 print(f"x = {target_x*1e6:.0f} um")
+print(f"Schemat: {scheme}, dt = {dt_factor} * dt_max")
 print("=" * 60)
 
 results = []
@@ -20,7 +36,7 @@ results = []
 for D in [1.5e-9, 2.0e-9, 2.5e-9]:
     # Warunek stabilnosci
     dt_max = (dx**2) / (2 * D)
-    dt = 0.4 * dt_max
+    dt = dt_factor * dt_max
     
     print(f"\n--- D = {D:.2e} m2/s ---")
     print(f"dt_max = {dt_max:.4e} s, dt = {dt:.4e} s")
@@ -34,40 +50,35 @@ for D in [1.5e-9, 2.0e-9, 2.5e-9]:
     print(f"Stan ustalony w x={target_x*1e6:.0f}um: {phi_steady_target:.4f}")
     print(f"Prog 95%: {threshold:.4f}")
     
-    # Inicjalizacja
-    phi = np.zeros(N)
-    reached = None
-    t_history = []
-    phi_history = []
-    
-    # Petla czasowa
-    for n in range(500000):
-        if n % 1000 == 0:
-            t_history.append(n * dt)
-            phi_history.append(phi[idx])
-            
-        # Schemat roznic skonczonych
-        phi_new = phi.copy()
-        for i in range(1, N-1):
-            d2phi_dx2 = (phi[i+1] - 2*phi[i] + phi[i-1]) / (dx**2)
-            phi_new[i] = phi[i] + dt * (D * d2phi_dx2 - k * phi[i])
-        
-        phi = phi_new
-        phi[0] = 1.0         # Dirichlet
-        phi[-1] = phi[-2]    # Neumann
-        
-        # 95%
-        if reached is None and phi[idx] >= threshold:
-            reached = n * dt
-            print(f"Osiagnieto 95% w t = {reached:.3f} s")
-            break
-            
-    if reached is None:
+    # Petla czasowa (zwektoryzowany schemat roznic skonczonych)
+    stepper = make_stepper(N, dx, D, k, dt, scheme)
+    if snapshot_dir is not None:
+        snapshots = SnapshotRecorder(f"{snapshot_dir}/phi_D{D:.1e}.npy", N,
+                                     max_snapshots=500000 // record_every + 1,
+                                     stride=record_every, dtype=snapshot_dtype)
+    else:
+        snapshots = nullcontext()
+    with snapshots as recorder:
+        reached, t_history, phi_history = run_t95(stepper, idx, threshold,
+                                                  record_every=record_every,
+                                                  recorder=recorder)
+
+    # 95%
+    if reached is not None:
+        print(f"Osiagnieto 95% w t = {reached:.3f} s")
+    else:
         print(f"Nie osiagnieto 95%")
+
+    # Kontrola: rozwiazanie szeregiem funkcji wlasnych (bez krokow czasowych)
+    t_95_spectral = SpectralSolution(L, D, k).t95(x[idx])
+    print(f"Szereg funkcji wlasnych: t_95% = {t_95_spectral:.3f} s")
+    if reached is not None:
+        print(f"Roznica MRS - szereg: {reached - t_95_spectral:+.3f} s")
         
     results.append({
         'D': D,
         't_95': reached,
+        't_95_spectral': t_95_spectral,
         't_history': t_history,
         'phi_history': phi_history,
         'threshold': threshold
@@ -0,0 +1,161 @@
+import time
+
+import numpy as np
+from scipy.integrate import solve_ivp
+from scipy.optimize import least_squares
+
+from cascade import RATE_DEFAULTS, _half_event, _jacobian, _rhs
+
+PARAMS = ('L', 'k_on', 'k_off', 'k_cat', 'kdegK', 'kact', 'kdegE')
+DEFAULTS = {'L': 10.0, **RATE_DEFAULTS}
+
+
+def _augmented_rhs(p, free):
+    """
+    Uklad rozszerzony: stan y = (R, K, E) i macierz wrazliwosci S = dy/dp
+    (3 x P) dla parametrow `free`:  S' = J S + df/dp.
+    """
+    L, k_on, k_off, k_cat = p['L'], p['k_on'], p['k_off'], p['k_cat']
+    kdegK, kact, kdegE = p['kdegK'], p['kact'], p['kdegE']
+    rhs = _rhs(L, k_on, k_off, k_cat, kdegK, kact, kdegE)
+    jac = _jacobian(L, k_on, k_off, k_cat, kdegK, kact, kdegE)
+    P = len(free)
+
+    def f(t, z):
+        R, K, E = z[:3]
+        S = z[3:].reshape(3, P)
+        dy = rhs(t, z[:3])
+        J = jac(t, z[:3])
+        df = {'L': (0, k_on * (1 - R)), 'k_on': (0, L * (1 - R)), 'k_off': (0, -R),
+              'k_cat': (1, R * (1 - K)), 'kdegK': (1, -K),
+              'kact': (2, K * (1 - E)), 'kdegE': (2, -E)}
+        dS = J @ S
+        for j, name in enumerate(free):
+            row, value = df[name]
+            dS[row, j] += value
+        return np.concatenate([dy, dS.ravel()])
+
+    return f
+
+
+def t_half_sensitivity(params, free=('k_cat', 'k_off'), t_max=600, rtol=1e-8, atol=1e-10):
+    """
+    t1/2 i jego gradient wzgledem parametrow `free` z jednego calkowania.
+    W chwili przeciecia E(t1/2; p) = 0.5, wiec z twierdzenia o funkcji
+    uwiklanej:  dt1/2/dp = -S_E(t1/2) / E'(t1/2).
+
+    Parametry:
+        params : dict
+            Wartosci parametrow (brakujace biora wartosci z DEFAULTS)
+        free : tuple
+            Nazwy parametrow, wzgledem ktorych liczony jest gradient
+        t_max : float
+            Koniec calkowania [s]
+
+    Zwraca (t_half, grad, E_end): gdy E* nie osiaga 0.5 do t_max,
+    t_half = None, a grad to dE(t_max)/dp.
+    """
+    p = {**DEFAULTS, **params}
+    P = len(free)
+    f = _augmented_rhs(p, free)
+    sol = solve_ivp(f, [0, t_max], np.zeros(3 + 3 * P), events=_half_event,
+                    rtol=rtol, atol=atol)
+    z = sol.y[:, -1]
+    S_E = z[3:].reshape(3, P)[2]
+    if sol.t_events[0].size > 0:
+        t_half = sol.t_events[0][0]
+        dE = f(t_half, z)[2]
+        return t_half, -S_E / dE, z[2]
+    else:
+        return None, S_E, z[2]
+
+
+def state_sensitivity(params, free=('k_cat', 'k_off'), t_end=120, rtol=1e-8, atol=1e-10):
+    """E(t_end) i gradient dE(t_end)/dp wzgledem parametrow `free`"""
+    p = {**DEFAULTS, **params}
+    P = len(free)
+    sol = solve_ivp(_augmented_rhs(p, free), [0, t_end], np.zeros(3 + 3 * P),
+                    rtol=rtol, atol=atol)
+    z = sol.y[:, -1]
+    return z[2], z[3:].reshape(3, P)[2]
+
+
+def calibrate_t_half(target_t_half, params=None, free=('k_cat', 'k_off'), x0=None,
+                     bounds=(1e-4, 10.0), t_max=600, tol=1e-10, max_solves=100):
+    """
+    Dobiera parametry `free` tak, zeby t1/2 = target_t_half (ograniczone
+    najmniejsze kwadraty, metoda 'trf', w zmiennych log p). Jakobian pochodzi
+    z rownan wrazliwosci, wiec kazda iteracja to jedno calkowanie.
+
+    Kaskada startujaca z zera jest monotoniczna (R, K, E rosna), wiec
+    t1/2 = T  <=>  E(T) = 0.5. Residuum E(target) - 0.5 jest gladkie, a samo
+    t1/2 przy E* bliskim 0.5 zmienia sie o rzedy wielkosci przy minimalnej
+    zmianie parametrow - dopasowanie wprost w t1/2 jest zle uwarunkowane.
+    Gradient t1/2 (t_half_sensitivity) jest raportowany w punkcie wyniku.
+
+    Parametry:
+        target_t_half : float
+            Docelowe t1/2 [s]
+        params : dict
+            Wartosci parametrow ustalonych (domyslnie DEFAULTS)
+        free : tuple
+            Dowolny podzbior PARAMS dopasowywany przez kalibracje
+        x0 : dict
+            Punkt startowy dla parametrow free (domyslnie z params/DEFAULTS)
+        bounds : tuple lub dict
+            (dolne, gorne) dla wszystkich parametrow albo {nazwa: (dolne, gorne)}
+
+    Zwraca slownik: params (wszystkie parametry), t_half, error, grad
+    (dt1/2/dp dla free), n_solves (liczba calkowan, z koncowa weryfikacja),
+    wall_time, success, message.
+    """
+    unknown = set(free) - set(PARAMS)
+    if unknown:
+        raise ValueError(f"Nieznane parametry: {sorted(unknown)}")
+    base = {**DEFAULTS, **(params or {})}
+    start = {**base, **(x0 or {})}
+    if isinstance(bounds, dict):
+        lo = np.array([bounds[name][0] for name in free])
+        hi = np.array([bounds[name][1] for name in free])
+    else:
+        lo = np.full(len(free), bounds[0])
+        hi = np.full(len(free), bounds[1])
+
+    n_solves = 0
+    cache = {}
+
+    def evaluate(x):
+        # residuum i jakobian z tego samego calkowania
+        nonlocal n_solves
+        key = x.tobytes()
+        if key not in cache:
+            n_solves += 1
+            values = np.exp(x)
+            p = {**base, **dict(zip(free, values))}
+            E, grad = state_sensitivity(p, free, target_t_half)
+            cache.clear()
+            cache[key] = (np.array([E - 0.5]), (grad * values)[None, :])
+        return cache[key]
+
+    t0 = time.perf_counter()
+    x_start = np.log(np.clip([start[name] for name in free], lo, hi))
+    result = least_squares(lambda x: evaluate(x)[0], x_start, jac=lambda x: evaluate(x)[1],
+                           bounds=(np.log(lo), np.log(hi)), method='trf',
+                           xtol=tol, ftol=tol, gtol=tol, max_nfev=max_solves)
+
+    fitted = {**base, **dict(zip(free, np.exp(result.x)))}
+    t_half, grad, _ = t_half_sensitivity(fitted, free, t_max)
+    n_solves += 1
+    wall_time = time.perf_counter() - t0
+
+    error = None if t_half is None else t_half - target_t_half
+    return {
+        'params': fitted,
+        't_half': t_half,
+        'error': error,
+        'grad': dict(zip(free, grad)) if t_half is not None else None,
+        'n_solves': n_solves,
+        'wall_time': wall_time,
+        'success': error is not None and abs(error) <= 1e-3 * target_t_half,
+        'message': result.message,
+    }
@@ -0,0 +1,254 @@
+from scipy.integrate import solve_ivp
+import numpy as np
+
+
+# Domyslne stale szybkosci [1/s] - jedno zrodlo dla sygnatur funkcji ponizej
+# i calibration.DEFAULTS
+RATE_DEFAULTS = {'k_on': 1.0, 'k_off': 0.2, 'k_cat': 0.5, 'kdegK': 0.3, 'kact': 0.8, 'kdegE': 0.2}
+_D = RATE_DEFAULTS
+
+
+def _rhs(L, k_on, k_off, k_cat, kdegK, kact, kdegE):
+    def f(t, y):
+        R, K, E = y
+        dR = k_on * L * (1 - R) - k_off * R
+        dK = k_cat * R * (1 - K) - kdegK * K
+        dE = kact * K * (1 - E) - kdegE * E
+        return [dR, dK, dE]
+    return f
+
+
+def _jacobian(L, k_on, k_off, k_cat, kdegK, kact, kdegE):
+    def jac(t, y):
+        R, K, E = y
+        return np.array([[-k_on * L - k_off, 0.0, 0.0],
+                         [k_cat * (1 - K), -k_cat * R - kdegK, 0.0],
+                         [0.0, kact * (1 - E), -kact * K - kdegE]])
+    return jac
+
+
+# Ustawienia solve_ivp dla kazdej metody. RK45 - jak dotad (max_step=0.1);
+# metody niejawne dostaja jakobian analityczny, krok dobiera solver, a
+# tolerancje daja dokladnosc porownywalna z RK45 (~1e-6 w E, patrz
+# porownanie_solwerow.py). Slownik wchodzi tez do klucza cache w lab4.py.
+SOLVER_DEFAULTS = {
+    'RK45': {'max_step': 0.1},
+    'Radau': {'rtol': 1e-6, 'atol': 1e-9},
+    'BDF': {'rtol': 1e-6, 'atol': 1e-9},
+    'LSODA': {'rtol': 1e-6, 'atol': 1e-9},
+}
+STIFF_METHODS = ('Radau', 'BDF', 'LSODA')
+
+
+def solve(L, k_on=_D['k_on'], k_off=_D['k_off'], k_cat=_D['k_cat'], kdegK=_D['kdegK'],
+          kact=_D['kact'], kdegE=_D['kdegE'], t_max=600, method='RK45', **options):
+    """
+    solve_ivp dla kaskady z ustawieniami z SOLVER_DEFAULTS; dla metod
+    niejawnych z jakobianem analitycznym. options nadpisuja ustawienia.
+    """
+    f = _rhs(L, k_on, k_off, k_cat, kdegK, kact, kdegE)
+    settings = dict(SOLVER_DEFAULTS.get(method, {}))
+    if method in STIFF_METHODS:
+        settings['jac'] = _jacobian(L, k_on, k_off, k_cat, kdegK, kact, kdegE)
+    settings.update(options)
+    return solve_ivp(f, [0, t_max], [0, 0, 0], method=method, **settings)
+
+
+def simulate(L, k_on=_D['k_on'], k_off=_D['k_off'], k_cat=_D['k_cat'], kdegK=_D['kdegK'],
+             kact=_D['kact'], kdegE=_D['kdegE'], t_max=600, method='RK45'):
+    sol = solve(L, k_on, k_off, k_cat, kdegK, kact, kdegE, t_max, method, dense_output=True)
+    t = np.linspace(0, t_max, int(t_max * 10))
+    R, K, E = sol.sol(t)
+    return t, R, K, E
+
+
+def steady_state(L, k_on=_D['k_on'], k_off=_D['k_off'], k_cat=_D['k_cat'], kdegK=_D['kdegK'],
+                 kact=_D['kact'], kdegE=_D['kdegE']):
+    """Stan ustalony (R*, K*, E*) w postaci zamknietej - kazdy etap to rownowaga liniowa"""
+    R = k_on * L / (k_on * L + k_off)
+    K = k_cat * R / (k_cat * R + kdegK)
+    E = kact * K / (kact * K + kdegE)
+    return R, K, E
+
+
+def calculate_t_half(t, E):
+    """Oblicza czas osiągnięcia E* = 0.5"""
+    idx = np.where(E >= 0.5)[0]
+    if len(idx) > 0:
+        return t[idx[0]]
+    else:
+        return 999.9
+
+
+def _half_event(t, y):
+    return y[2] - 0.5
+
+
+_half_event.terminal = True
+_half_event.direction = 1
+
+
+# Tryby bez gestego wyjscia (t1/2, stan koncowy): bez limitu kroku z SOLVER_DEFAULTS
+# dla RK45 - krok dobiera solver - i z tolerancjami metod niejawnych
+EVENT_OPTIONS = {'max_step': np.inf, 'rtol': 1e-6, 'atol': 1e-9}
+
+
+def simulate_t_half(L, k_on=_D['k_on'], k_off=_D['k_off'], k_cat=_D['k_cat'], kdegK=_D['kdegK'],
+                    kact=_D['kact'], kdegE=_D['kdegE'], t_max=600, method='RK45', **options):
+    """
+    Oblicza t1/2 (E* = 0.5) zdarzeniem w solve_ivp: calkowanie konczy sie
+    w chwili przeciecia E - 0.5 = 0, a czas jest dokladnym pierwiastkiem,
+    a nie punktem siatki co 0.1 s. Ustawienia jak w solve() z EVENT_OPTIONS
+    (options nadpisuja oba). Zwraca 999.9, gdy E* nie osiaga 0.5 do t_max
+    (jak calculate_t_half).
+    """
+    sol = solve(L, k_on, k_off, k_cat, kdegK, kact, kdegE, t_max, method,
+                events=_half_event, **{**EVENT_OPTIONS, **options})
+    if sol.t_events[0].size > 0:
+        return sol.t_events[0][0]
+    else:
+        return 999.9
+
+
+def simulate_final(L, k_on=_D['k_on'], k_off=_D['k_off'], k_cat=_D['k_cat'], kdegK=_D['kdegK'],
+                   kact=_D['kact'], kdegE=_D['kdegE'], t_max=600, method='RK45', **options):
+    """Stan (R*, K*, E*) w chwili t_max - solve() z EVENT_OPTIONS, bez gestego wyjscia"""
+    sol = solve(L, k_on, k_off, k_cat, kdegK, kact, kdegE, t_max, method,
+                **{**EVENT_OPTIONS, **options})
+    R, K, E = sol.y[:, -1]
+    return R, K, E
+
+
+def simulate_ensemble(L, k_on=_D['k_on'], k_off=_D['k_off'], k_cat=_D['k_cat'],
+                      kdegK=_D['kdegK'], kact=_D['kact'], kdegE=_D['kdegE'], t_max=600,
+                      max_step=0.1, rtol=1e-3, atol=1e-6):
+    """
+    Symuluje wiele zestawow parametrow w jednym wywolaniu solve_ivp.
+    Kazdy parametr moze byc liczba albo tablica - wszystkie sa rozglaszane
+    do wspolnego ksztaltu (M,). Stan ma postac (3, M) splaszczona do 3*M,
+    a prawa strona liczy pochodne calego zespolu naraz.
+
+    Uwaga: krok calkowania jest wspolny dla calego zespolu, a blad jest
+    kontrolowany normą po wszystkich skladowych.
+
+    Zwraca t (nt,), R, K, E (M, nt) oraz t_half (M,) - jak calculate_t_half.
+    """
+    L, k_on, k_off, k_cat, kdegK, kact, kdegE = np.broadcast_arrays(
+        *[np.atleast_1d(np.asarray(p, dtype=float))
+          for p in (L, k_on, k_off, k_cat, kdegK, kact, kdegE)])
+    M = L.shape[0]
+    k_bind = k_on * L
+
+    def f(t, y):
+        R, K, E = y.reshape(3, M)
+        dy = np.empty((3, M))
+        dy[0] = k_bind * (1 - R) - k_off * R
+        dy[1] = k_cat * R * (1 - K) - kdegK * K
+        dy[2] = kact * K * (1 - E) - kdegE * E
+        return dy.ravel()
+
+    sol = solve_ivp(f, [0, t_max], np.zeros(3 * M), max_step=max_step,
+                    rtol=rtol, atol=atol, dense_output=True)
+    t = np.linspace(0, t_max, int(t_max * 10))
+    R, K, E = sol.sol(t).reshape(3, M, -1)
+
+    reached = E >= 0.5
+    first = np.argmax(reached, axis=1)
+    t_half = np.where(reached.any(axis=1), t[first], 999.9)
+    return t, R, K, E, t_half
+
+
+def _etd_weights(z):
+    """
+    g1 = (1 - e^-z)/z oraz g2 = (1 - e^-z (1 + z))/z**2; dla malych |z|
+    szereg Taylora (unika utraty cyfr przy odejmowaniu).
+    """
+    em1 = -np.expm1(-z)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        g1 = em1 / z
+        g2 = (em1 - z * (1 - em1)) / (z * z)
+    small = np.abs(z) < 1e-2
+    if small.any():
+        zs = z[small]
+        g1[small] = 1 - zs * (1 / 2 - zs * (1 / 6 - zs / 24))
+        g2[small] = 1 / 2 - zs * (1 / 3 - zs * (1 / 8 - zs / 30))
+    return g1, g2
+
+
+def _linear_stage(I, dP):
+    """
+    Rozwiazuje etap y' = q(t) - p(t) y, y(0) = 0 (q >= 0 - sygnal
+    z poprzedniego etapu) calkowaniem wykladniczym (ETD):
+        y_{j+1} = y_j e^{-dP_j} + I_j,
+    gdzie dP_j - calka p po przedziale j, I_j - wklad q z przedzialu
+    (obie tablice (M, n-1)). Cala rekurencja to jedna suma skumulowana
+    w skali logarytmicznej: y_n = sum_j exp(-(P_n - P_{j+1})) I_j,
+    bez petli i bez przepelnienia exp(P).
+    """
+    P = np.cumsum(dP, axis=1)
+    # I moze byc ujemne o blad zaokraglenia (rzedu eps) - log(0) = -inf
+    with np.errstate(divide='ignore', invalid='ignore'):
+        acc = np.logaddexp.accumulate(P + np.log(np.maximum(I, 0)), axis=1)
+    y = np.zeros((dP.shape[0], dP.shape[1] + 1))
+    y[:, 1:] = np.exp(acc - P)
+    return y
+
+
+def semi_analytic(t, L, k_on=_D['k_on'], k_off=_D['k_off'], k_cat=_D['k_cat'],
+                  kdegK=_D['kdegK'], kact=_D['kact'], kdegE=_D['kdegE']):
+    """
+    Rozwiazanie kaskady na rownomiernej siatce t wykorzystujace jej
+    trojkatna strukture:
+        R(t) = R_inf (1 - e^{-a t}),  a = k_on L + k_off  (dokladnie),
+        K, E - etapy liniowe napedzane poprzednim etapem (_linear_stage).
+    Dla K wymuszenie k_cat R(t) jest calkowane dokladnie (suma dwoch
+    wykladnikow), wiec szybki narost R przy duzym L nie psuje wyniku;
+    dla E sygnal kact K jest liniowy na przedziale, a calka p_E = kact K + kdegE
+    liczona metoda trapezow - blad O(h**2).
+
+    Parametry moga byc liczbami albo tablicami (rozglaszane do (M,)).
+    Zwraca R, K, E o ksztalcie (M, len(t)).
+    """
+    L, k_on, k_off, k_cat, kdegK, kact, kdegE = [
+        a[:, None] for a in np.broadcast_arrays(
+            *[np.atleast_1d(np.asarray(p, dtype=float))
+              for p in (L, k_on, k_off, k_cat, kdegK, kact, kdegE)])]
+    h = t[1] - t[0]
+
+    a = k_on * L + k_off
+    R_inf = k_on * L / a
+    decay = np.exp(-a * t)
+    R = R_inf * (1 - decay)
+
+    # Dokladna calka k_cat * R po przedziale
+    int_R = R_inf * (h - (decay[:, :-1] - decay[:, 1:]) / a)
+    dP = k_cat * int_R + kdegK * h
+    # q = Q (1 - e^{-a s}) wzgledem konca przedzialu: Q h [g1(z) - e^{-a t_{j+1}} g1(z - a h)]
+    Q = k_cat * R_inf
+    g1, _ = _etd_weights(dP)
+    g1_a, _ = _etd_weights(dP - a * h)
+    K = _linear_stage(Q * h * (g1 - decay[:, 1:] * g1_a), dP)
+
+    q = kact * K
+    dP = 0.5 * h * (q[:, :-1] + q[:, 1:]) + kdegE * h
+    g1, g2 = _etd_weights(dP)
+    E = _linear_stage(h * (q[:, 1:] * (g1 - g2) + q[:, :-1] * g2), dP)
+    return R, K, E
+
+
+def simulate_semi_analytic(L, k_on=_D['k_on'], k_off=_D['k_off'], k_cat=_D['k_cat'],
+                           kdegK=_D['kdegK'], kact=_D['kact'], kdegE=_D['kdegE'], t_max=600,
+                           refine=4):
+    """
+    Zamiennik simulate() (ta sama siatka wyjsciowa) oparty na semi_analytic.
+    refine - zageszczenie siatki wewnetrznej wzgledem wyjsciowej.
+    Skalarne parametry daja R, K, E (nt,), tablicowe - (M, nt) jak
+    simulate_ensemble.
+    """
+    t = np.linspace(0, t_max, int(t_max * 10))
+    t_fine = np.linspace(0, t_max, (len(t) - 1) * refine + 1)
+    R, K, E = [y[:, ::refine] for y in
+               semi_analytic(t_fine, L, k_on, k_off, k_cat, kdegK, kact, kdegE)]
+    if all(np.ndim(p) == 0 for p in (L, k_on, k_off, k_cat, kdegK, kact, kdegE)):
+        return t, R[0], K[0], E[0]
+    return t, R, K, E
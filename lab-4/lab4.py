@@ -1,69 +1,18 @@
-from scipy.integrate import solve_ivp
+import os
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+import cascade
+from cascade import calculate_t_half, simulate_semi_analytic
+from calibration import calibrate_t_half
+from sim_cache import SimulationCache
+from sweep import metric_t_half, run_sweep
+from surface import dose_response_surface
 
-def simulate(L, k_on=1.0, k_off=0.2, k_cat=0.5, kdegK=0.3, kact=0.8, kdegE=0.2, t_max=600):
-    def f(t, y):
-        R, K, E = y
-        dR = k_on * L * (1 - R) - k_off * R
-        dK = k_cat * R * (1 - K) - kdegK * K
-        dE = kact * K * (1 - E) - kdegE * E
-        return [dR, dK, dE]
-
-    sol = solve_ivp(f, [0, t_max], [0, 0, 0], max_step=0.1, dense_output=True)
-    t = np.linspace(0, t_max, int(t_max * 10))
-    R, K, E = sol.sol(t)
-    return t, R, K, E
-
-def calculate_t_half(t, E):
-    """Oblicza czas osiągnięcia E* = 0.5"""
-    idx = np.where(E >= 0.5)[0]
-    if len(idx) > 0:
-        return t[idx[0]]
-    else:
-        return 999.9
-
-
-def find_optimal_params(L, target_t_half=120, tolerance=5):
-    """Znajduje optymalne parametry dla zadanego t_1/2"""
-    best_params = None
-    best_error = float('inf')
-
-    for k_cat in np.linspace(0.01, 0.15, 30):
-        for k_off in np.linspace(0.2, 1.0, 20):
-            t, R, K, E = simulate(L, k_cat=k_cat, k_off=k_off, t_max=250)
-            t_h = calculate_t_half(t, E)
-
-            if t_h < 999:
-                error = abs(t_h - target_t_half)
-                if error < best_error:
-                    best_error = error
-                    best_params = {'k_cat': k_cat, 'k_off': k_off, 't_half': t_h}
-
-                    if error < tolerance:
-                        print(f"Znaleziono: k_cat={k_cat:.4f}, k_off={k_off:.3f}, t₁/₂={t_h:.1f}s")
-                        return best_params
-
-    if best_params and best_error < 20:
-        k_cat_center = best_params['k_cat']
-        k_off_center = best_params['k_off']
-
-        for k_cat in np.linspace(max(0.01, k_cat_center - 0.02), k_cat_center + 0.02, 20):
-            for k_off in np.linspace(max(0.2, k_off_center - 0.2), min(1.0, k_off_center + 0.2), 15):
-                t, R, K, E = simulate(L, k_cat=k_cat, k_off=k_off, t_max=250)
-                t_h = calculate_t_half(t, E)
-
-                if t_h < 999:
-                    error = abs(t_h - target_t_half)
-                    if error < best_error:
-                        best_error = error
-                        best_params = {'k_cat': k_cat, 'k_off': k_off, 't_half': t_h}
-
-    if best_params:
-        print(
-            f"Najlepsze: k_cat={best_params['k_cat']:.4f}, k_off={best_params['k_off']:.3f}, t₁/₂={best_params['t_half']:.1f}s (błąd: {best_error:.1f}s)")
-
-    return best_params
+# Wyniki symulacji zapamietywane miedzy uruchomieniami skryptu
+cache = SimulationCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.sim_cache'))
+simulate = cache.wrap(cascade.simulate, {'solver': cascade.SOLVER_DEFAULTS})
+simulate_ensemble = cache.wrap(cascade.simulate_ensemble, {'method': 'RK45'})
 
 
 print("ZADANIE 1")
@@ -151,15 +100,23 @@ print()
 print("ZADANIE ZALICZENIOWE")
 print("=" * 60)
 
-# Automatyczne znajdowanie optymalnych parametrów
-optimal = find_optimal_params(L=10, target_t_half=120, tolerance=5)
+# Kalibracja k_cat, k_off (najmniejsze kwadraty z rownaniami wrazliwosci)
+optimal = calibrate_t_half(120, params={'L': 10}, free=('k_cat', 'k_off'),
+                           x0={'k_cat': 0.08, 'k_off': 0.6})
+k_cat_opt = optimal['params']['k_cat']
+k_off_opt = optimal['params']['k_off']
 
-if optimal:
-    print(f"k_cat = {optimal['k_cat']:.4f}")
-    print(f"k_off = {optimal['k_off']:.4f}")
+print(f"k_cat = {k_cat_opt:.4f}")
+print(f"k_off = {k_off_opt:.4f}")
+if optimal['success']:
     print(f"t1/2 = {optimal['t_half']:.1f}s")
-    k_cat_opt = optimal['k_cat']
-    k_off_opt = optimal['k_off']
+else:
+    # Wszystkie etapy relaksuja w ~5 s, wiec t1/2 = 120 s wymagaloby E* = 0.5
+    # z dokladnoscia ~exp(-24) - cel poza zasiegiem samych k_cat i k_off
+    _, _, E_120 = cascade.simulate_final(L=10, k_cat=k_cat_opt, k_off=k_off_opt, t_max=120)
+    _, _, E_inf = cascade.steady_state(L=10, k_cat=k_cat_opt, k_off=k_off_opt)
+    print(f"Cel nieosiagalny przez k_cat, k_off: E(120s) = {E_120:.6f}, E*(inf) = {E_inf:.6f}")
+print(f"Calkowania: {optimal['n_solves']}, czas: {optimal['wall_time']:.2f}s")
 
 # Symulacje
 t_opt, R_opt, K_opt, E_opt = simulate(L=10, k_cat=k_cat_opt, k_off=k_off_opt, t_max=300)
@@ -173,7 +130,11 @@ fig, axes = plt.subplots(2, 2, figsize=(14, 10))
 
 ax1 = axes[0, 0]
 ax1.plot(t_base, E_base, label=f'Bazowe (t₁/₂={t_half_base:.1f}s)', linewidth=2, color='blue')
-ax1.plot(t_opt, E_opt, label=f'Zoptymalizowane (t₁/₂={t_half_opt:.1f}s)', linewidth=2, color='red')
+if optimal['success']:
+    label_opt = f'Zoptymalizowane (t₁/₂={t_half_opt:.1f}s)'
+else:
+    label_opt = f'Kalibracja nieudana (E*(∞)={E_inf:.4f})'
+ax1.plot(t_opt, E_opt, label=label_opt, linewidth=2, color='red')
 ax1.axhline(y=0.5, color='gray', linestyle='--', alpha=0.5)
 ax1.axvline(x=120, color='green', linestyle=':', alpha=0.5, label='Cel: 120s')
 ax1.set_xlabel('Czas [s]', fontsize=11)
@@ -187,47 +148,41 @@ ax2 = axes[0, 1]
 ax2.plot(t_opt, R_opt, label='R* (Receptor)', linewidth=2)
 ax2.plot(t_opt, K_opt, label='K* (Kinaza)', linewidth=2)
 ax2.plot(t_opt, E_opt, label='E* (Efektor)', linewidth=2)
-ax2.axvline(x=t_half_opt, color='red', linestyle='--', alpha=0.5, label=f't1/2={t_half_opt:.1f}s')
+if optimal['success']:
+    ax2.axvline(x=t_half_opt, color='red', linestyle='--', alpha=0.5, label=f't1/2={t_half_opt:.1f}s')
 ax2.axhline(y=0.5, color='gray', linestyle=':', alpha=0.3)
 ax2.set_xlabel('Czas [s]', fontsize=11)
 ax2.set_ylabel('Frakcja aktywna', fontsize=11)
-ax2.set_title('Wszystkie skladowe', fontsize=12)
+ax2.set_title('Wszystkie skladowe' if optimal['success']
+              else 'Wszystkie skladowe (kalibracja nieudana)', fontsize=12)
 ax2.legend(fontsize=9)
 ax2.grid(True, alpha=0.3)
 
 ax3 = axes[1, 0]
 k_cat_values = np.linspace(0.01, 0.2, 30)
-t_halfs_kcat = []
-
-for k_cat in k_cat_values:
-    t, R, K, E = simulate(L=10, k_cat=k_cat, k_off=k_off_opt, t_max=300)
-    t_h = calculate_t_half(t, E)
-    t_halfs_kcat.append(t_h if t_h < 999 else 300)
+_, _, _, _, t_h = simulate_ensemble(L=10, k_cat=k_cat_values, k_off=k_off_opt, t_max=300)
+t_halfs_kcat = np.where(t_h < 999, t_h, 300)
 
 ax3.plot(k_cat_values, t_halfs_kcat, 'o-', linewidth=2, markersize=4, color='purple')
 ax3.axhline(y=120, color='green', linestyle='--', alpha=0.5, label='Cel: 120s')
 ax3.axvline(x=k_cat_opt, color='red', linestyle=':', alpha=0.5, label=f'k_cat={k_cat_opt:.3f}')
 ax3.set_xlabel('k_cat [1/s]', fontsize=11)
 ax3.set_ylabel('t1/2 [s]', fontsize=11)
-ax3.set_title('Wplyw k_cat', fontsize=12)
+ax3.set_title('Wplyw k_cat' if optimal['success'] else 'Wplyw k_cat (kalibracja nieudana)', fontsize=12)
 ax3.legend(fontsize=9)
 ax3.grid(True, alpha=0.3)
 
 ax4 = axes[1, 1]
 k_off_values = np.linspace(0.1, 1.5, 30)
-t_halfs_koff = []
-
-for k_off in k_off_values:
-    t, R, K, E = simulate(L=10, k_cat=k_cat_opt, k_off=k_off, t_max=300)
-    t_h = calculate_t_half(t, E)
-    t_halfs_koff.append(t_h if t_h < 999 else 300)
+_, _, _, _, t_h = simulate_ensemble(L=10, k_cat=k_cat_opt, k_off=k_off_values, t_max=300)
+t_halfs_koff = np.where(t_h < 999, t_h, 300)
 
 ax4.plot(k_off_values, t_halfs_koff, 's-', linewidth=2, markersize=4, color='orange')
 ax4.axhline(y=120, color='green', linestyle='--', alpha=0.5, label='Cel: 120s')
 ax4.axvline(x=k_off_opt, color='red', linestyle=':', alpha=0.5, label=f'k_off={k_off_opt:.3f}')
 ax4.set_xlabel('k_off [1/s]', fontsize=11)
 ax4.set_ylabel('t1/2 [s]', fontsize=11)
-ax4.set_title('Wpływ k_off', fontsize=12)
+ax4.set_title('Wpływ k_off' if optimal['success'] else 'Wpływ k_off (kalibracja nieudana)', fontsize=12)
 ax4.legend(fontsize=9)
 ax4.grid(True, alpha=0.3)
 
@@ -268,14 +223,9 @@ axes[1].legend(fontsize=9)
 axes[1].grid(True, alpha=0.3)
 
 k_off_range = np.linspace(0.1, 3.0, 25)
-t_halfs_q1 = []
-R_steady = []
-
-for k_off in k_off_range:
-    t, R, K, E = simulate(L=10, k_off=k_off, t_max=100)
-    t_h = calculate_t_half(t, E)
-    t_halfs_q1.append(t_h if t_h < 999 else 100)
-    R_steady.append(R[-1])
+_, R, _, _, t_h = simulate_ensemble(L=10, k_off=k_off_range, t_max=100)
+t_halfs_q1 = np.where(t_h < 999, t_h, 100)
+R_steady = R[:, -1]
 
 ax3_twin = axes[2].twinx()
 line1 = axes[2].plot(k_off_range, t_halfs_q1, 'o-', linewidth=2, color='purple', label='t₁/₂')
@@ -310,11 +260,9 @@ L_range = np.logspace(-0.5, 2, 30)
 for k_off, color, label in [(0.2, 'blue', 'k_off=0.2 (niskie)'),
                             (0.5, 'orange', 'k_off=0.5 (średnie)'),
                             (2.0, 'red', 'k_off=2.0 (wysokie)')]:
-    t_halfs_L = []
-    for L in L_range:
-        t, R, K, E = simulate(L=L, k_off=k_off, t_max=100)
-        t_h = calculate_t_half(t, E)
-        t_halfs_L.append(t_h if t_h < 999 else 100)
+    t, _, _, E = simulate_semi_analytic(L=L_range, k_off=k_off, t_max=100)
+    t_h = np.array([calculate_t_half(t, e) for e in E])
+    t_halfs_L = np.where(t_h < 999, t_h, 100)
 
     axes[0, 0].plot(L_range, t_halfs_L, 'o-', linewidth=2, label=label, color=color, markersize=4)
 
@@ -326,12 +274,14 @@ axes[0, 0].legend(fontsize=9)
 axes[0, 0].grid(True, alpha=0.3)
 
 L_range_dense = np.logspace(-0.5, 2, 100)
-for k_off, color in [(0.2, 'blue'), (0.5, 'orange'), (2.0, 'red')]:
-    t_halfs_dense = []
-    for L in L_range_dense:
-        t, R, K, E = simulate(L=L, k_off=k_off, t_max=100)
-        t_h = calculate_t_half(t, E)
-        t_halfs_dense.append(t_h if t_h < 999 else 100)
+k_off_dense = [0.2, 0.5, 2.0]
+# 300 punktow (k_off x L) w puli procesow, fragmenty liczone zespolowo;
+# fragment = jedna krzywa k_off, wiec wynik nie zalezy od liczby procesow
+t_h_dense = run_sweep(metric_t_half, {'k_off': k_off_dense, 'L': L_range_dense},
+                      fixed={'t_max': 100}, simulate=cascade.simulate_ensemble, batch=True,
+                      chunksize=len(L_range_dense))
+for t_h, color in zip(t_h_dense, ['blue', 'orange', 'red']):
+    t_halfs_dense = np.where(t_h < 999, t_h, 100)
 
     gradient = np.abs(np.gradient(t_halfs_dense, L_range_dense))
     axes[0, 1].plot(L_range_dense, gradient, linewidth=2, color=color)
@@ -346,11 +296,9 @@ axes[0, 1].grid(True, alpha=0.3)
 k_cat_range = np.logspace(-2, -0.3, 25)
 
 for L, marker, color in [(1, 'o', 'blue'), (10, 's', 'red'), (20, '^', 'green')]:
-    t_halfs_kcat_L = []
-    for k_cat in k_cat_range:
-        t, R, K, E = simulate(L=L, k_cat=k_cat, t_max=200)
-        t_h = calculate_t_half(t, E)
-        t_halfs_kcat_L.append(t_h if t_h < 999 else 200)
+    t, _, _, E = simulate_semi_analytic(L=L, k_cat=k_cat_range, t_max=200)
+    t_h = np.array([calculate_t_half(t, e) for e in E])
+    t_halfs_kcat_L = np.where(t_h < 999, t_h, 200)
 
     axes[1, 0].plot(k_cat_range, t_halfs_kcat_L, marker=marker, linewidth=2,
                     label=f'L={L}', color=color, markersize=4)
@@ -364,13 +312,9 @@ axes[1, 0].legend(fontsize=9)
 axes[1, 0].grid(True, alpha=0.3)
 
 L_range_sat = np.logspace(-0.5, 2, 30)
-R_steady_list = []
-E_steady_list = []
-
-for L in L_range_sat:
-    t, R, K, E = simulate(L=L, k_off=0.5, t_max=100)
-    R_steady_list.append(R[-1])
-    E_steady_list.append(E[-1])
+_, R, _, E = simulate_semi_analytic(L=L_range_sat, k_off=0.5, t_max=100)
+R_steady_list = R[:, -1]
+E_steady_list = E[:, -1]
 
 ax4_twin = axes[1, 1].twinx()
 line1 = axes[1, 1].plot(L_range_sat, R_steady_list, 'o-', linewidth=2, color='blue', label='R*)')
@@ -390,4 +334,44 @@ labels = [l.get_label() for l in lines]
 axes[1, 1].legend(lines, labels, fontsize=9, loc='center right')
 
 plt.tight_layout()
-plt.show()
\ No newline at end of file
+plt.show()
+
+print("MAPY DAWKA-ODPOWIEDZ")
+print("=" * 60)
+
+# Gesta siatka 500 x 500; calkowane sa tylko punkty przy konturze t1/2 = 5 s,
+# brzegu obszaru E* > 0.5 i w komorkach, gdzie t1/2 nie jest plaskie
+target_map = 5.0
+surfaces = [
+    dose_response_surface(np.logspace(-0.5, 2, 500), np.logspace(-2, 0, 500),
+                          x_name='L', y_name='k_cat', target=target_map),
+    dose_response_surface(np.logspace(-1, 0.5, 500), np.logspace(-0.5, 2, 500),
+                          x_name='k_off', y_name='L', target=target_map),
+]
+
+fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+for row, s in zip(axes, surfaces):
+    print(s.summary())
+    t_map = np.ma.masked_invalid(s.t_half)
+
+    mesh = row[0].pcolormesh(s.x, s.y, t_map, shading='auto', cmap='viridis',
+                             norm=LogNorm())
+    fig.colorbar(mesh, ax=row[0], label='t1/2 [s]')
+    row[0].contour(s.x, s.y, t_map, levels=[target_map], colors='red', linewidths=2)
+    row[0].set_title(f't1/2 (czerwony: {target_map:.0f} s, bialy: brak E* = 0.5)', fontsize=12)
+
+    mesh = row[1].pcolormesh(s.x, s.y, s.E_star, shading='auto', cmap='magma')
+    fig.colorbar(mesh, ax=row[1], label='E*')
+    row[1].contour(s.x, s.y, s.E_star, levels=[0.5], colors='white', linestyles='--')
+    row[1].set_title('Stan ustalony E*', fontsize=12)
+
+    for ax in row:
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel(s.x_name, fontsize=11)
+        ax.set_ylabel(s.y_name, fontsize=11)
+
+plt.tight_layout()
+plt.show()
+
+print(cache.summary())
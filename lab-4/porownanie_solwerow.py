@@ -0,0 +1,41 @@
+import time
+
+import numpy as np
+from cascade import calculate_t_half, simulate, simulate_semi_analytic, solve
+
+METHODS = ['RK45', 'Radau', 'BDF', 'LSODA']
+CASES = [
+    ("bazowy", dict(L=10)),
+    ("duze L", dict(L=100, k_off=2.0, t_max=100)),
+    ("male L", dict(L=0.3, k_off=0.5, t_max=100)),
+]
+# Dopuszczalny max|dE| simulate_semi_analytic (refine=4) wzgledem Radau
+# z rtol=1e-10 - zmierzony blad to ok. 1.8e-5 (L=100)
+SEMI_ANALYTIC_TOL = 5e-5
+
+print("=" * 90)
+print("Porownanie solwerow: RK45 (max_step=0.1) vs metody niejawne z jakobianem")
+print("=" * 90)
+print(f"{'przypadek':>10} {'metoda':>7} {'kroki':>7} {'f(t,y)':>8} {'jakobian':>9} {'LU':>5} "
+      f"{'czas [ms]':>10} {'max|dE|':>10} {'t1/2 [s]':>9}")
+
+for name, args in CASES:
+    _, _, _, E_ref = simulate(**args)
+    for method in METHODS:
+        t0 = time.perf_counter()
+        t, R, K, E = simulate(**args, method=method)
+        elapsed = time.perf_counter() - t0
+
+        sol = solve(**args, method=method)
+        print(f"{name:>10} {method:>7} {len(sol.t) - 1:>7d} {sol.nfev:>8d} {sol.njev:>9d} "
+              f"{sol.nlu:>5d} {elapsed * 1e3:>10.1f} {np.max(np.abs(E - E_ref)):>10.1e} "
+              f"{calculate_t_half(t, E):>9.2f}")
+
+print("\nsimulate_semi_analytic vs Radau (rtol=1e-10, atol=1e-12), "
+      f"tolerancja max|dE| = {SEMI_ANALYTIC_TOL:.0e}")
+for name, args in CASES:
+    t, _, _, E = simulate_semi_analytic(**args)
+    sol = solve(**args, method='Radau', rtol=1e-10, atol=1e-12, dense_output=True)
+    error = np.max(np.abs(E - sol.sol(t)[2]))
+    print(f"{name:>10} {'ETD':>7} {error:>10.1e}")
+    assert error < SEMI_ANALYTIC_TOL, f"{name}: max|dE| = {error:.1e}"
@@ -0,0 +1,187 @@
+import functools
+import hashlib
+import inspect
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+# Zmiana wersji uniewaznia wszystkie wpisy na dysku (np. po zmianie formatu
+# plikow); zmiany kodu modelu wykrywa _code_fingerprint
+CACHE_VERSION = 1
+
+
+def _normalize(value):
+    """Reprezentacja argumentu niezalezna od typu (1 == 1.0, tablice po zawartosci)"""
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((str(k), _normalize(v)) for k, v in value.items())))
+    if isinstance(value, np.ndarray) or isinstance(value, (list, tuple)):
+        a = np.ascontiguousarray(value, dtype=float)
+        return ('array', a.shape, hashlib.sha256(a.tobytes()).hexdigest())
+    if isinstance(value, (bool, str)) or value is None:
+        return value
+    return float(value)
+
+
+@functools.lru_cache(maxsize=None)
+def _file_digest(path, mtime_ns):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _code_fingerprint(func):
+    """
+    Skrot kodu funkcji: zawartosc calego pliku zrodlowego (obejmuje tez
+    funkcje pomocnicze z tego samego modulu, np. _rhs dla simulate),
+    a bez pliku - bajtkod funkcji. Edycja modelu uniewaznia wpisy na dysku.
+    """
+    func = inspect.unwrap(func)
+    try:
+        path = inspect.getsourcefile(func)
+        if path is not None:
+            return _file_digest(path, os.stat(path).st_mtime_ns)
+    except (TypeError, OSError):
+        pass
+    code = getattr(func, '__code__', None)
+    return hashlib.sha256(code.co_code).hexdigest() if code is not None else None
+
+
+class SimulationCache:
+    """
+    Pamiec podreczna wynikow symulacji adresowana zawartoscia: klucz to
+    skrot SHA-256 z nazwy i kodu funkcji (_code_fingerprint), kompletu
+    argumentow (z wartosciami domyslnymi) i ustawien solvera. Dwie warstwy:
+        - w procesie: LRU na max_memory wpisow,
+        - na dysku: skompresowane pliki .npz w katalogu `directory`, o lacznym
+          rozmiarze do max_disk_bytes; przy przekroczeniu usuwane sa pliki
+          najdawniej uzywane (czas modyfikacji odswiezany przy trafieniu).
+
+    Zwracane tablice sa tylko do odczytu - ta sama tablica trafia do
+    kazdego wywolujacego.
+
+    Parametry:
+        directory : str lub None
+            Katalog warstwy dyskowej (None - tylko pamiec procesu)
+        max_memory : int
+            Liczba wpisow w warstwie LRU
+        max_disk_bytes : int
+            Limit rozmiaru warstwy dyskowej [B]
+    """
+
+    def __init__(self, directory=None, max_memory=128, max_disk_bytes=200 * 2**20):
+        self.directory = directory
+        self.max_memory = max_memory
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, func, args, kwargs, settings=None):
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        items = [(name, _normalize(value)) for name, value in bound.arguments.items()]
+        extra = _normalize(settings or {})
+        text = repr((CACHE_VERSION, func.__module__, func.__qualname__, _code_fingerprint(func),
+                     items, extra))
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """Wynik (krotka tablic) albo None"""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.stats['memory_hits'] += 1
+            return self._memory[key]
+
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                with np.load(path) as data:
+                    result = tuple(data[f"a{i}"] for i in range(len(data.files)))
+                os.utime(path)
+            except (OSError, ValueError, KeyError):
+                # Brak pliku albo plik uszkodzony (np. przerwany zapis)
+                pass
+            else:
+                self.stats['disk_hits'] += 1
+                return self._remember(key, result)
+
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, key, result):
+        result = self._remember(key, tuple(np.asarray(a) for a in result))
+        if self.directory is not None:
+            # Zapis do pliku tymczasowego i podmiana - czytelnik nie widzi
+            # niedokonczonego pliku
+            path = self._path(key)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                np.savez_compressed(f, **{f"a{i}": a for i, a in enumerate(result)})
+            os.replace(tmp, path)
+            self._evict()
+        return result
+
+    def _remember(self, key, result):
+        for a in result:
+            a.flags.writeable = False
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+        return result
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    # Usuniety rownolegle przez inny proces
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.stats['evictions'] += 1
+
+    def clear(self):
+        """Usuwa wszystkie wpisy z obu warstw"""
+        self._memory.clear()
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith('.npz'):
+                    os.remove(os.path.join(self.directory, name))
+
+    def wrap(self, func, settings=None):
+        """
+        Zwraca func z pamiecia podreczna. settings - ustawienia solvera
+        ukryte w func (np. metoda, max_step), ktore musza byc czescia klucza.
+        """
+        @functools.wraps(func)
+        def cached(*args, **kwargs):
+            key = self.key(func, args, kwargs, settings)
+            result = self.get(key)
+            if result is None:
+                result = self.put(key, func(*args, **kwargs))
+            return result
+
+        return cached
+
+    def summary(self):
+        s = self.stats
+        lookups = s['memory_hits'] + s['disk_hits'] + s['misses']
+        rate = (s['memory_hits'] + s['disk_hits']) / lookups if lookups else 0.0
+        return (f"cache: {s['memory_hits']} trafien (pamiec), {s['disk_hits']} trafien (dysk), "
+                f"{s['misses']} chybien, trafnosc {rate:.0%}, usuniete: {s['evictions']}")
@@ -0,0 +1,211 @@
+import json
+import time
+
+import numpy as np
+
+import cascade
+from calibration import DEFAULTS, PARAMS
+
+
+class Surface:
+    """
+    Powierzchnia t1/2 i E* na siatce (y, x) - zwarte tablice float32
+    z metadanymi osi. Konwencja jak w pcolormesh/contour: t_half[i, j]
+    odpowiada punktowi (x[j], y[i]).
+
+    Pola:
+        x_name, y_name : str
+            Nazwy parametrow wzdluz osi (z calibration.PARAMS)
+        x, y : ndarray
+            Wartosci na osiach
+        t_half : ndarray (ny, nx) float32
+            t1/2 [s]; inf, gdy E* nie osiaga 0.5 do t_max
+        E_star : ndarray (ny, nx) float32
+            Stan ustalony efektora (postac zamknieta, dokladny w kazdym punkcie)
+        solved : ndarray (ny, nx) bool
+            True - t1/2 policzone calkowaniem, False - interpolowane lub
+            rozstrzygniete z E* <= 0.5 bez calkowania
+        params : dict
+            Parametry ustalone
+        meta : dict
+            target, t_max, dt, czas obliczen
+    """
+
+    def __init__(self, x_name, x, y_name, y, t_half, E_star, solved, params, meta=None):
+        self.x_name = x_name
+        self.y_name = y_name
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.t_half = np.asarray(t_half, dtype=np.float32)
+        self.E_star = np.asarray(E_star, dtype=np.float32)
+        self.solved = np.asarray(solved, dtype=bool)
+        self.params = dict(params)
+        self.meta = dict(meta or {})
+
+    @property
+    def shape(self):
+        return self.t_half.shape
+
+    @property
+    def n_solves(self):
+        return int(self.solved.sum())
+
+    def save(self, path):
+        """Zapis do skompresowanego .npz (metadane jako JSON)"""
+        meta = {'x_name': self.x_name, 'y_name': self.y_name,
+                'params': self.params, 'meta': self.meta}
+        np.savez_compressed(path, x=self.x, y=self.y, t_half=self.t_half,
+                            E_star=self.E_star, solved=self.solved,
+                            info=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            info = json.loads(str(data['info']))
+            return cls(info['x_name'], data['x'], info['y_name'], data['y'],
+                       data['t_half'], data['E_star'], data['solved'],
+                       info['params'], info['meta'])
+
+    def summary(self):
+        total = self.t_half.size
+        return (f"powierzchnia {self.y_name} x {self.x_name} {self.shape[0]}x{self.shape[1]}: "
+                f"{self.n_solves} calkowan ({self.n_solves / total:.1%} punktow), "
+                f"czas {self.meta.get('wall_time', 0.0):.1f}s")
+
+
+def crossing_times(t, E, level=0.5):
+    """
+    Pierwsze przeciecie E = level w kazdym wierszu E (M, nt) z interpolacja
+    liniowa miedzy wezlami t (rownomierna siatka); inf, gdy brak przeciecia.
+    """
+    reached = E >= level
+    first = np.maximum(np.argmax(reached, axis=1), 1)
+    rows = np.arange(E.shape[0])
+    e0 = E[rows, first - 1]
+    e1 = E[rows, first]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_cross = t[first - 1] + (level - e0) / (e1 - e0) * (t[1] - t[0])
+    return np.where(reached.any(axis=1), t_cross, np.inf)
+
+
+def _lattice(n, stride):
+    """Indeksy 0, stride, 2*stride, ... z dolaczonym ostatnim n - 1"""
+    idx = np.arange(0, n, stride)
+    return idx if idx[-1] == n - 1 else np.append(idx, n - 1)
+
+
+def _cells(fine, coarse):
+    """Dla indeksow fine: numer komorki siatki coarse i waga liniowa w komorce"""
+    c = np.clip(np.searchsorted(coarse, fine, side='right') - 1, 0, len(coarse) - 2)
+    w = (fine - coarse[c]) / (coarse[c + 1] - coarse[c])
+    return c, w
+
+
+def dose_response_surface(x, y, x_name='L', y_name='k_cat', params=None, target=None,
+                          coarse=16, flat_rtol=0.05, t_max=100, dt=0.05, chunk=1024):
+    """
+    Powierzchnia t1/2 i E* na gestej siatce (y, x) z adaptacyjnym zageszczaniem.
+
+    E* liczone jest w postaci zamknietej (cascade.steady_state) w kazdym
+    punkcie; punkty z E* <= 0.5 maja t1/2 = inf bez calkowania. t1/2 liczone
+    jest zespolowo (cascade.semi_analytic, fragmenty po `chunk` punktow)
+    najpierw na siatce co `coarse` wezlow, a potem hierarchicznie (krok /2):
+    nowy punkt jest calkowany tylko wtedy, gdy komorka poprzedniego poziomu
+        - przecina kontur t1/2 = target (z marginesem flat_rtol),
+        - ma naroznik z t1/2 = inf (brzeg obszaru osiagalnego),
+        - nie jest plaska: (max - min) > flat_rtol * min.
+    W pozostalych komorkach t1/2 jest interpolowane liniowo z naroznikow.
+
+    Parametry:
+        x, y : array
+            Wartosci parametrow na osiach
+        x_name, y_name : str
+            Nazwy parametrow (z calibration.PARAMS), np. ('L', 'k_cat')
+            albo ('k_off', 'L')
+        params : dict
+            Parametry ustalone (brakujace z calibration.DEFAULTS)
+        target : float
+            Docelowe t1/2 [s], wokol ktorego zageszczana jest siatka
+        coarse : int
+            Krok siatki poczatkowej (potega 2)
+        flat_rtol : float
+            Wzgledna zmiennosc t1/2 w komorce uznawanej za plaska
+        t_max, dt : float
+            Horyzont i krok siatki czasu semi_analytic [s] (blad t1/2 ~1e-5 dla dt = 0.05)
+        chunk : int
+            Liczba punktow w jednym wywolaniu semi_analytic
+
+    Zwraca Surface.
+    """
+    for name in (x_name, y_name):
+        if name not in PARAMS:
+            raise ValueError(f"Nieznany parametr: {name}")
+    if x_name == y_name:
+        raise ValueError("Osie musza dotyczyc roznych parametrow")
+    if coarse < 1 or coarse & (coarse - 1):
+        raise ValueError("coarse musi byc potega 2")
+
+    t0 = time.perf_counter()
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    fixed = {**DEFAULTS, **(params or {})}
+    fixed.pop(x_name, None)
+    fixed.pop(y_name, None)
+    X, Y = np.meshgrid(x, y)
+    grid = {**fixed, x_name: X, y_name: Y}
+
+    _, _, E_star = cascade.steady_state(**grid)
+    E_star = np.broadcast_to(E_star, X.shape)
+
+    t = np.arange(0, t_max + dt / 2, dt)
+    t_half = np.full(X.shape, np.nan)
+    solved = np.zeros(X.shape, dtype=bool)
+    # Kaskada startujaca z zera jest monotoniczna: E* <= 0.5 => brak t1/2
+    t_half[E_star <= 0.5] = np.inf
+
+    def solve(rows, cols):
+        for start in range(0, len(rows), chunk):
+            i, j = rows[start:start + chunk], cols[start:start + chunk]
+            point = {**fixed, x_name: x[j], y_name: y[i]}
+            _, _, E = cascade.semi_analytic(t, **point)
+            t_half[i, j] = crossing_times(t, E)
+            solved[i, j] = True
+
+    ny, nx = X.shape
+    stride = coarse
+    iy, ix = _lattice(ny, stride), _lattice(nx, stride)
+    rows, cols = np.nonzero(np.isnan(t_half[np.ix_(iy, ix)]))
+    solve(iy[rows], ix[cols])
+
+    while stride > 1:
+        stride //= 2
+        py, px = iy, ix
+        iy, ix = _lattice(ny, stride), _lattice(nx, stride)
+
+        # Narozniki komorek poprzedniego poziomu
+        T = t_half[np.ix_(py, px)]
+        corners = np.stack([T[:-1, :-1], T[:-1, 1:], T[1:, :-1], T[1:, 1:]])
+        lo, hi = corners.min(axis=0), corners.max(axis=0)
+        finite = np.isfinite(corners).all(axis=0)
+        with np.errstate(invalid='ignore'):
+            active = ~finite | (hi - lo > flat_rtol * lo)
+        if target is not None:
+            active |= (lo * (1 - flat_rtol) <= target) & (target <= hi * (1 + flat_rtol))
+
+        ci, wy = _cells(iy, py)
+        cj, wx = _cells(ix, px)
+        todo = np.isnan(t_half[np.ix_(iy, ix)])
+        rows, cols = np.nonzero(todo & active[np.ix_(ci, cj)])
+        solve(iy[rows], ix[cols])
+
+        # Komorki plaskie: interpolacja liniowa z naroznikow
+        rows, cols = np.nonzero(todo & ~active[np.ix_(ci, cj)])
+        a, b = ci[rows], cj[cols]
+        u, v = wy[rows], wx[cols]
+        t_half[iy[rows], ix[cols]] = ((1 - u) * ((1 - v) * T[a, b] + v * T[a, b + 1])
+                                      + u * ((1 - v) * T[a + 1, b] + v * T[a + 1, b + 1]))
+
+    meta = {'target': target, 't_max': t_max, 'dt': dt, 'coarse': coarse,
+            'flat_rtol': flat_rtol, 'wall_time': time.perf_counter() - t0}
+    return Surface(x_name, x, y_name, y, t_half, E_star, solved,
+                   {k: float(v) for k, v in fixed.items()}, meta)
@@ -0,0 +1,91 @@
+import os
+import sys
+
+import numpy as np
+
+import cascade
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from parallel import chunk_bounds, default_workers, run_chunks
+
+
+def metric_t_half(t, R, K, E):
+    """t1/2 jak calculate_t_half (999.9 gdy E* nie osiaga 0.5)"""
+    return cascade.calculate_t_half(t, E)
+
+
+def metric_final(t, R, K, E):
+    """Stan koncowy (R*, E*)"""
+    return R[-1], E[-1]
+
+
+def param_grid(**axes):
+    """
+    Siatka kartezjanska parametrow (kolejnosc C: ostatnia os zmienia sie
+    najszybciej). Zwraca (shape, points) - points to lista slownikow.
+    """
+    names = list(axes)
+    values = [np.atleast_1d(np.asarray(axes[name], dtype=float)) for name in names]
+    shape = tuple(len(v) for v in values)
+    mesh = np.meshgrid(*values, indexing='ij')
+    flat = [m.ravel() for m in mesh]
+    points = [{name: float(col[i]) for name, col in zip(names, flat)}
+              for i in range(int(np.prod(shape)))]
+    return shape, points
+
+
+def _run_chunk(simulate, metric, fixed, points, batch):
+    if batch:
+        # Caly fragment jednym wywolaniem simulate_ensemble
+        stacked = {name: np.array([p[name] for p in points]) for name in points[0]}
+        t, R, K, E, _ = simulate(**fixed, **stacked)
+        return [metric(t, R[i], K[i], E[i]) for i in range(len(points))]
+    results = []
+    for p in points:
+        t, R, K, E = simulate(**fixed, **p)
+        results.append(metric(t, R, K, E))
+    return results
+
+
+def run_sweep(metric, grid, fixed=None, simulate=cascade.simulate, batch=False,
+              workers=None, chunksize=None, progress=True):
+    """
+    Przeglad parametrow w puli procesow.
+
+    Parametry:
+        metric : callable
+            metric(t, R, K, E) -> liczba lub krotka liczb; funkcja z poziomu
+            modulu (musi dac sie przeslac do procesu potomnego)
+        grid : dict
+            {nazwa_parametru: wartosci} - siatka kartezjanska
+        fixed : dict
+            Parametry stale, np. {'t_max': 100}
+        simulate : callable
+            cascade.simulate albo cascade.simulate_ensemble (batch=True)
+        batch : bool
+            Fragment siatki liczony jednym wywolaniem simulate_ensemble.
+            Zespol ma wspolny krok i wspolna norme bledu, wiec wynik punktu
+            zalezy od tego, z jakimi punktami dzieli fragment - zmiana
+            workers albo chunksize zmienia wyniki (w granicach tolerancji
+            solvera). Dla wynikow niezaleznych od podzialu: batch=False
+            albo staly chunksize.
+        workers : int
+            Liczba procesow (domyslnie os.cpu_count()); 1 - bez puli
+        chunksize : int
+            Liczba punktow na zadanie (domyslnie ~4 zadania na proces)
+        progress : bool
+            Postep na stderr
+
+    Zwraca tablice o ksztalcie siatki (+ wymiar krotki zwracanej przez metric),
+    w kolejnosci siatki niezaleznie od kolejnosci ukonczenia zadan.
+    """
+    fixed = fixed or {}
+    shape, points = param_grid(**grid)
+    workers = default_workers(workers)
+    bounds = chunk_bounds(len(points), workers, chunksize)
+    tasks = [(simulate, metric, fixed, points[a:b], batch) for a, b in bounds]
+    results = run_chunks(_run_chunk, tasks, [b - a for a, b in bounds], workers,
+                         label='przeglad', progress=progress)
+
+    values = np.array([r for chunk in results for r in chunk], dtype=float)
+    return values.reshape(shape + values.shape[1:])
@@ -3,6 +3,33 @@ import matplotlib.pyplot as plt
 from scipy.integrate import solve_ivp
 from scipy.linalg import eig
 
+# Solwer: 'RK45' (jak dotad, max_step=0.1) albo 'Radau', 'BDF', 'LSODA'
+METHOD = 'RK45'
+STIFF_METHODS = ('Radau', 'BDF', 'LSODA')
+# Tolerancje dobrane tak, zeby blad na trajektorii konkurencji byl rzedu
+# 1e-6, jak dla RK45 z max_step=0.1 (BDF i LSODA przy rtol=1e-6 daja ~1e-4)
+TOLERANCES = {'Radau': (1e-6, 1e-9), 'BDF': (1e-9, 1e-12), 'LSODA': (1e-9, 1e-12)}
+
+
+def integrate(f, jac, t_span, z0, method=None, **options):
+    """
+    solve_ivp wybrana metoda. RK45 - z max_step=0.1 jak dotad; metody niejawne
+    dostaja jakobian analityczny jac(t, z), tolerancje z TOLERANCES i punkty
+    wyjsciowe co 0.1 (tak gesto jak przy max_step=0.1 - do wykresow).
+    options nadpisuja ustawienia domyslne.
+    """
+    method = method or METHOD
+    if method in STIFF_METHODS:
+        rtol, atol = TOLERANCES[method]
+        n = int(round((t_span[1] - t_span[0]) / 0.1)) + 1
+        settings = {'jac': jac, 'rtol': rtol, 'atol': atol,
+                    't_eval': np.linspace(t_span[0], t_span[1], n)}
+    else:
+        settings = {'max_step': 0.1}
+    settings.update(options)
+    return solve_ivp(f, t_span, z0, method=method, **settings)
+
+
 print("=" * 50)
 print("COMPETITION MODEL")
 print("=" * 50)
@@ -18,6 +45,9 @@ def jacobian_competition(x, y):
     return np.array([[a - b * y, -b * x],
                      [d * y, -c + d * x]])
 
+def jac_competition(t, z):
+    return jacobian_competition(*z)
+
 points = [(0, 0), (a / b, 0), (0, c / d), (c / d, a / b)]
 for i, (x, y) in enumerate(points, 1):
     J = jacobian_competition(x, y)
@@ -33,7 +63,7 @@ fig, ax = plt.subplots(figsize=(10, 8))
 
 for x0 in np.linspace(0.1, 2.0, 7):
     for y0 in np.linspace(0.1, 2.0, 7):
-        sol = solve_ivp(f_competition, [0, 50], [x0, y0], max_step=0.1)
+        sol = integrate(f_competition, jac_competition, [0, 50], [x0, y0])
         ax.plot(sol.y[0], sol.y[1], alpha=0.6, linewidth=1)
 
 for i, (x, y) in enumerate(points, 1):
@@ -61,6 +91,18 @@ def jacobian_mutualism(x, y):
     return np.array([[a_mut + b_mut * y, b_mut * x],
                      [d_mut * y, c_mut + d_mut * x]])
 
+def jac_mutualism(t, z):
+    return jacobian_mutualism(*z)
+
+def escape(t, z):
+    # Model mutualny wybucha w skonczonym czasie - koniec calkowania przy
+    # 1e6 (bez tego LSODA zawiesza sie na wartosciach inf). Tylko dla metod
+    # niejawnych - przebieg RK45 na [0, 20] pozostaje jak dotad.
+    return max(z) - 1e6
+
+escape.terminal = True
+mutualism_options = {'events': escape} if METHOD in STIFF_METHODS else {}
+
 
 J = jacobian_mutualism(0, 0)
 eigenvalues = eig(J)[0]
@@ -70,7 +112,7 @@ fig, ax = plt.subplots(figsize=(10, 8))
 
 for x0 in np.linspace(0.1, 1.0, 6):
     for y0 in np.linspace(0.1, 1.0, 6):
-        sol = solve_ivp(f_mutualism, [0, 20], [x0, y0], max_step=0.1)
+        sol = integrate(f_mutualism, jac_mutualism, [0, 20], [x0, y0], **mutualism_options)
         ax.plot(sol.y[0], sol.y[1], alpha=0.6, linewidth=1)
 
 ax.plot(0, 0, 'ro', markersize=10, label='P1 (0,0)')
@@ -91,7 +133,7 @@ cases = [
 ]
 
 for ax, (title, x0, y0) in zip(axes, cases):
-    sol = solve_ivp(f_competition, [0, 100], [x0, y0], max_step=0.1)
+    sol = integrate(f_competition, jac_competition, [0, 100], [x0, y0])
     ax.plot(sol.y[0], sol.y[1], 'b-', linewidth=2, label='Trajektoria')
     ax.plot(x0, y0, 'go', markersize=10, label='Start')
 
@@ -116,7 +158,7 @@ plt.show()
 fig, axes = plt.subplots(1, 3, figsize=(15, 4))
 
 for ax, (title, x0, y0) in zip(axes, cases):
-    sol = solve_ivp(f_competition, [0, 100], [x0, y0], max_step=0.1, dense_output=True)
+    sol = integrate(f_competition, jac_competition, [0, 100], [x0, y0], dense_output=True)
     t = np.linspace(0, 100, 1000)
     y = sol.sol(t)
 
@@ -131,6 +173,22 @@ for ax, (title, x0, y0) in zip(axes, cases):
 plt.tight_layout()
 plt.show()
 
+print("\n" + "=" * 50)
+print("POROWNANIE SOLWEROW")
+print("=" * 50)
+
+# Ta sama trajektoria (model konkurencji, start (2.0, 0.8)) kazda metoda;
+# t_eval=None - sol.t to kroki solvera. Odniesienie: RK45 z rtol=1e-12.
+reference = solve_ivp(f_competition, [0, 100], [2.0, 0.8], rtol=1e-12, atol=1e-12,
+                      dense_output=True)
+t_check = np.linspace(0, 100, 1000)
+print(f"{'metoda':>7} {'kroki':>7} {'f(t,z)':>8} {'jakobian':>9} {'LU':>5} {'max blad':>10}")
+for method in ['RK45', 'Radau', 'BDF', 'LSODA']:
+    sol = integrate(f_competition, jac_competition, [0, 100], [2.0, 0.8], method=method,
+                    t_eval=None, dense_output=True)
+    error = np.max(np.abs(sol.sol(t_check) - reference.sol(t_check)))
+    print(f"{method:>7} {len(sol.t) - 1:>7d} {sol.nfev:>8d} {sol.njev:>9d} {sol.nlu:>5d} {error:>10.1e}")
+
 print("\n" + "=" * 50)
 print("CONTROL QUESTIONS")
 print("=" * 50)
@@ -2,8 +2,17 @@ import numpy as np
 import scipy as sp
 import matplotlib.pyplot as plt
 from scipy.integrate import solve_ivp
+from types import SimpleNamespace
 
 r, K, k, alpha, P0, delta = 0.71, 1e6, 1e-7, 1.2, 1e4, 0.2
+BREAKPOINTS = (12, 72)  # okno dzialania leku [h]
+
+P0_init = 1e3
+I0_init = 0.1
+initial_state = [P0_init, I0_init]
+
+t_span = (0, 144)
+t_eval = np.linspace(t_span[0], t_span[1], 1000) # punkty do ewaluacji
 
 def f(t: float, state: tuple[float, float], mode: str = "r") -> tuple[float, float]:
     """""
@@ -15,29 +24,112 @@ def f(t: float, state: tuple[float, float], mode: str = "r") -> tuple[float, flo
     tuple[float, float]: dP and dI at given time step
     """
     P, I = state
+    r_local, k_local = rates(t, mode)
+
+    dP = r_local * P * (1 - P / K) - k_local * I * P
+    dI = ((alpha * P) / (P + P0)) - delta * I
+
+    return [dP, dI]
+
+
+def rates(t: float, mode: str = "r") -> tuple[float, float]:
+    """
+    Rates r and k at time t; the drug acts between BREAKPOINTS (12-72 h).
+    Args:
+    t(float): time in simulation
+    mode(str): "r" - drug inhibits the virus, "k" - drug helps the immune response, other - no drug
+    Returns:
+    tuple[float, float]: r and k at given time
+    """
     r_local, k_local = r, k
 
-    if 12 <= t <= 72:
+    if BREAKPOINTS[0] <= t <= BREAKPOINTS[1]:
         if mode == "r":
             r_local *= 0.0001
         elif mode == "k":
             k_local *= 500000
 
-    dP = r_local * P * (1 - P / K) - k_local * I * P
-    dI = ((alpha * P) / (P + P0)) - delta * I
+    return r_local, k_local
 
-    return [dP, dI]
 
-P0_init = 1e3
-I0_init = 0.1
-initial_state = [P0_init, I0_init]
+def jac(t: float, state: tuple[float, float], mode: str = "r") -> np.ndarray:
+    """
+    Analytic Jacobian of f with respect to (P, I), passed to implicit solvers.
+    Args:
+    t(float): time in simulation
+    state(tuple[float, float]): tuple containing current values of P and I
+    mode(str): drug mode, as in f
+    Returns:
+    np.ndarray: 2x2 matrix d(dP, dI)/d(P, I)
+    """
+    P, I = state
+    r_local, k_local = rates(t, mode)
 
-t_span = (0, 144)
-t_eval = np.linspace(t_span[0], t_span[1], 1000) # punkty do ewaluacji
+    return np.array([[r_local * (1 - 2 * P / K) - k_local * I, -k_local * P],
+                     [alpha * P0 / (P + P0) ** 2, -delta]])
 
-solution = solve_ivp(lambda t, y: f(t, y, mode="none"), t_span, initial_state, t_eval=t_eval)
-solution_r = solve_ivp(lambda t, y: f(t, y, mode="r"), t_span, initial_state, t_eval=t_eval)
-solution_k = solve_ivp(lambda t, y: f(t, y, mode="k"), t_span, initial_state, t_eval=t_eval)
+
+# Solver: "RK45" (default solve_ivp settings, as before) or "Radau", "BDF", "LSODA"
+METHOD = "RK45"
+STIFF_METHODS = ("Radau", "BDF", "LSODA")
+# rtol/atol for implicit methods - relative error ~1e-6 (RK45 with default tolerances: ~1e-2)
+TOLERANCES = {"Radau": (1e-6, 1e-9), "BDF": (1e-6, 1e-9), "LSODA": (1e-6, 1e-9)}
+
+
+def solve_piecewise(mode: str, method: str, t_span, initial_state, t_eval, **options) -> SimpleNamespace:
+    """
+    Integrates f separately on [start, 12], [12, 72], [72, end], so that no step
+    crosses a jump of the drug-dependent rates.
+    Args:
+    mode(str): drug mode, as in f
+    method(str): solve_ivp method
+    t_span(tuple): start and end time
+    initial_state(list): initial P and I
+    t_eval(np.ndarray): output times
+    options: extra solve_ivp arguments
+    Returns:
+    SimpleNamespace: t, y (like solve_ivp) and summed nfev, njev, nlu, n_steps
+    """
+    edges = [t_span[0], *[b for b in BREAKPOINTS if t_span[0] < b < t_span[1]], t_span[1]]
+    state = initial_state
+    ys = []
+    result = SimpleNamespace(t=t_eval, nfev=0, njev=0, nlu=0, n_steps=0)
+    for i, (start, end) in enumerate(zip(edges[:-1], edges[1:])):
+        sol = solve_ivp(lambda t, y: f(t, y, mode), (start, end), state, method=method,
+                        dense_output=True, **options)
+        last = i == len(edges) - 2
+        mask = (t_eval >= start) & ((t_eval < end) | (last & (t_eval <= end)))
+        ys.append(sol.sol(t_eval[mask]))
+        state = sol.y[:, -1]
+        result.nfev += sol.nfev
+        result.njev += sol.njev
+        result.nlu += sol.nlu
+        result.n_steps += len(sol.t) - 1
+    result.y = np.hstack(ys)
+    return result
+
+
+def simulate(mode: str, method: str = None):
+    """
+    Simulation for the given drug mode. RK45 - a single solve_ivp call, as before;
+    implicit methods get the analytic Jacobian, TOLERANCES and restart at BREAKPOINTS.
+    Args:
+    mode(str): drug mode, as in f
+    method(str): solve_ivp method (default METHOD)
+    Returns:
+    solution with t and y fields evaluated at t_eval
+    """
+    method = method or METHOD
+    if method in STIFF_METHODS:
+        rtol, atol = TOLERANCES[method]
+        return solve_piecewise(mode, method, t_span, initial_state, t_eval,
+                               jac=lambda t, y: jac(t, y, mode), rtol=rtol, atol=atol)
+    return solve_ivp(lambda t, y: f(t, y, mode=mode), t_span, initial_state, method=method,
+                     t_eval=t_eval)
+
+solution = simulate("none")
+solution_r = simulate("r")
+solution_k = simulate("k")
 
 fig, axes = plt.subplots(3, 1, figsize=(10, 12), sharex=True)
 
@@ -80,4 +172,22 @@ time_medicine_k = eradication_time(solution_k)
 
 print(f"Bez leku: {time_without:.2f} godzin")
 print(f"Lek 'r' (r_local *= 0.0001): {time_medicine_r:.2f} godzin")
-print(f"Lek 'k' (k_local *= 500000): {time_medicine_k:.2f} godzin")
\ No newline at end of file
+print(f"Lek 'k' (k_local *= 500000): {time_medicine_k:.2f} godzin")
+
+# Porownanie solverow: kroki, wywolania f i jakobianu, rozklady LU oraz blad
+# wzgledny wzgledem rozwiazania odniesienia (DOP853, rtol=1e-12, z restartami)
+print()
+print(f"{'tryb':>5} {'metoda':>7} {'kroki':>6} {'f(t,y)':>7} {'jakobian':>9} {'LU':>5} {'blad P':>9} {'blad I':>9}")
+for mode in ["none", "r", "k"]:
+    reference = solve_piecewise(mode, "DOP853", t_span, initial_state, t_eval, rtol=1e-12, atol=1e-9)
+    scale = np.abs(reference.y).max(axis=1)
+    for method in ["RK45", *STIFF_METHODS]:
+        sol = simulate(mode, method)
+        if method in STIFF_METHODS:
+            counts = (sol.n_steps, sol.nfev, sol.njev, sol.nlu)
+        else:
+            full = solve_ivp(lambda t, y: f(t, y, mode=mode), t_span, initial_state, method=method)
+            counts = (len(full.t) - 1, full.nfev, full.njev, full.nlu)
+        error_P, error_I = np.abs(sol.y - reference.y).max(axis=1) / scale
+        print(f"{mode:>5} {method:>7} {counts[0]:>6d} {counts[1]:>7d} {counts[2]:>9d} {counts[3]:>5d} "
+              f"{error_P:>9.1e} {error_I:>9.1e}")